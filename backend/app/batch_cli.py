@@ -0,0 +1,202 @@
+"""
+Offline batch runner: check a directory of PDF/DOCX contracts without the HTTP API.
+
+    cd backend
+    python -m app.batch_cli /path/to/contracts --out results.jsonl
+
+Parsing and clause splitting (pypdf, python-docx, the splitter's regexes) are
+CPU-bound and hold the GIL, so they run in a process pool. The main process
+sends chunks of parsed documents through the batch path (check_clauses_batch),
+so clauses repeated across a chunk are retrieved and evaluated once.
+
+Every finished document is appended to the JSONL output as one line and
+fsynced per chunk; the output is also the checkpoint. Re-running with the
+same --out skips documents already in it (same relative path, size and
+mtime), so an interrupted backfill resumes where it stopped. Documents that
+failed to parse are written with an "error" and retried on the next run.
+When a document appears more than once, its last line wins.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from app.exceptions import AppError
+from app.logger import get_logger
+from app.services.file_parser import parse_uploaded_file, parse_in_pool, SUPPORTED_EXTENSIONS
+from app.utils import split_into_clauses
+
+DEFAULT_CHUNK_SIZE = 8
+
+log = get_logger(__name__)
+
+
+def discover(root: Path) -> List[Path]:
+    return sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS)
+
+
+def fingerprint(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_checkpoint(out_path: Path) -> Dict[str, str]:
+    """
+    document -> fingerprint for documents already checked in `out_path`.
+    A torn last line (the run was killed mid-write) is truncated so
+    appending continues on a clean line.
+    """
+    done: Dict[str, str] = {}
+    if not out_path.exists():
+        return done
+
+    valid = 0
+    with open(out_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            valid += len(line)
+            if record.get("error"):
+                done.pop(record["document"], None)
+            else:
+                done[record["document"]] = record.get("fingerprint")
+
+    if valid < out_path.stat().st_size:
+        log.warning(f"Truncating incomplete last record in {out_path}")
+        with open(out_path, "r+b") as f:
+            f.truncate(valid)
+    return done
+
+
+def parse_and_split(path: str) -> Tuple[List[str], str]:
+    """Process-pool worker: (clauses, error) for one document."""
+    try:
+        return split_into_clauses(parse_uploaded_file(Path(path))), ""
+    except AppError as e:
+        return [], str(e)
+
+
+class Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.documents = 0
+        self.failed = 0
+        self.clauses = 0
+        self.start = time.monotonic()
+
+    def add(self, documents: int, clauses: int, failed: int = 0):
+        self.documents += documents
+        self.clauses += clauses
+        self.failed += failed
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        rate = self.documents / elapsed
+        eta = (self.total - self.documents) / rate if rate else 0
+        log.info(
+            f"[batch] {self.documents}/{self.total} documents ({self.failed} failed), "
+            f"{self.clauses} clauses, {rate * 60:.1f} docs/min, {self.clauses / elapsed:.2f} clauses/s, "
+            f"ETA {eta / 60:.1f} min"
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "documents": self.documents,
+            "failed": self.failed,
+            "clauses": self.clauses,
+            "seconds": round(time.monotonic() - self.start, 3),
+        }
+
+
+def _write(f, records: List[Dict]):
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def run(input_dir: str, out: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = None,
+        top_k: int = 2, frameworks: Sequence[str] = None, warm: bool = True) -> Dict:
+    from app.services.batch_service import check_clauses_batch
+    from app.startup import warm_up
+
+    root = Path(input_dir)
+    out_path = Path(out)
+    workers = workers or os.cpu_count() or 1
+
+    paths = discover(root)
+    done = load_checkpoint(out_path)
+    fingerprints = {p: fingerprint(p) for p in paths}
+    todo = [p for p in paths if done.get(p.relative_to(root).as_posix()) != fingerprints[p]]
+    log.info(f"[batch] {len(paths)} documents in {root}, {len(paths) - len(todo)} already in {out_path}")
+
+    progress = Progress(len(todo))
+    if not todo:
+        return {**progress.stats(), "skipped": len(paths)}
+    if warm:
+        warm_up()
+
+    def flush(f, chunk):
+        reports = check_clauses_batch(
+            [(name, clauses) for name, _, clauses in chunk], top_k=top_k, frameworks=frameworks
+        )["documents"]
+        _write(f, [
+            {"document": name, "fingerprint": fp, "summary": report["summary"], "results": report["results"]}
+            for (name, fp, _), report in zip(chunk, reports)
+        ])
+        progress.add(len(chunk), sum(len(report["results"]) for report in reports))
+        progress.report()
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "a", encoding="utf-8") as f:
+        chunk = []
+        for path, (clauses, error) in parse_in_pool(todo, workers, parse_and_split):
+            name = path.relative_to(root).as_posix()
+            if error:
+                log.warning(f"[batch] {name}: {error}")
+                _write(f, [{"document": name, "fingerprint": fingerprints[path], "error": error}])
+                progress.add(1, 0, failed=1)
+                continue
+            chunk.append((name, fingerprints[path], clauses))
+            if len(chunk) >= chunk_size:
+                flush(f, chunk)
+                chunk = []
+        if chunk:
+            flush(f, chunk)
+
+    stats = {**progress.stats(), "skipped": len(paths) - len(todo)}
+    log.info(f"[batch] finished: {stats}")
+    return stats
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check a directory of PDF/DOCX contracts, writing JSONL results.")
+    parser.add_argument("input_dir", help="directory searched recursively for .pdf / .docx files")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL output, also the resume checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="documents per batch call (clauses are deduplicated within a chunk)")
+    parser.add_argument("--workers", type=int, default=None, help="parse processes (default: CPU count)")
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--framework", action="append", dest="frameworks",
+                        help="regulation framework to check against (repeatable)")
+    parser.add_argument("--no-warm-up", action="store_true",
+                        help="skip opening/ingesting the collection and preloading models first")
+    args = parser.parse_args(argv)
+
+    if not Path(args.input_dir).is_dir():
+        parser.error(f"not a directory: {args.input_dir}")
+
+    stats = run(args.input_dir, args.out, chunk_size=args.chunk_size, workers=args.workers,
+                top_k=args.top_k, frameworks=args.frameworks, warm=not args.no_warm_up)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,85 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "backend/chroma_store")
-COLLECTION_NAME = os.getenv("COLLECTION_NAME", "compliance_rules")
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BACKEND_DIR / "app" / "data"
+
+# absolute, so every worker process opens the same store whatever its working directory
+CHROMA_PERSIST_DIR = str(Path(os.getenv("CHROMA_PERSIST_DIR", str(BACKEND_DIR / "chroma_store"))).resolve())
+# Optional Chroma server (`chroma run --path <dir>`) queried over HTTP instead of
+# every worker opening the persist dir itself; aliases and locks stay in CHROMA_PERSIST_DIR
+CHROMA_SERVER_HOST = os.getenv("CHROMA_SERVER_HOST", "")
+CHROMA_SERVER_PORT = int(os.getenv("CHROMA_SERVER_PORT", "8001"))
+COLLECTION_NAME = os.getenv("COLLECTION_NAME", "regulations")
 
 OLLAMA_LLM_MODEL = os.getenv("OLLAMA_LLM_MODEL", "llama3")
 OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+
+# Two-tier cascade: a small model triages clauses, only uncertain or
+# non-compliant ones are escalated to OLLAMA_LLM_MODEL
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "false").lower() in ("1", "true", "yes")
+OLLAMA_TRIAGE_MODEL = os.getenv("OLLAMA_TRIAGE_MODEL", "llama3.2:1b")
+CASCADE_CONFIDENCE_THRESHOLD = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.85"))
+# fraction of accepted clauses escalated anyway to measure tier agreement
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.05"))
+
+# background | sync | off
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+
+# Near-duplicate verdict reuse (opt-in: reused verdicts skip the LLM)
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "false").lower() in ("1", "true", "yes")
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+NEAR_DUP_DB_PATH = os.getenv("NEAR_DUP_DB_PATH", str(DATA_DIR / "clause_index.sqlite3"))
+
+# Shared LLM gateway: max concurrent generations against Ollama, and how many
+# callers may wait (FIFO) before new ones get a 429
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "2"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "120"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "8"))
+
+# Per-request deadline (seconds) when the caller doesn't pass ?deadline_s=;
+# a bit below the Streamlit client's 600s timeout so partial results still arrive
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "570"))
+
+# Embedding micro-batching: concurrent query embeddings are collected for up to
+# EMBED_BATCH_MAX_WAIT_MS (or EMBED_BATCH_MAX_SIZE texts) and sent as one call
+EMBED_BATCH_ENABLED = os.getenv("EMBED_BATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+# a caller stops waiting for its batched embedding after this long (503) instead of hanging
+EMBED_BATCH_TIMEOUT_S = float(os.getenv("EMBED_BATCH_TIMEOUT_S", "60"))
+
+# Keep models loaded and the context size fixed: Ollama reloads a model (and drops
+# its prompt cache) when it is unloaded or called with a different num_ctx
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+
+# Persisted compliance reports (SQLite, zlib-compressed JSON per clause result)
+REPORT_DB_PATH = os.getenv("REPORT_DB_PATH", str(DATA_DIR / "reports.sqlite3"))
+# How long a write waits for another worker's write lock on the shared SQLite files
+SQLITE_BUSY_TIMEOUT_S = float(os.getenv("SQLITE_BUSY_TIMEOUT_S", "30"))
+
+# Limits per ZIP uploaded to /compliance/batch (zip bombs): entries, and uncompressed bytes of the PDF/DOCX members
+BATCH_ZIP_MAX_ENTRIES = int(os.getenv("BATCH_ZIP_MAX_ENTRIES", "1000"))
+BATCH_ZIP_MAX_BYTES = int(os.getenv("BATCH_ZIP_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# Logging: records are queued and written by a background thread as JSON lines
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# fraction of DEBUG records kept (only when LOG_LEVEL=DEBUG); 1.0 keeps all
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+# records beyond this many waiting are dropped (counted in /metrics) instead of blocking requests
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Admin token for on-demand request profiling (X-Profile: 1 + X-Admin-Token);
+# profiling is disabled entirely while it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+# Retrieval cache shared by all worker processes (SQLite); the per-process LRU stays in front of it
+RULE_CACHE_SHARED = os.getenv("RULE_CACHE_SHARED", "false").lower() in ("1", "true", "yes")
+RULE_CACHE_DB_PATH = os.getenv("RULE_CACHE_DB_PATH", str(DATA_DIR / "rule_cache.sqlite3"))
+RULE_CACHE_MAX_ENTRIES = int(os.getenv("RULE_CACHE_MAX_ENTRIES", "50000"))
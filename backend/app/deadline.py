@@ -0,0 +1,67 @@
+"""
+Per-request deadlines.
+
+A Deadline is created by the API handler and passed down explicitly through
+parsing, retrieval and the LLM batches. It expires when its time runs out or
+when it is cancelled (client disconnected); stages check it between units of
+work, and the LLM gateway aborts an in-flight generation when it expires.
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from app.exceptions import DeadlineExceededError
+
+TIMEOUT = "deadline_exceeded"
+CLIENT_DISCONNECTED = "client_disconnected"
+
+DISCONNECT_POLL_S = 0.5
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+        self._reason: Optional[str] = None
+
+    def remaining(self) -> float:
+        if self._cancelled.is_set():
+            return 0.0
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why the deadline expired (None while it is still running)."""
+        if self._cancelled.is_set():
+            return self._reason
+        return TIMEOUT if self.expired else None
+
+    def check(self, stage: str):
+        """Raise DeadlineExceededError (504) if the deadline expired by the end of `stage`."""
+        if self.expired:
+            raise DeadlineExceededError(f"Request deadline expired during {stage} ({self.reason})")
+
+    def cancel(self, reason: str = CLIENT_DISCONNECTED):
+        if not self._cancelled.is_set():
+            self._reason = reason
+            self._cancelled.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, waking early on cancel. Returns True if expired."""
+        self._cancelled.wait(min(timeout, self.remaining()))
+        return self.expired
+
+
+async def cancel_on_disconnect(request, deadline: Deadline):
+    """Run alongside a request's work; cancels the deadline if the client goes away."""
+    while not deadline.expired:
+        if await request.is_disconnected():
+            deadline.cancel(CLIENT_DISCONNECTED)
+            return
+        await asyncio.sleep(DISCONNECT_POLL_S)
@@ -1,5 +1,6 @@
 class AppError(Exception):
     """Base app error"""
+    status_code = 400
 
 class FileParseError(AppError):
     """Raised when PDF/DOCX parsing fails"""
@@ -7,5 +8,40 @@ class FileParseError(AppError):
 class VectorDBError(AppError):
     """Raised when ChromaDB operations fail"""
 
+class SnapshotError(VectorDBError):
+    """Raised when a vector snapshot is missing, corrupt or incompatible"""
+
 class ComplianceError(AppError):
     """Raised when compliance check fails"""
+
+class LLMOverloadedError(AppError):
+    """Raised when the LLM wait queue is full (HTTP 429)"""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMUnavailableError(AppError):
+    """Raised when no LLM slot frees up within the queue timeout (HTTP 503)"""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class DeadlineExceededError(AppError):
+    """Raised when a request's deadline passes or its client disconnects (HTTP 504)"""
+    status_code = 504
+
+class ReportNotFoundError(AppError):
+    """Raised when a stored report id does not exist (HTTP 404)"""
+    status_code = 404
+
+class ProfileNotFoundError(AppError):
+    """Raised when a request profile id is unknown or already evicted (HTTP 404)"""
+    status_code = 404
+
+class ForbiddenError(AppError):
+    """Raised when an admin-only feature is used without a valid admin token (HTTP 403)"""
+    status_code = 403
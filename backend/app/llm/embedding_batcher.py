@@ -0,0 +1,104 @@
+"""
+Micro-batching for query embeddings.
+
+Every retrieval embeds one clause, so concurrent compliance checks each send
+their own tiny request to Ollama. BatchingEmbeddings queues embed_query()
+calls from all threads; a single worker takes the first waiting text, keeps
+collecting for up to `max_wait` seconds or `max_batch` texts, embeds them in
+one embed_documents() call and hands each caller its vector. While a batch
+is in flight new calls pile up, so batches grow with load.
+
+Histograms: embed_batch_size (texts per call) and embed_batch_wait_seconds
+(time a text waited before its batch was sent) - the throughput/latency knobs
+are EMBED_BATCH_MAX_SIZE and EMBED_BATCH_MAX_WAIT_MS.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app import metrics
+from app.config import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS, EMBED_BATCH_TIMEOUT_S
+from app.exceptions import LLMUnavailableError
+from app.logger import get_logger
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+log = get_logger(__name__)
+
+
+class BatchingEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, max_batch: int = EMBED_BATCH_MAX_SIZE,
+                 max_wait: float = EMBED_BATCH_MAX_WAIT_MS / 1000, timeout: float = EMBED_BATCH_TIMEOUT_S):
+        self.embeddings = embeddings
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # ingest already sends documents in batches
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        self._ensure_worker()
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            metrics.inc("embed_batch_timeout_total")
+            raise LLMUnavailableError(f"Query embedding did not complete within {self.timeout:.0f}s")
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        until = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = until - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._embed(batch)
+            except Exception as e:
+                # whatever failed, no caller may be left waiting and the worker keeps running
+                log.warning(f"Embedding batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _embed(self, batch: list):
+        sent = time.monotonic()
+        for _, _, queued in batch:
+            metrics.observe("embed_batch_wait_seconds", sent - queued, buckets=WAIT_BUCKETS)
+
+        # the same clause may be queued by several requests: embed it once
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        metrics.observe("embed_batch_size", len(texts), buckets=BATCH_SIZE_BUCKETS)
+
+        result = self.embeddings.embed_documents(texts)
+        if len(result) != len(texts):
+            raise ValueError(f"Embedding model returned {len(result)} vectors for {len(texts)} texts")
+
+        vectors = dict(zip(texts, result))
+        for text, future, _ in batch:
+            future.set_result(vectors[text])
@@ -0,0 +1,178 @@
+"""
+Shared gateway in front of Ollama generations.
+
+Caps concurrent generations at LLM_MAX_IN_FLIGHT so bursts don't make Ollama
+thrash model memory. Callers beyond that wait in a FIFO queue of at most
+LLM_MAX_QUEUE; when the queue is full they fail fast with LLMOverloadedError
+(429), and if no slot frees up within the queue timeout with
+LLMUnavailableError (503), both carrying a Retry-After estimate.
+
+Calls made with a request Deadline stop waiting for a slot when it expires,
+and an in-flight generation is cancelled (its HTTP request to Ollama is
+closed, which stops the generation) instead of running to completion.
+"""
+import asyncio
+import concurrent.futures
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app import metrics
+from app.config import LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_S
+from app.exceptions import LLMOverloadedError, LLMUnavailableError, DeadlineExceededError
+
+DEADLINE_POLL_S = 0.25
+
+
+class LLMGateway:
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT_S):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiters = deque()
+        self._avg_seconds = 10.0  # moving average generation time, for Retry-After
+
+    def _publish(self):
+        metrics.set_gauge("llm_in_flight", self._in_flight)
+        metrics.set_gauge("llm_queue_depth", len(self._waiters))
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead has likely drained."""
+        rounds = (len(self._waiters) + 1) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(rounds * self._avg_seconds))
+
+    def acquire(self, timeout: float = None, deadline=None):
+        timeout = self.queue_timeout if timeout is None else timeout
+        start = time.monotonic()
+
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self._publish()
+                metrics.observe("llm_queue_wait_seconds", 0.0)
+                return
+
+            if len(self._waiters) >= self.max_queue:
+                metrics.inc("llm_rejected_total")
+                raise LLMOverloadedError("LLM queue is full, retry later", retry_after=self.retry_after())
+
+            ticket = object()
+            self._waiters.append(ticket)
+            self._publish()
+            try:
+                # FIFO: only the head of the queue may take a free slot
+                while not (self._waiters[0] is ticket and self._in_flight < self.max_in_flight):
+                    if deadline is not None and deadline.expired:
+                        metrics.inc("llm_deadline_cancelled_total")
+                        raise DeadlineExceededError(f"Request deadline expired while queued ({deadline.reason})")
+                    remaining = timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        metrics.inc("llm_queue_timeout_total")
+                        raise LLMUnavailableError(
+                            f"No LLM capacity within {timeout:.0f}s, retry later",
+                            retry_after=self.retry_after()
+                        )
+                    self._cond.wait(remaining if deadline is None else min(remaining, DEADLINE_POLL_S))
+
+                self._waiters.popleft()
+                self._in_flight += 1
+                self._cond.notify_all()  # the next waiter may fit in another free slot
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    self._cond.notify_all()
+                raise
+            finally:
+                self._publish()
+
+        metrics.observe("llm_queue_wait_seconds", time.monotonic() - start)
+
+    def release(self, seconds: float = None):
+        with self._cond:
+            self._in_flight -= 1
+            if seconds is not None:
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * seconds
+            self._publish()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, timeout: float = None, deadline=None):
+        self.acquire(timeout, deadline)
+        start = time.monotonic()
+        seconds = None
+        try:
+            yield
+            seconds = time.monotonic() - start
+        finally:
+            self.release(seconds)
+            if seconds is not None:
+                metrics.observe("llm_generation_seconds", seconds)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+            }
+
+
+class GatewayLLM:
+    """
+    Wraps a shared chat model so every invoke() goes through the gateway.
+    With a deadline the call runs on the async client so it can be cancelled.
+    Everything else is delegated to the wrapped model.
+    """
+    def __init__(self, llm, gateway: LLMGateway):
+        self.llm = llm
+        self.gateway = gateway
+
+    def invoke(self, prompt, deadline=None, **kwargs):
+        with self.gateway.slot(deadline=deadline):
+            if deadline is None:
+                return self.llm.invoke(prompt, **kwargs)
+            return self._invoke_until(prompt, deadline, **kwargs)
+
+    def _invoke_until(self, prompt, deadline, **kwargs):
+        future = asyncio.run_coroutine_threadsafe(self.llm.ainvoke(prompt, **kwargs), _background_loop())
+        while True:
+            try:
+                return future.result(timeout=DEADLINE_POLL_S)
+            except concurrent.futures.TimeoutError:
+                if deadline.expired:
+                    future.cancel()
+                    metrics.inc("llm_deadline_cancelled_total")
+                    raise DeadlineExceededError(f"LLM generation cancelled ({deadline.reason})")
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+_loop = None
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop for cancellable generations (async Ollama client), one per process."""
+    global _loop
+    with _gateway_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-gateway-loop", daemon=True).start()
+        return _loop
+
+
+def get_gateway() -> LLMGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
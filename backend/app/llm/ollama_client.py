@@ -1,13 +1,134 @@
+import math
+import threading
+from functools import lru_cache
+
+import httpx
 from langchain_ollama import ChatOllama, OllamaEmbeddings
 
+from app.config import (
+    OLLAMA_LLM_MODEL, OLLAMA_EMBED_MODEL, OLLAMA_TRIAGE_MODEL, OLLAMA_MAX_CONNECTIONS, EMBED_BATCH_ENABLED,
+    OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX
+)
+from app.llm.gateway import GatewayLLM, get_gateway
+from app.llm.embedding_batcher import BatchingEmbeddings
+from app.llm.prompts import COMPLIANCE_PREFIX
+from app import metrics
+from app.logger import get_logger
+
 # ✅ Fast config
-LLM_MODEL = "llama3"
-EMBED_MODEL = "nomic-embed-text"
+LLM_MODEL = OLLAMA_LLM_MODEL
+EMBED_MODEL = OLLAMA_EMBED_MODEL
+TRIAGE_MODEL = OLLAMA_TRIAGE_MODEL
+
+log = get_logger(__name__)
+
+metrics.register_ratio("llm_prompt_cache_hit_rate", "llm_prompt_cache_hits_total", "llm_prompt_batches_total")
+
+def _client_kwargs():
+    # ✅ One keep-alive connection pool per shared model instead of one per request
+    return {"limits": httpx.Limits(max_connections=OLLAMA_MAX_CONNECTIONS,
+                                   max_keepalive_connections=OLLAMA_MAX_CONNECTIONS)}
 
+@lru_cache(maxsize=None)
 def get_llm():
     # ✅ Keep temperature low for consistent JSON
-    return ChatOllama(model=LLM_MODEL, temperature=0)
+    # ✅ Shared instance; every generation goes through the gateway's concurrency limit
+    # ✅ keep_alive + fixed num_ctx so Ollama keeps the prompt-prefix cache between batches
+    return GatewayLLM(ChatOllama(model=LLM_MODEL, temperature=0, keep_alive=OLLAMA_KEEP_ALIVE,
+                                 num_ctx=OLLAMA_NUM_CTX, client_kwargs=_client_kwargs()), get_gateway())
 
+@lru_cache(maxsize=None)
+def get_triage_llm():
+    # ✅ Small, fast model for the first cascade tier (same Ollama, same gateway)
+    return GatewayLLM(ChatOllama(model=TRIAGE_MODEL, temperature=0, keep_alive=OLLAMA_KEEP_ALIVE,
+                                 num_ctx=OLLAMA_NUM_CTX, client_kwargs=_client_kwargs()), get_gateway())
+
+@lru_cache(maxsize=None)
 def get_embeddings():
     # ✅ Must be embedding model (fast)
-    return OllamaEmbeddings(model=EMBED_MODEL)
+    # ✅ Shared instance, so query embeddings from concurrent requests are micro-batched
+    embeddings = OllamaEmbeddings(model=EMBED_MODEL, client_kwargs=_client_kwargs())
+    return BatchingEmbeddings(embeddings) if EMBED_BATCH_ENABLED else embeddings
+
+# prompt tokens of COMPLIANCE_PREFIX (chat template included), measured once by warm-up
+_prefix_tokens = None
+_prefix_measured = False
+_prefix_lock = threading.Lock()
+
+# the cache may re-evaluate a few prefix tokens, and the suffix size is an estimate
+PREFIX_HIT_TOLERANCE = 0.1
+# includes loading the model, which the measurement call also does
+PREFIX_MEASURE_TIMEOUT_S = 120
+
+def measure_prefix_tokens():
+    """
+    Evaluate COMPLIANCE_PREFIX alone, once per process (a failure is not
+    retried); this also leaves it in Ollama's prompt cache. Called from
+    warm-up, never from a request; takes a gateway slot like any generation.
+    """
+    from ollama import Client
+
+    global _prefix_tokens, _prefix_measured
+
+    with _prefix_lock:
+        if not _prefix_measured:
+            _prefix_measured = True
+            with get_gateway().slot():
+                warm = Client(timeout=PREFIX_MEASURE_TIMEOUT_S).chat(
+                    model=LLM_MODEL, messages=[{"role": "user", "content": COMPLIANCE_PREFIX}],
+                    options={"num_ctx": OLLAMA_NUM_CTX, "temperature": 0, "num_predict": 1},
+                    keep_alive=OLLAMA_KEEP_ALIVE
+                )
+            _prefix_tokens = warm.get("prompt_eval_count") or None
+            metrics.set_gauge("llm_prompt_prefix_tokens", _prefix_tokens or 0)
+        return _prefix_tokens
+
+def estimate_prompt_tokens(prompt: str, prefix_tokens: int) -> int:
+    """
+    Tokens of a full compliance prompt: the measured prefix plus the suffix
+    at the prefix's tokens-per-character rate (Ollama only reports the
+    tokens it evaluated, not the prompt's total). The suffix is indented
+    JSON, which tokenizes denser than the prefix's prose, so this
+    overestimates it: hits are biased upwards.
+    """
+    suffix_chars = max(len(prompt) - len(COMPLIANCE_PREFIX), 0)
+    return prefix_tokens + math.ceil(suffix_chars * prefix_tokens / len(COMPLIANCE_PREFIX))
+
+def record_prompt_eval(response, prompt: str):
+    """
+    Prompt-eval metrics for one compliance batch. Ollama reports only the
+    prompt tokens it actually evaluated, so the tokens served from its cache
+    are the prompt's (estimated) total minus those; a batch where they cover
+    the prefix reused it. The time saved is estimated from this batch's own
+    per-token prompt-eval rate. Hits are only counted once warm-up measured
+    the prefix; this never calls Ollama itself.
+    """
+    meta = getattr(response, "response_metadata", None) or {}
+    tokens = meta.get("prompt_eval_count")
+    seconds = (meta.get("prompt_eval_duration") or 0) / 1e9
+    if not tokens:
+        return
+
+    metrics.observe("llm_prompt_eval_tokens", tokens, buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192))
+    metrics.observe("llm_prompt_eval_seconds", seconds)
+
+    prefix_tokens = _prefix_tokens
+    if not prefix_tokens:
+        return
+
+    cached = max(estimate_prompt_tokens(prompt, prefix_tokens) - tokens, 0)
+    metrics.inc("llm_prompt_batches_total")
+    if cached >= prefix_tokens * (1 - PREFIX_HIT_TOLERANCE):
+        metrics.inc("llm_prompt_cache_hits_total")
+        metrics.observe("llm_prompt_eval_saved_seconds", cached * seconds / tokens)
+
+def preload_models():
+    """
+    Ask Ollama to load both models into memory so the first request
+    does not pay the model load time, and evaluate the compliance prompt
+    prefix once so the first batch already finds it cached.
+    """
+    from ollama import Client
+
+    measure_prefix_tokens()
+    Client().embed(model=EMBED_MODEL, input="warm-up", keep_alive=OLLAMA_KEEP_ALIVE)
@@ -22,3 +22,72 @@ Contract Clause:
 Regulations Excerpts:
 {rules}
 """
+
+
+# Byte-stable preamble of every compliance batch prompt; build_prompt() only
+# appends the batch's JSON inputs. Ollama keeps the KV cache of the last
+# prompt per loaded model, so an identical prefix is not evaluated again.
+# Don't put anything per-request (dates, names, counts) in here.
+COMPLIANCE_PREFIX = """
+You are a Senior Legal Compliance Auditor.
+
+Task:
+Evaluate each contract clause against the provided regulations excerpts.
+Your response MUST be professional, detailed, and actionable.
+
+STRICT RULES:
+- Use ONLY the provided rules for the evaluation.
+- Do NOT invent regulations or legal requirements.
+- Return ONLY valid JSON (no markdown, no extra text).
+- If a clause does not clearly violate a rule but seems incomplete or unclear, mark NEEDS_REVIEW.
+
+OUTPUT JSON SCHEMA:
+{
+  "results": [
+    {
+      "clause_number": 1,
+      "status": "COMPLIANT|NEEDS_REVIEW|NON_COMPLIANT",
+      "risk_level": "LOW|MEDIUM|HIGH",
+
+      "rule_mapping": [
+        {
+          "rule_excerpt": "exact rule text",
+          "relevance": "how the rule applies to this clause",
+          "violation": true
+        }
+      ],
+
+      "reason": "Explain WHY the clause is compliant/non-compliant in detail.",
+      "risk_impact": "Explain practical impact: data breach risk, audit failure, penalties, contract risk etc.",
+      "rectification_steps": [
+        "step-by-step technical/policy actions to fix the issue"
+      ],
+      "recommended_contract_changes": [
+        "exact contractual changes required (obligations/wording)"
+      ],
+      "rewritten_clause": "Rewrite the clause into a compliant version using strong legal language."
+    }
+  ]
+}
+
+INPUT:
+"""
+
+
+TRIAGE_PROMPT = """
+You are a Legal Compliance triage assistant.
+
+For each contract clause, decide quickly whether it complies with the provided
+regulation excerpts, and how confident you are (0.0 - 1.0).
+Only evaluate based on the provided rules. If unsure, use NEEDS_REVIEW with low confidence.
+
+Return ONLY valid JSON (no markdown, no extra text):
+{{
+  "results": [
+    {{"clause_number": 1, "status": "COMPLIANT|NEEDS_REVIEW|NON_COMPLIANT", "confidence": 0.0, "reason": "one sentence"}}
+  ]
+}}
+
+INPUT:
+{inputs}
+"""
@@ -1,32 +1,130 @@
+"""
+Application logging.
+
+Log calls only build the record and put it on a bounded queue; a single
+QueueListener thread formats and writes it (console + rotating JSON-lines
+file), so file I/O and rotation never happen on the request path. Every
+record carries the current request's correlation id (see request_id_var,
+set per request by RequestContextMiddleware). DEBUG records can be sampled
+with LOG_DEBUG_SAMPLE_RATE, and when the queue is full records are dropped
+and counted rather than blocking the caller.
+"""
+import atexit
+import contextvars
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 
-LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
+from app.config import LOG_LEVEL, LOG_DEBUG_SAMPLE_RATE, LOG_QUEUE_SIZE
 
+LOG_DIR = Path("logs")
 LOG_FILE = LOG_DIR / "app.log"
 
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# attributes every LogRecord has; anything else was passed via `extra=` and is logged as a field
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that creates its directory on first write
+    instead of at import time (use with delay=True).
+    """
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread": record.threadName,
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Runs in the caller's thread: stamps the correlation id and samples DEBUG records."""
+    def __init__(self, debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # only resolve the message (and a traceback) here; JSON formatting is the listener's job
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _queue_handler() -> QueueHandler:
+    global _handler, _listener
+    with _setup_lock:
+        if _handler is None:
+            ch = logging.StreamHandler()
+            ch.setFormatter(logging.Formatter(
+                fmt="%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s"
+            ))
+            fh = LazyRotatingFileHandler(LOG_FILE, maxBytes=2_000_000, backupCount=3, delay=True)
+            fh.setFormatter(JsonFormatter())
+
+            _handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+            _handler.addFilter(ContextFilter())
+            _listener = QueueListener(_handler.queue, ch, fh, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)  # flush what is still queued
+        return _handler
+
+
+def logging_stats() -> dict:
+    handler = _queue_handler()
+    return {"queue_depth": handler.queue.qsize(), "dropped_records": NonBlockingQueueHandler.dropped}
+
+
 def get_logger(name: str = "compliance-checker") -> logging.Logger:
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
 
     if logger.handlers:
         return logger
 
-    formatter = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
-
-    # Console handler
-    ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
-
-    # File handler (rotating)
-    fh = RotatingFileHandler(LOG_FILE, maxBytes=2_000_000, backupCount=3)
-    fh.setFormatter(formatter)
-
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    # one shared queue handler (and one file writer) for every app logger
+    logger.addHandler(_queue_handler())
 
     return logger
@@ -1,37 +1,86 @@
-from fastapi import FastAPI, UploadFile, File, Query
-from pathlib import Path
+import asyncio
+from fastapi import FastAPI, UploadFile, File, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List
 
-from app.services.file_parser import parse_uploaded_file
-from app.services.compliance_service import check_compliance
-from app.vectordb.ingest_regulations_pdf import ingest_regulations_pdf
-from app.vectordb.chroma_client import get_chroma
+from app.config import STARTUP_WARMUP, REQUEST_DEADLINE_S, ADMIN_TOKEN
+from app.startup import start_warm_up, readiness, DATA_DIR
+from app.deadline import Deadline, cancel_on_disconnect
+from app.schemas import ComplianceResponse, ReportList, ReportPage
+from app.responses import FastJSONResponse
+from app.exceptions import ForbiddenError, ProfileNotFoundError
+from app import profiling
 
-from app.middlewares import ExceptionMiddleware
-from app.logger import get_logger
+from app.middlewares import (
+    ExceptionMiddleware, RequestContextMiddleware, CompressionMiddleware, ProfilingMiddleware, ADMIN_TOKEN_HEADER
+)
+from app.logger import get_logger, logging_stats
+
+# NOTE: services/vectordb modules (langchain, chromadb, pypdf, python-docx)
+# are imported inside the handlers so `import app.main` stays fast.
 
 
 app = FastAPI(title="Compliance Checker")
+app.add_middleware(ExceptionMiddleware)
+app.add_middleware(CompressionMiddleware)     # gzip / br for bodies >= 1 KB
+if ADMIN_TOKEN:
+    app.add_middleware(ProfilingMiddleware)   # X-Profile: 1 + X-Admin-Token
+app.add_middleware(RequestContextMiddleware)  # outermost: error logs carry the request id too
 
-DATA_DIR = Path(__file__).resolve().parent / "data"
 UPLOAD_DIR = DATA_DIR / "uploads"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+async def run_until_deadline(request: Request, deadline: Deadline, func, /, *args, **kwargs):
+    """
+    Run blocking work (parsing, retrieval, waiting for an LLM slot) in the
+    threadpool, off the event loop; if the client disconnects meanwhile the
+    deadline is cancelled so outstanding generations stop.
+    """
+    watcher = asyncio.create_task(cancel_on_disconnect(request, deadline))
+    try:
+        return await run_in_threadpool(profiling.bind(func), *args, **kwargs)
+    finally:
+        watcher.cancel()
+
+async def save_report(report: dict, document: str, kind: str, vendor: str = None) -> dict:
+    """
+    Persist a finished report so it can be re-opened via /reports/{report_id};
+    this also adds it to the /analytics rollups.
+    """
+    from app.services.report_store import get_report_store
+
+    report["report_id"] = await run_in_threadpool(profiling.bind(get_report_store().save), report, document, kind, vendor)
+    return report
+
 @app.on_event("startup")
-def auto_ingest():
-    db = get_chroma()
-    count = db._collection.count()
-    pdf = DATA_DIR / "regulations_master.pdf"
+def warm_up_on_startup():
+    start_warm_up(STARTUP_WARMUP)
 
-    if count == 0 and pdf.exists():
-        print("[Startup] Auto ingest regulations_master.pdf")
-        ingest_regulations_pdf(str(pdf), reset=False, max_chunks=300)
-    else:
-        print(f"[Startup] DB count: {count}. Skipping auto ingest.")
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: collection open, ingest finished, models preloaded."""
+    state = readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@app.get("/metrics")
+def get_metrics():
+    from app import metrics
+    from app.llm.gateway import get_gateway
+
+    return {**metrics.snapshot(), "llm_gateway": get_gateway().stats(), "logging": logging_stats()}
 
 @app.get("/db/count")
 def db_count():
+    from app.vectordb.chroma_client import get_chroma
+
     db = get_chroma()
     return {"count": db._collection.count()}
 
@@ -39,19 +88,181 @@ def db_count():
 async def regulations_ingest(
     file: UploadFile = File(...),
     reset: bool = Query(False),
-    max_chunks: int = Query(300)
+    max_chunks: int = Query(300),
+    framework: str = Query("default")
 ):
+    from app.vectordb.ingest_regulations_pdf import ingest_regulations_pdf
+
     save_path = DATA_DIR / file.filename
     save_path.write_bytes(await file.read())
-    return ingest_regulations_pdf(str(save_path), reset=reset, max_chunks=max_chunks)
+    # may wait for another worker's ingest (writer lock): keep it off the event loop
+    return await run_in_threadpool(
+        ingest_regulations_pdf, str(save_path), reset=reset, max_chunks=max_chunks, framework=framework
+    )
 
-@app.post("/compliance/upload")
+@app.get("/regulations/frameworks")
+def regulations_frameworks():
+    from app.vectordb.chroma_client import list_frameworks
+
+    return {"frameworks": list_frameworks()}
+
+@app.post("/regulations/rollback")
+def regulations_rollback(framework: str = Query("default")):
+    """Switch back to the collection that was live before the last ingest."""
+    from app.vectordb.chroma_client import rollback_collection, framework_alias
+
+    return rollback_collection(framework_alias(framework))
+
+@app.post("/compliance/upload", response_model=ComplianceResponse, response_model_exclude_none=True,
+          response_class=FastJSONResponse)
 async def compliance_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    top_k: int = Query(2),
+    frameworks: List[str] = Query(None),
+    deadline_s: float = Query(None, gt=0),
+    vendor: str = Query(None)
+):
+    from app.services.file_parser import parse_uploaded_file
+    from app.services.compliance_service import check_compliance
+
+    deadline = Deadline(deadline_s or REQUEST_DEADLINE_S)
+
+    save_path = UPLOAD_DIR / file.filename
+    save_path.write_bytes(await file.read())
+
+    text = await run_until_deadline(request, deadline, parse_uploaded_file, save_path)
+    deadline.check("parsing")
+    report = await run_until_deadline(
+        request, deadline, check_compliance, text, top_k=top_k, frameworks=frameworks, deadline=deadline
+    )
+    # validated and dumped by pydantic against ComplianceResponse, rendered with orjson
+    return await save_report(report, file.filename, "compliance", vendor)
+
+@app.post("/compliance/revision")
+async def compliance_revision(
+    request: Request,
     file: UploadFile = File(...),
-    top_k: int = Query(2)
+    prior_report: UploadFile = File(...),
+    top_k: int = Query(2),
+    frameworks: List[str] = Query(None),
+    deadline_s: float = Query(None, gt=0),
+    vendor: str = Query(None)
 ):
+    """
+    Re-check a new contract version against the JSON report of a prior one;
+    only added/modified clauses are evaluated.
+    """
+    import json
+    from app.services.file_parser import parse_uploaded_file
+    from app.services.revision_service import check_revision, prior_results
+    from app.exceptions import ComplianceError
+
+    try:
+        prior = json.loads(await prior_report.read())
+    except ValueError as e:
+        raise ComplianceError(f"prior_report is not valid JSON. Reason: {e}")
+    prior_results(prior)  # reject a malformed prior report before parsing the new version
+
+    deadline = Deadline(deadline_s or REQUEST_DEADLINE_S)
+
     save_path = UPLOAD_DIR / file.filename
     save_path.write_bytes(await file.read())
 
-    text = parse_uploaded_file(save_path)
-    return check_compliance(text, top_k=top_k)
+    text = await run_until_deadline(request, deadline, parse_uploaded_file, save_path)
+    deadline.check("parsing")
+    report = await run_until_deadline(
+        request, deadline, check_revision, text, prior, top_k=top_k, frameworks=frameworks, deadline=deadline
+    )
+    return FastJSONResponse(await save_report(report, file.filename, "revision", vendor))
+
+@app.post("/compliance/batch")
+async def compliance_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    top_k: int = Query(2),
+    frameworks: List[str] = Query(None),
+    deadline_s: float = Query(None, gt=0),
+    vendor: str = Query(None)
+):
+    """
+    Check many contracts (PDF/DOCX files and/or ZIPs of them) in one call.
+    Identical clauses across the batch are evaluated once.
+    """
+    import uuid
+    from app.services.batch_service import expand_upload, parse_documents, check_compliance_batch
+
+    deadline = Deadline(deadline_s or REQUEST_DEADLINE_S)
+
+    batch_dir = UPLOAD_DIR / f"batch_{uuid.uuid4().hex}"
+    paths = []
+    for f in files:
+        paths.extend(expand_upload(f.filename, await f.read(), batch_dir))
+
+    parsed = await run_until_deadline(request, deadline, parse_documents, paths, deadline=deadline, root=batch_dir)
+    report = await run_until_deadline(
+        request, deadline, check_compliance_batch,
+        [(name, text) for name, text, error in parsed if not error],
+        top_k=top_k, frameworks=frameworks, deadline=deadline
+    )
+    for doc in report["documents"]:
+        await save_report(doc, doc["document"], "batch", vendor)
+    report["failed_documents"] = [
+        {"document": name, "error": error} for name, _, error in parsed if error
+    ]
+    return FastJSONResponse(report)
+
+@app.get("/reports", response_model=ReportList, response_model_exclude_none=True)
+def reports_list(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    overall_risk: str = Query(None)
+):
+    """Stored reports, newest first (summaries only)."""
+    from app.services.report_store import get_report_store
+
+    return get_report_store().list_reports(offset=offset, limit=limit, overall_risk=overall_risk)
+
+@app.get("/reports/{report_id}", response_model=ReportPage, response_model_exclude_none=True,
+         response_class=FastJSONResponse)
+def reports_get(
+    report_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    status: str = Query(None),
+    risk_level: str = Query(None)
+):
+    """One stored report with a page of its clause results, filtered by status / risk level."""
+    from app.services.report_store import get_report_store
+
+    return get_report_store().get_report(report_id, offset=offset, limit=limit, status=status, risk_level=risk_level)
+
+@app.get("/analytics")
+def analytics(days: int = Query(30, ge=1, le=3650), top_rules: int = Query(10, ge=1, le=100)):
+    """
+    Portfolio view across stored reports: non-compliance by vendor, most
+    violated rules and the daily risk trend, read from pre-aggregated rollups.
+    """
+    from app.services.report_store import get_report_store
+
+    return get_report_store().analytics(days=days, top_rules=top_rules)
+
+@app.get("/admin/profiles/{profile_id}")
+def admin_profile(profile_id: str, request: Request, format: str = Query("summary", pattern="^(summary|collapsed)$")):
+    """
+    A request profile captured with X-Profile: 1. `summary` breaks the time
+    down by area and function; `collapsed` downloads stacks for flamegraph.pl
+    or speedscope.
+    """
+    if not profiling.is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        raise ForbiddenError("Admin token required")
+    session = profiling.get_profile(profile_id)
+    if session is None:
+        raise ProfileNotFoundError(f"Profile not found: {profile_id}")
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            session.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed.txt"'}
+        )
+    return session.summary()
@@ -0,0 +1,95 @@
+"""
+In-process metrics: counters, gauges and bucketed histograms, served as JSON
+by GET /metrics.
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_histograms: Dict[str, Dict] = {}
+_ratios: Dict[str, tuple] = {}
+
+
+def inc(name: str, value: float = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS):
+    """
+    Record one observation. `buckets` are upper bounds; the last bucket
+    counts everything above the largest bound.
+    """
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = {
+                "buckets": list(buckets), "counts": [0] * (len(buckets) + 1),
+                "count": 0, "sum": 0.0, "min": value, "max": value,
+            }
+        h["counts"][bisect_left(h["buckets"], value)] += 1
+        h["count"] += 1
+        h["sum"] += value
+        h["min"] = min(h["min"], value)
+        h["max"] = max(h["max"], value)
+
+
+def register_ratio(name: str, numerator: str, denominator: str):
+    """Report counters[numerator] / counters[denominator] as `name` in snapshot()."""
+    with _lock:
+        _ratios[name] = (numerator, denominator)
+
+
+def counter(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def _ratio(numerator: str, denominator: str):
+    d = _counters.get(denominator, 0)
+    return round(_counters.get(numerator, 0) / d, 4) if d else None
+
+
+def ratio(numerator: str, denominator: str):
+    with _lock:
+        return _ratio(numerator, denominator)
+
+
+def snapshot() -> Dict:
+    with _lock:
+        histograms = {}
+        for name, h in _histograms.items():
+            histograms[name] = {
+                "count": h["count"],
+                "sum": round(h["sum"], 6),
+                "mean": round(h["sum"] / h["count"], 6) if h["count"] else None,
+                "min": h["min"],
+                "max": h["max"],
+                "buckets": {
+                    **{f"le_{b}": c for b, c in zip(h["buckets"], h["counts"])},
+                    "inf": h["counts"][-1],
+                },
+            }
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "ratios": {name: _ratio(n, d) for name, (n, d) in _ratios.items()},
+            "histograms": histograms,
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
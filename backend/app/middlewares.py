@@ -1,26 +1,253 @@
-from fastapi import Request
+"""
+Pure ASGI middlewares (no BaseHTTPMiddleware: no extra task per request and
+streaming responses pass through untouched).
+"""
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
 
-from app.logger import get_logger
+from app import metrics, profiling
+from app.logger import get_logger, request_id_var
 from app.exceptions import AppError
 
+try:
+    import brotli
+except ImportError:  # optional: without it responses are gzip-compressed only
+    brotli = None
+
+REQUEST_ID_HEADER = "X-Request-ID"
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+COMPRESS_MIN_SIZE = 1024
+# compression runs on the event loop: levels picked for speed (see benchmarks/bench_report_payload.py),
+# a 500-clause report (~1.2 MB) shrinks ~4.5x in ~20 ms
+GZIP_LEVEL = 4
+BROTLI_QUALITY = 4
+
 log = get_logger(__name__)
 
-class ExceptionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+
+class RequestContextMiddleware:
+    """
+    Correlation id for every log record of a request: taken from the
+    caller's X-Request-ID header (or generated) and echoed in the response.
+    Also times the request (http_request_seconds, Server-Timing header).
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        start = time.perf_counter()
+
+        async def send_with_context(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                headers["Server-Timing"] = f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_context)
+        finally:
+            metrics.observe("http_request_seconds", time.perf_counter() - start)
+            request_id_var.reset(token)
+
+
+class ExceptionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = False
+
+        async def send_tracking(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
-        except AppError as e:
+            await self.app(scope, receive, send_tracking)
+        except Exception as e:
+            if started:  # too late to replace the response
+                raise
+            await self._error_response(e)(scope, receive, send)
+
+    @staticmethod
+    def _error_response(e: Exception) -> JSONResponse:
+        if isinstance(e, AppError):
             log.warning(f"Handled AppError: {e}", exc_info=True)
+            retry_after = getattr(e, "retry_after", None)
             return JSONResponse(
-                status_code=400,
-                content={"error": str(e), "type": e.__class__.__name__}
+                status_code=e.status_code,
+                content={"error": str(e), "type": e.__class__.__name__},
+                headers={"Retry-After": str(retry_after)} if retry_after else None
             )
-        except Exception as e:
-            log.error(f"Unhandled exception: {e}", exc_info=True)
-            return JSONResponse(
-                status_code=500,
-                content={"error": "Internal Server Error", "type": "UnhandledException"}
+
+        log.error(f"Unhandled exception: {e}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Internal Server Error", "type": "UnhandledException"}
+        )
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `minimum_size` bytes: brotli when the
+    client accepts it and the brotli package is installed, gzip otherwise.
+    """
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and brotli is not None and accepts_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), "br"
+        ):
+            return await BrotliResponder(self.app, self.minimum_size)(scope, receive, send)
+        await self.gzip(scope, receive, send)
+
+
+def accepts_encoding(header: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header lists `coding` (or *) with a non-zero q-value."""
+    accepted = {}
+    for token in header.split(","):
+        name, _, params = token.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+
+class BrotliResponder:
+    """
+    Buffers the first body chunk to decide: small bodies and responses that are
+    already encoded go out unchanged, anything else is brotli-compressed
+    (streamed chunk by chunk for multi-part bodies).
+    """
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            headers = MutableHeaders(scope=self.start_message)
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                body = self.compressor.process(body) + self.compressor.flush()
+            else:
+                body = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+            await self.send(self.start_message)
+            self.start_message = None
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if more_body:
+            body = self.compressor.process(body) + self.compressor.flush()
+        else:
+            body = self.compressor.process(body) + self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+class ProfilingMiddleware:
+    """
+    Samples a request flagged with X-Profile: 1 (or ?profile=1) that carries a
+    valid X-Admin-Token (see app/profiling.py). The response gets an
+    X-Profile-Id header; the profile is read from GET /admin/profiles/{id}.
+    Only installed when ADMIN_TOKEN is set, so unprofiled deployments pay nothing.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            return await self.app(scope, receive, send)
+
+        if not profiling.is_admin(Headers(scope=scope).get(ADMIN_TOKEN_HEADER)):
+            response = JSONResponse(
+                status_code=403,
+                content={"error": "Profiling requires a valid admin token", "type": "ForbiddenError"}
             )
+            return await response(scope, receive, send)
+
+        session = profiling.ProfileSession(label=f"{scope['method']} {scope['path']}")
+        # async parts (upload I/O, response rendering, compression) run here; note the
+        # loop thread may also be serving other requests while this one is sampled
+        session.add_thread(threading.get_ident(), "event-loop")
+        token = profiling.current_session.set(session)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = session.id
+            await send(message)
+
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiling.current_session.reset(token)
+            session.stop()
+            profiling.save_profile(session)
+            log.info(f"Profiled {session.label}: {session.samples} samples, id={session.id}")
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        if Headers(scope=scope).get(PROFILE_HEADER) == "1":
+            return True
+        query = scope.get("query_string", b"")
+        return b"profile" in query and parse_qs(query.decode("latin-1")).get("profile") == ["1"]
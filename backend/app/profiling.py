@@ -0,0 +1,177 @@
+"""
+On-demand sampling profiler for single requests.
+
+An admin sends X-Profile: 1 (or ?profile=1) with X-Admin-Token. While that
+request runs, a sampler thread reads the stacks of the threads doing its
+work (sys._current_frames) every PROFILE_SAMPLE_INTERVAL_MS. Worker threads
+join the session through bind(): run_until_deadline and the batch parser
+wrap their work with it. The result is kept in memory and can be fetched
+as a summary (time by area: PDF/DOCX parsing, clause splitting, Chroma,
+Ollama, ...; top functions) or as collapsed stacks for flamegraph.pl /
+speedscope.
+
+When no session is active bind() returns the function unchanged, and the
+middleware is only installed when ADMIN_TOKEN is set.
+"""
+import contextvars
+import functools
+import hmac
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+from app.config import ADMIN_TOKEN, PROFILE_SAMPLE_INTERVAL_MS
+
+KEEP_PROFILES = 20
+TOP_FUNCTIONS = 25
+MAX_DEPTH = 128
+
+# first match from the leaf up decides where a sample's time went
+AREAS = (
+    ("pdf_parsing", ("pypdf",)),
+    ("docx_parsing", ("docx",)),
+    ("clause_splitting", ("app/utils.py",)),
+    # waiting for a micro-batched query embedding (before chroma: it is called from there)
+    ("embedding", ("app/llm/embedding_batcher.py",)),
+    ("chroma", ("chromadb", "langchain_chroma")),
+    # generations run on the gateway's loop thread; the request thread waits in gateway.py
+    ("ollama", ("app/llm/gateway.py", "ollama", "httpx", "httpcore", "langchain_ollama")),
+    ("near_dup_index", ("app/services/clause_index.py",)),
+    ("report_store", ("app/services/report_store.py", "app/services/analytics.py")),
+)
+
+current_session = contextvars.ContextVar("profile_session", default=None)
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """Constant-time check of an X-Admin-Token value; always False while ADMIN_TOKEN is unset."""
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+class ProfileSession:
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL_MS / 1000, label: str = ""):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.started = self.finished = None
+
+    def add_thread(self, ident: int, name: str):
+        with self._lock:
+            self._threads[ident] = name
+
+    def remove_thread(self, ident: int):
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.finished = time.perf_counter()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+            for ident, name in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[(name,) + _stack(frame)] += 1
+                    self.samples += 1
+
+    # ---------------- output ----------------
+    def collapsed(self) -> str:
+        """One line per unique stack: `thread;outer;...;leaf count` (flamegraph.pl / speedscope)."""
+        return "\n".join(f"{';'.join(stack)} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def summary(self) -> Dict:
+        areas: Counter = Counter()
+        self_time: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, n in self.stacks.items():
+            frames = stack[1:]
+            areas[_area(frames)] += n
+            if frames:
+                self_time[frames[-1]] += n
+            for f in set(frames):
+                inclusive[f] += n
+
+        total = sum(self.stacks.values()) or 1
+        pct = lambda n: round(100 * n / total, 1)  # noqa: E731
+        return {
+            "profile_id": self.id,
+            "label": self.label,
+            "duration_seconds": round((self.finished or time.perf_counter()) - self.started, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "areas_percent": {a: pct(n) for a, n in areas.most_common()},
+            "top_self": [{"function": f, "percent": pct(n)} for f, n in self_time.most_common(TOP_FUNCTIONS)],
+            "top_inclusive": [{"function": f, "percent": pct(n)} for f, n in inclusive.most_common(TOP_FUNCTIONS)],
+        }
+
+
+def _stack(frame) -> tuple:
+    out = []
+    while frame is not None and len(out) < MAX_DEPTH:
+        code = frame.f_code
+        out.append(f"{code.co_name} ({code.co_filename.replace(chr(92), '/')}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return tuple(reversed(out))
+
+
+def _area(frames: tuple) -> str:
+    for f in reversed(frames):
+        for area, needles in AREAS:
+            if any(n in f for n in needles):
+                return area
+    return "app_other"
+
+
+def bind(fn):
+    """
+    Make `fn` count towards the active profile session (if any) in whatever
+    thread it runs. Call in the request's context, before handing fn to a pool.
+    """
+    session = current_session.get()
+    if session is None:
+        return fn
+
+    @functools.wraps(fn)
+    def profiled(*args, **kwargs):
+        thread = threading.current_thread()
+        session.add_thread(thread.ident, thread.name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.remove_thread(thread.ident)
+    return profiled
+
+
+# ---------------- finished profiles ----------------
+_profiles: "OrderedDict[str, ProfileSession]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def save_profile(session: ProfileSession):
+    with _profiles_lock:
+        _profiles[session.id] = session
+        while len(_profiles) > KEEP_PROFILES:
+            _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[ProfileSession]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
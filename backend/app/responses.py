@@ -0,0 +1,24 @@
+"""
+JSON response rendered with orjson (falls back to the stdlib encoder if
+orjson isn't installed).
+
+Endpoints with a response_model use it as `response_class`: pydantic
+validates and dumps the content against the schema, orjson renders it.
+Endpoints without a schema (revision, batch) return it directly, which skips
+FastAPI's jsonable_encoder pass, the dominant serialization cost for full
+reports (see benchmarks/bench_report_payload.py); only do that for content
+that is already plain JSON types (dict/list/str/int/float/bool/None).
+"""
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
@@ -1,18 +1,60 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
 
 class ComplianceRequest(BaseModel):
     doc_name: str
     document_text: str
     top_k: int = 4
 
+class ReportSummary(BaseModel):
+    total_clauses: int
+    compliant: int
+    needs_review: int
+    non_compliant: int
+    compliance_score: int
+    overall_risk: str
+    partial: bool = False
+    partial_reason: Optional[str] = None
+    unevaluated_clauses: Optional[int] = None
+
 class ClauseResult(BaseModel):
+    # verdict metadata (verdict_source, change, raw_model_output, ...) passes through
+    model_config = ConfigDict(extra="allow")
+
     clause: str
-    matched_rules: List[str]
+    matched_rules: List[str] = []
     status: str
-    explanation: str
-    suggested_fix: str
+    risk_level: str
+    rule_mapping: List[dict] = []
+    reason: str = ""
+    risk_impact: str = ""
+    rectification_steps: List[str] = []
+    recommended_contract_changes: List[str] = []
+    rewritten_clause: str = ""
 
 class ComplianceResponse(BaseModel):
-    doc_name: str
+    report_id: Optional[str] = None
+    summary: ReportSummary
+    results: List[ClauseResult]
+
+class ReportInfo(BaseModel):
+    report_id: str
+    document: str
+    kind: str
+    vendor: Optional[str] = None
+    created_at: float
+    summary: ReportSummary
+
+class ReportList(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    reports: List[ReportInfo]
+
+class ReportPage(ReportInfo):
+    changes: Optional[dict] = None  # revision reports
+    # paging over the (filtered) clause results
+    total_results: int
+    offset: int
+    limit: int
     results: List[ClauseResult]
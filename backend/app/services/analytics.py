@@ -0,0 +1,166 @@
+"""
+Portfolio analytics over stored reports.
+
+Rollup tables live in the report store's SQLite file and are updated in the
+same transaction that saves a report, by adding that report's counts
+(INSERT ... ON CONFLICT DO UPDATE). Analytics queries read only the rollups,
+so they don't get slower as the number of stored reports grows.
+"""
+import hashlib
+import sqlite3
+import time
+from typing import Dict, List
+
+UNKNOWN_VENDOR = "unknown"
+RULE_KEY_CHARS = 300
+CARRIED_FORWARD = "unchanged"  # revision_service.UNCHANGED: result copied from the prior report
+
+ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rollup_vendor (
+        vendor TEXT PRIMARY KEY,
+        reports INTEGER NOT NULL DEFAULT 0,
+        clauses INTEGER NOT NULL DEFAULT 0,
+        compliant INTEGER NOT NULL DEFAULT 0,
+        needs_review INTEGER NOT NULL DEFAULT 0,
+        non_compliant INTEGER NOT NULL DEFAULT 0,
+        high_risk_reports INTEGER NOT NULL DEFAULT 0,
+        last_report_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS rollup_rule (
+        rule_hash TEXT PRIMARY KEY,
+        rule TEXT NOT NULL,
+        violations INTEGER NOT NULL DEFAULT 0,
+        last_seen REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_rollup_rule_violations ON rollup_rule(violations DESC);
+    CREATE TABLE IF NOT EXISTS rollup_day (
+        day TEXT PRIMARY KEY,
+        reports INTEGER NOT NULL DEFAULT 0,
+        clauses INTEGER NOT NULL DEFAULT 0,
+        non_compliant INTEGER NOT NULL DEFAULT 0,
+        high INTEGER NOT NULL DEFAULT 0,
+        medium INTEGER NOT NULL DEFAULT 0,
+        low INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+
+def violated_rules(result: Dict) -> List[str]:
+    """
+    Rule excerpts a clause result violates: the model's rule_mapping entries
+    flagged as violations, else the retrieved rules of a NON_COMPLIANT clause.
+    """
+    rules = [
+        m.get("rule_excerpt", "") for m in result.get("rule_mapping", [])
+        if isinstance(m, dict) and m.get("violation") is True and m.get("rule_excerpt")
+    ]
+    if not rules and result.get("status") == "NON_COMPLIANT":
+        rules = list(result.get("matched_rules", []))
+    return list(dict.fromkeys(r.strip()[:RULE_KEY_CHARS] for r in rules if r.strip()))
+
+
+def update_rollups(conn: sqlite3.Connection, report: Dict, vendor: str, created_at: float):
+    """
+    Add one report to the rollups; call inside the report's insert transaction.
+    Clause and rule counts of a revision report cover only its added/modified
+    clauses: carried-forward results were counted with the prior report.
+    """
+    results = [r for r in report.get("results", []) if r.get("clause") and r.get("change") != CARRIED_FORWARD]
+    overall_risk = report.get("summary", {}).get("overall_risk")
+    counts = {
+        s: sum(1 for r in results if r.get("status") == s)
+        for s in ("COMPLIANT", "NEEDS_REVIEW", "NON_COMPLIANT")
+    }
+
+    conn.execute(
+        """
+        INSERT INTO rollup_vendor (vendor, reports, clauses, compliant, needs_review, non_compliant,
+                                   high_risk_reports, last_report_at)
+        VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(vendor) DO UPDATE SET
+            reports = reports + 1,
+            clauses = clauses + excluded.clauses,
+            compliant = compliant + excluded.compliant,
+            needs_review = needs_review + excluded.needs_review,
+            non_compliant = non_compliant + excluded.non_compliant,
+            high_risk_reports = high_risk_reports + excluded.high_risk_reports,
+            last_report_at = MAX(last_report_at, excluded.last_report_at)
+        """,
+        (vendor or UNKNOWN_VENDOR, len(results), counts["COMPLIANT"], counts["NEEDS_REVIEW"],
+         counts["NON_COMPLIANT"], int(overall_risk == "HIGH"), created_at),
+    )
+
+    conn.execute(
+        """
+        INSERT INTO rollup_day (day, reports, clauses, non_compliant, high, medium, low)
+        VALUES (?, 1, ?, ?, ?, ?, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            reports = reports + 1,
+            clauses = clauses + excluded.clauses,
+            non_compliant = non_compliant + excluded.non_compliant,
+            high = high + excluded.high,
+            medium = medium + excluded.medium,
+            low = low + excluded.low
+        """,
+        (time.strftime("%Y-%m-%d", time.gmtime(created_at)), len(results), counts["NON_COMPLIANT"],
+         int(overall_risk == "HIGH"), int(overall_risk == "MEDIUM"), int(overall_risk == "LOW")),
+    )
+
+    violations: Dict[str, int] = {}
+    for r in results:
+        for rule in violated_rules(r):
+            violations[rule] = violations.get(rule, 0) + 1
+    conn.executemany(
+        """
+        INSERT INTO rollup_rule (rule_hash, rule, violations, last_seen) VALUES (?, ?, ?, ?)
+        ON CONFLICT(rule_hash) DO UPDATE SET
+            violations = violations + excluded.violations,
+            last_seen = excluded.last_seen
+        """,
+        [
+            (hashlib.sha256(rule.encode("utf-8")).hexdigest(), rule, n, created_at)
+            for rule, n in violations.items()
+        ],
+    )
+
+
+def _rate(part: int, whole: int):
+    return round(part / whole, 4) if whole else None
+
+
+def query_analytics(conn: sqlite3.Connection, days: int = 30, top_rules: int = 10) -> Dict:
+    vendors = conn.execute(
+        "SELECT vendor, reports, clauses, compliant, needs_review, non_compliant, high_risk_reports, "
+        "last_report_at FROM rollup_vendor ORDER BY non_compliant DESC, vendor"
+    ).fetchall()
+    rules = conn.execute(
+        "SELECT rule, violations, last_seen FROM rollup_rule ORDER BY violations DESC LIMIT ?", (top_rules,)
+    ).fetchall()
+    since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - days * 86400))
+    trend = conn.execute(
+        "SELECT day, reports, clauses, non_compliant, high, medium, low FROM rollup_day "
+        "WHERE day >= ? ORDER BY day", (since,)
+    ).fetchall()
+
+    return {
+        "vendors": [
+            {
+                "vendor": v, "reports": reports, "clauses": clauses,
+                "compliant": compliant, "needs_review": needs_review, "non_compliant": non_compliant,
+                "non_compliance_rate": _rate(non_compliant, clauses),
+                "high_risk_reports": high, "last_report_at": last,
+            }
+            for v, reports, clauses, compliant, needs_review, non_compliant, high, last in vendors
+        ],
+        "top_violated_rules": [
+            {"rule": rule, "violations": n, "last_seen": last} for rule, n, last in rules
+        ],
+        "risk_trend": [
+            {
+                "day": day, "reports": reports, "clauses": clauses,
+                "non_compliance_rate": _rate(non_compliant, clauses),
+                "overall_risk": {"HIGH": high, "MEDIUM": medium, "LOW": low},
+            }
+            for day, reports, clauses, non_compliant, high, medium, low in trend
+        ],
+    }
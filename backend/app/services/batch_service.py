@@ -0,0 +1,187 @@
+import io
+import uuid
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import BATCH_ZIP_MAX_ENTRIES, BATCH_ZIP_MAX_BYTES
+from app.utils import split_into_clauses, clause_key
+from app.services.file_parser import parse_in_pool, parse_text, SUPPORTED_EXTENSIONS
+from app.services.compliance_service import (
+    MAX_CLAUSES, retrieve_rules, evaluate_all, make_result, fallback_result
+)
+from app.services.report_builder import build_summary
+from app.vectordb.chroma_client import resolve_collections
+from app.llm.ollama_client import get_llm
+from app.exceptions import FileParseError
+from app.logger import get_logger
+
+PARSE_WORKERS = 4
+
+log = get_logger(__name__)
+
+
+# ---------------- Upload handling ----------------
+def _member_path(filename: str) -> Optional[PurePosixPath]:
+    """Relative path of a ZIP member without '..', '.' or root parts (no zip-slip); None if nothing is left."""
+    parts = [p for p in PurePosixPath(filename.replace("\\", "/")).parts if p not in ("/", ".", "..")]
+    return PurePosixPath(*parts) if parts else None
+
+
+def _save(dest_dir: Path, relative: PurePosixPath, data: bytes) -> Path:
+    """Write `data` under dest_dir; a name already taken gets a random prefix instead of being overwritten."""
+    path = dest_dir.joinpath(*relative.parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path = path.with_name(f"{uuid.uuid4().hex[:8]}_{path.name}")
+    path.write_bytes(data)
+    return path
+
+
+def expand_upload(filename: str, data: bytes, dest_dir: Path, max_entries: int = BATCH_ZIP_MAX_ENTRIES,
+                  max_bytes: int = BATCH_ZIP_MAX_BYTES) -> List[Path]:
+    """
+    Save one uploaded file; a .zip is expanded into its PDF/DOCX members.
+    Members keep their relative path under dest_dir (stripped of '..', so no
+    zip-slip), which parse_documents uses as the document name. A zip with
+    more than `max_entries` entries, or whose members decompress to more than
+    `max_bytes`, is rejected; sizes are checked while reading, since the
+    declared ones can't be trusted.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    name = Path(filename or "").name
+    if not name:
+        raise FileParseError("Uploaded file has no name")
+
+    if Path(name).suffix.lower() != ".zip":
+        return [_save(dest_dir, PurePosixPath(name), data)]
+
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise FileParseError(f"Failed to read ZIP: {name}. Reason: {e}")
+
+    paths = []
+    remaining = max_bytes
+    with archive:
+        entries = archive.infolist()
+        if len(entries) > max_entries:
+            raise FileParseError(f"ZIP has too many entries: {name} ({len(entries)} > {max_entries})")
+
+        for info in entries:
+            member = _member_path(info.filename)
+            if info.is_dir() or member is None or member.suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            if info.file_size > remaining:
+                raise FileParseError(f"ZIP expands to more than {max_bytes} bytes: {name}")
+            with archive.open(info) as f:
+                content = f.read(remaining + 1)
+            if len(content) > remaining:
+                raise FileParseError(f"ZIP expands to more than {max_bytes} bytes: {name}")
+            remaining -= len(content)
+            paths.append(_save(dest_dir, member, content))
+    return paths
+
+
+def parse_documents(paths: Sequence[Path], max_workers: int = PARSE_WORKERS,
+                    deadline=None, root: Path = None) -> List[Tuple[str, str, str]]:
+    """
+    Parse documents in parallel worker processes (see parse_in_pool).
+    Returns (name, text, error) per path, in input order; a document that
+    fails to parse does not fail the batch. Documents not started before
+    the deadline expires are reported as errors. Names are paths relative
+    to `root` if given, else file names.
+    """
+    def name(path: Path) -> str:
+        return path.relative_to(root).as_posix() if root else path.name
+
+    if not paths:
+        return []
+    expired = (lambda: deadline.expired) if deadline is not None else None
+    parsed = {
+        path: result
+        for path, result in parse_in_pool(paths, min(max_workers, len(paths)), parse_text, stop=expired)
+    }
+    return [
+        (name(p), *parsed[p]) if p in parsed
+        else (name(p), "", f"Not parsed: request deadline expired ({deadline.reason})")
+        for p in paths
+    ]
+
+
+# ---------------- Batch compliance ----------------
+def check_compliance_batch(documents: Sequence[Tuple[str, str]], top_k: int = 2,
+                           frameworks: Sequence[str] = None, deadline=None) -> Dict:
+    """
+    Check many documents at once. Identical clauses across the whole batch
+    are retrieved and evaluated once (see evaluate_all), and the
+    verdicts are fanned back out to a per-document report.
+
+    documents: (name, text) pairs
+    deadline: when it expires, documents keep the verdicts finished so far
+              and their summaries are marked partial
+    """
+    split = [(name, split_into_clauses(text)) for name, text in documents]
+    return check_clauses_batch(split, top_k=top_k, frameworks=frameworks, deadline=deadline)
+
+
+def check_clauses_batch(documents: Sequence[Tuple[str, List[str]]], top_k: int = 2,
+                        frameworks: Sequence[str] = None, deadline=None) -> Dict:
+    """
+    check_compliance_batch for documents that are already split into
+    clauses: (name, clauses) pairs (the offline runner splits in worker processes).
+    """
+    llm = get_llm()
+    collections = resolve_collections(frameworks)
+
+    # clause keys per document, and the first text seen for each unique key
+    doc_keys: List[List[str]] = []
+    doc_clauses: List[List[str]] = []
+    unique: Dict[str, str] = {}
+
+    for _, clauses in documents:
+        clauses = clauses[:MAX_CLAUSES]
+        keys = [clause_key(c) for c in clauses]
+        for k, c in zip(keys, clauses):
+            unique.setdefault(k, c)
+        doc_keys.append(keys)
+        doc_clauses.append(clauses)
+
+    unique_keys = list(unique)
+    unique_clauses = [unique[k] for k in unique_keys]
+    unique_rules = retrieve_rules(unique_clauses, top_k, collections, deadline)
+
+    rules_by_key = dict(zip(unique_keys, unique_rules))
+    found, raw = evaluate_all(llm, unique_clauses[:len(unique_rules)], unique_rules, deadline=deadline)
+    verdicts = {unique_keys[i]: v for i, v in found.items()}
+    partial_reason = deadline.reason if deadline is not None else None
+
+    reports = []
+    for (name, _), keys, clauses in zip(documents, doc_keys, doc_clauses):
+        results = [
+            make_result(clause, rules_by_key[k], verdicts[k])
+            for k, clause in zip(keys, clauses) if k in verdicts
+        ]
+        if partial_reason and len(results) < len(keys):
+            summary = build_summary(results, len(keys) - len(results), partial_reason)
+        else:
+            if not results and keys:
+                results = [fallback_result(raw)]
+            summary = build_summary(results)
+
+        reports.append({"document": name, "summary": summary, "results": results})
+
+    total = sum(len(keys) for keys in doc_keys)
+    reused = sum(1 for v in verdicts.values() if v.get("verdict_source") == "near_duplicate")
+    log.info(f"Batch: {len(documents)} documents, {total} clauses, {len(unique_keys)} unique, {reused} reused")
+
+    return {
+        "summary": {
+            "documents": len(documents),
+            "total_clauses": total,
+            "unique_clauses": len(unique_keys),
+            "reused_verdicts": reused,
+            "partial": any(r["summary"]["partial"] for r in reports),
+        },
+        "documents": reports,
+    }
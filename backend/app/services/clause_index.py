@@ -0,0 +1,172 @@
+"""
+Near-duplicate index over previously evaluated clauses (MinHash + LSH banding).
+
+Contracts from the same template differ by party names, dates and small
+wording changes, so exact-text caching misses most reuse. Each clause is
+reduced to a MinHash signature of its word shingles; the signature is split
+into bands and every band is stored as one indexed bucket row in SQLite.
+A lookup probes only the clause's own buckets, so its cost does not grow
+with the number of stored clauses.
+"""
+import array
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from app.config import NEAR_DUP_DB_PATH, NEAR_DUP_THRESHOLD, SQLITE_BUSY_TIMEOUT_S
+
+NUM_PERM = 128
+BANDS = 32            # 32 bands x 4 rows: candidates from ~0.45 similarity up
+SHINGLE_SIZE = 3
+MAX_CANDIDATES = 50
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1729)  # fixed: signatures must be stable across processes and restarts
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+_NUMBER_PREFIX = re.compile(r"^(?:clause\s+)?\d+(?:\.\d+)*[\).\-\:]?\s+")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def rules_fingerprint(rules: Sequence[str]) -> str:
+    """
+    A stored verdict is only reused when the same rule excerpts were retrieved
+    for the new clause: that is the cheap revalidation step.
+    """
+    return hashlib.sha256(json.dumps(sorted(rules)).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str) -> set:
+    text = _NUMBER_PREFIX.sub("", text.strip().lower())
+    tokens = _TOKEN.findall(text)
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        for s in shingles(text)
+    ]
+    return [
+        min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes)
+        for a, b in _PERMS
+    ]
+
+
+def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of the two clauses' shingle sets."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def _band_buckets(sig: Sequence[int], scope: str) -> List[int]:
+    rows = NUM_PERM // BANDS
+    buckets = []
+    for band in range(BANDS):
+        key = f"{scope}|{band}|" + ",".join(map(str, sig[band * rows:(band + 1) * rows]))
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+class ClauseIndex:
+    def __init__(self, path: str = NEAR_DUP_DB_PATH, threshold: float = NEAR_DUP_THRESHOLD):
+        self.path = str(path)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_S)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS clauses (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                rules_hash TEXT NOT NULL,
+                clause TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                verdict TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                bucket INTEGER NOT NULL,
+                clause_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets(bucket);
+        """)
+        self._conn.commit()
+
+    def lookup(self, clause: str, scope: str, rules_hash: str) -> Optional[Dict]:
+        """
+        Best stored verdict for a near-duplicate clause evaluated against the
+        same rules, or None. Returns {"verdict", "similarity", "clause"}.
+        """
+        sig = minhash(clause)
+        return self._best_match(sig, _band_buckets(sig, scope), scope, rules_hash)
+
+    def _best_match(self, sig: List[int], buckets: List[int], scope: str, rules_hash: str) -> Optional[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT c.id, c.clause, c.signature, c.verdict, COUNT(*) AS hits
+                FROM buckets b JOIN clauses c ON c.id = b.clause_id
+                WHERE b.bucket IN ({",".join("?" * len(buckets))})
+                  AND c.scope = ? AND c.rules_hash = ?
+                GROUP BY c.id
+                ORDER BY hits DESC
+                LIMIT ?
+                """,
+                (*buckets, scope, rules_hash, MAX_CANDIDATES),
+            ).fetchall()
+
+        best = None
+        for _, text, blob, verdict, _ in rows:
+            sim = similarity(sig, array.array("Q", blob))
+            if sim >= self.threshold and (best is None or sim > best["similarity"]):
+                best = {"verdict": json.loads(verdict), "similarity": round(sim, 3), "clause": text}
+        return best
+
+    def add(self, clause: str, scope: str, rules_hash: str, verdict: Dict) -> bool:
+        """
+        Store a verdict. Skipped (returns False) when an identical clause is
+        already stored for the same rules, so repeated clauses don't grow the buckets.
+        """
+        sig = minhash(clause)
+        buckets = _band_buckets(sig, scope)
+        existing = self._best_match(sig, buckets, scope, rules_hash)
+        if existing and existing["similarity"] == 1.0:
+            return False
+
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO clauses (scope, rules_hash, clause, signature, verdict) VALUES (?, ?, ?, ?, ?)",
+                (scope, rules_hash, clause, array.array("Q", sig).tobytes(), json.dumps(verdict)),
+            )
+            self._conn.executemany(
+                "INSERT INTO buckets (bucket, clause_id) VALUES (?, ?)",
+                [(b, cur.lastrowid) for b in buckets],
+            )
+            self._conn.commit()
+        return True
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+
+
+_index: Optional[ClauseIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_clause_index() -> ClauseIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ClauseIndex()
+        return _index
@@ -1,12 +1,29 @@
 import json
+import random
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Sequence, Tuple
 from functools import lru_cache
 
 from app.utils import split_into_clauses
-from app.vectordb.retriever import get_similar_rules
-from app.llm.ollama_client import get_llm
+from app.vectordb.retriever import get_similar_rules, get_similar_rules_multi
+from app.vectordb.chroma_client import resolve_collections
+from app.llm.ollama_client import get_llm, get_triage_llm, record_prompt_eval, LLM_MODEL
+from app.llm.prompts import COMPLIANCE_PREFIX, TRIAGE_PROMPT
 from app.services.report_builder import build_summary
+from app.services.clause_index import get_clause_index, rules_fingerprint
+from app.services.rule_cache import get_rule_cache, cache_key
+from app.config import (
+    NEAR_DUP_ENABLED, CASCADE_ENABLED, CASCADE_CONFIDENCE_THRESHOLD, CASCADE_AUDIT_RATE, RULE_CACHE_SHARED
+)
+from app.exceptions import DeadlineExceededError
+from app import metrics
+from app.logger import get_logger
+
+log = get_logger(__name__)
+
+metrics.register_ratio("cascade_escalation_rate", "cascade_escalated_total", "cascade_clauses_total")
+metrics.register_ratio("cascade_agreement_rate", "cascade_agree_total", "cascade_compared_total")
+metrics.register_ratio("cascade_audit_agreement_rate", "cascade_audit_agree_total", "cascade_audit_total")
 
 
 
@@ -31,130 +48,350 @@ def extract_json(text: str) -> Dict[str, Any]:
 
 # ---------------- Cached rule retrieval ----------------
 @lru_cache(maxsize=256)
-def cached_rules(clause: str, top_k: int):
+def cached_rules(clause: str, top_k: int, collections: Tuple[str, ...] = None):
     """
     Cache similar rule retrieval for faster repeated runs.
+    Keyed on the physical collections, so a blue/green switch never serves
+    rules cached from the old version. With RULE_CACHE_SHARED, misses go to
+    the cache shared by all worker processes (rule_cache.py) before Chroma.
     """
-    return tuple(get_similar_rules(clause, top_k=top_k))
+    if not RULE_CACHE_SHARED:
+        return retrieve_similar(clause, top_k, collections)
 
+    cache = get_rule_cache()
+    key = cache_key(clause, top_k, collections)
+    rules = cache.get(key)
+    if rules is None:
+        rules = retrieve_similar(clause, top_k, collections)
+        cache.put(key, rules)
+    return rules
 
-# ---------------- Main compliance checker ----------------
-def check_compliance(document_text: str, top_k: int = 2) -> Dict:
+
+def retrieve_similar(clause: str, top_k: int, collections: Tuple[str, ...] = None) -> Tuple[str, ...]:
+    if collections and len(collections) > 1:
+        return tuple(get_similar_rules_multi(clause, collections, top_k=top_k))
+    return tuple(get_similar_rules(clause, top_k=top_k, collection_name=collections[0] if collections else None))
+
+
+# ---------------- Clause evaluation (shared by single + batch checks) ----------------
+MAX_CLAUSES = 10  # ✅ per-document hard cap, and clauses per LLM call, for speed and token control
+
+
+def build_prompt(inputs: List[Dict]) -> str:
+    # stable prefix first, per-batch data last: Ollama reuses the prefix's KV cache
+    return COMPLIANCE_PREFIX + json.dumps(inputs, indent=2) + "\n"
+
+
+def retrieve_rules(clauses: List[str], top_k: int, collections: Tuple[str, ...],
+                   deadline=None) -> List[List[str]]:
     """
-    Optimized compliance checker with better explanations + rectification.
-    Uses ONE LLM CALL for all clauses.
+    Rules per clause. If the deadline expires midway, only the clauses
+    retrieved so far (a prefix of `clauses`) get rules.
     """
-    llm = get_llm()
+    rules = []
+    for clause in clauses:
+        if deadline is not None and deadline.expired:
+            break
+        rules.append(list(cached_rules(clause, top_k, collections)))
+    return rules
 
-    clauses = split_into_clauses(document_text)
-    MAX_CLAUSES = 10
-    clauses = clauses[:MAX_CLAUSES]  # ✅ hard cap for speed and token control
-
-    inputs = []
-    matched_rules = {}
-
-    for i, clause in enumerate(clauses, start=1):
-        rules = list(cached_rules(clause, top_k))
-        matched_rules[i] = rules
-
-        inputs.append({
-            "clause_number": i,
-            "clause_text": clause,
-            "rules": rules
-        })
-
-    prompt = f"""
-You are a Senior Legal Compliance Auditor.
-
-Task:
-Evaluate each contract clause against the provided regulations excerpts.
-Your response MUST be professional, detailed, and actionable.
-
-STRICT RULES:
-- Use ONLY the provided rules for the evaluation.
-- Do NOT invent regulations or legal requirements.
-- Return ONLY valid JSON (no markdown, no extra text).
-- If a clause does not clearly violate a rule but seems incomplete or unclear, mark NEEDS_REVIEW.
-
-OUTPUT JSON SCHEMA:
-{{
-  "results": [
-    {{
-      "clause_number": 1,
-      "status": "COMPLIANT|NEEDS_REVIEW|NON_COMPLIANT",
-      "risk_level": "LOW|MEDIUM|HIGH",
-
-      "rule_mapping": [
-        {{
-          "rule_excerpt": "exact rule text",
-          "relevance": "how the rule applies to this clause",
-          "violation": true
-        }}
-      ],
-
-      "reason": "Explain WHY the clause is compliant/non-compliant in detail.",
-      "risk_impact": "Explain practical impact: data breach risk, audit failure, penalties, contract risk etc.",
-      "rectification_steps": [
-        "step-by-step technical/policy actions to fix the issue"
-      ],
-      "recommended_contract_changes": [
-        "exact contractual changes required (obligations/wording)"
-      ],
-      "rewritten_clause": "Rewrite the clause into a compliant version using strong legal language."
-    }}
-  ]
-}}
-
-INPUT:
-{json.dumps(inputs, indent=2)}
-"""
-
-    raw = llm.invoke(prompt).content.strip()
+
+def invoke_llm(llm, prompt: str, deadline=None):
+    # only the gateway-wrapped models (see ollama_client) take a deadline
+    if deadline is None:
+        return llm.invoke(prompt)
+    return llm.invoke(prompt, deadline=deadline)
+
+
+def evaluate_clauses(llm, clauses: List[str], rules: List[List[str]], deadline=None) -> Tuple[List[Dict], str]:
+    """
+    ONE LLM call for up to MAX_CLAUSES clauses.
+    Returns the model's per-clause items (clause_number is 1-based into
+    `clauses`) and the raw output; items are empty if it wasn't parsable.
+    """
+    inputs = [
+        {"clause_number": i, "clause_text": clause, "rules": clause_rules}
+        for i, (clause, clause_rules) in enumerate(zip(clauses, rules), start=1)
+    ]
+
+    prompt = build_prompt(inputs)
+    response = invoke_llm(llm, prompt, deadline)
+    record_prompt_eval(response, prompt)
+    raw = response.content.strip()
 
     try:
         parsed = extract_json(raw)
-        results = parsed.get("results", [])
+        items = parsed.get("results", [])
     except Exception:
-        results = []
+        items = []
+
+    return items, raw
+
+
+# Set on verdicts that did not come from the full model
+# (near-duplicate index reuse, or accepted by the cascade triage tier)
+VERDICT_META_FIELDS = ("verdict_source", "similarity", "reused_from", "triage_confidence")
+
+
+REUSED_REASON = ("Verdict reused from a near-identical clause evaluated earlier (similarity {similarity}); "
+                 "clause-specific explanation and rewrite were not generated.")
+
+
+def reusable_verdict(r: Dict) -> Dict:
+    """
+    The part of a verdict that carries over to a near-duplicate clause: status,
+    risk and rule references. Reasons, rectification steps and the rewritten
+    clause quote this clause's parties, dates and amounts, so they are not reused.
+    """
+    return {
+        "status": r.get("status", "NEEDS_REVIEW"),
+        "risk_level": r.get("risk_level", "MEDIUM"),
+        "rule_mapping": [
+            {k: m[k] for k in ("rule_excerpt", "violation") if k in m}
+            for m in r.get("rule_mapping", []) if isinstance(m, dict)
+        ],
+    }
+
 
-    final_results = []
-    for r in results:
-        cn = r.get("clause_number")
-        clause_text = clauses[cn - 1] if cn and 1 <= cn <= len(clauses) else ""
+# ---------------- Result normalization ----------------
+# Model output is loosely typed (a string where a list is asked for, null
+# fields, bare strings in rule_mapping); results are coerced to the
+# ClauseResult shape so a stored report always validates.
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n".join(_as_text(v) for v in value)
+    return value if isinstance(value, str) else str(value)
 
-        final_results.append({
-            "clause": clause_text,
-            "matched_rules": matched_rules.get(cn, []),
 
-            "status": r.get("status", "NEEDS_REVIEW"),
-            "risk_level": r.get("risk_level", "MEDIUM"),
+def _as_text_list(value) -> List[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [t for t in (_as_text(v).strip() for v in value) if t]
 
-            "rule_mapping": r.get("rule_mapping", []),
 
-            "reason": r.get("reason", ""),
-            "risk_impact": r.get("risk_impact", ""),
+def _as_rule_mapping(value) -> List[Dict]:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [v if isinstance(v, dict) else {"rule_excerpt": _as_text(v)} for v in value if v is not None]
+
+
+def make_result(clause_text: str, matched_rules: List[str], r: Dict) -> Dict:
+    return {
+        "clause": clause_text,
+        "matched_rules": _as_text_list(matched_rules),
+
+        "status": _as_text(r.get("status")) or "NEEDS_REVIEW",
+        "risk_level": _as_text(r.get("risk_level")) or "MEDIUM",
+
+        "rule_mapping": _as_rule_mapping(r.get("rule_mapping")),
+
+        "reason": _as_text(r.get("reason")),
+        "risk_impact": _as_text(r.get("risk_impact")),
+
+        "rectification_steps": _as_text_list(r.get("rectification_steps")),
+        "recommended_contract_changes": _as_text_list(r.get("recommended_contract_changes")),
+
+        "rewritten_clause": _as_text(r.get("rewritten_clause")),
+
+        **{k: r[k] for k in VERDICT_META_FIELDS if k in r}
+    }
+
+
+def fallback_result(raw: str) -> Dict:
+    """
+    Shown when the model output had no usable results (raw output kept for debugging).
+    """
+    result = make_result("", [], {})
+    result["raw_model_output"] = raw
+    return result
+
+
+# ---------------- Two-tier cascade ----------------
+def _confidence(item: Dict) -> float:
+    try:
+        return float(item.get("confidence", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def triage_clauses(triage_llm, clauses: List[str], rules: List[List[str]],
+                   pending: List[int], deadline=None) -> Tuple[Dict[int, Dict], List[int], Dict[int, Dict]]:
+    """
+    First cascade tier: the small model classifies each pending clause with a
+    confidence. Confident COMPLIANT verdicts are accepted as-is; everything
+    else (plus a CASCADE_AUDIT_RATE sample of the accepted ones, to measure
+    agreement) is escalated to the full model.
+
+    Returns (accepted verdicts, indexes to escalate, triage item per index).
+    If the deadline expires, clauses not triaged yet are returned for escalation.
+    """
+    triage: Dict[int, Dict] = {}
+    for start in range(0, len(pending), MAX_CLAUSES):
+        chunk = pending[start:start + MAX_CLAUSES]
+        inputs = [
+            {"clause_number": n, "clause_text": clauses[i], "rules": rules[i]}
+            for n, i in enumerate(chunk, start=1)
+        ]
+        try:
+            raw = invoke_llm(triage_llm, TRIAGE_PROMPT.format(inputs=json.dumps(inputs, indent=2)), deadline).content
+            items = extract_json(raw).get("results", [])
+        except DeadlineExceededError as e:
+            # not a triage failure: stop here, evaluate_all makes no further calls
+            log.warning(f"Stopped triage, {len(pending) - start} clauses left: {e}")
+            break
+        except Exception as e:
+            log.warning(f"Cascade triage failed, escalating {len(chunk)} clauses: {e}")
+            items = []
+
+        for t in items:
+            cn = t.get("clause_number")
+            if isinstance(cn, int) and 1 <= cn <= len(chunk):
+                triage[chunk[cn - 1]] = t
+
+    accepted: Dict[int, Dict] = {}
+    escalate = []
+    for i in pending:
+        t = triage.get(i)
+        confident = t is not None and t.get("status") == "COMPLIANT" and _confidence(t) >= CASCADE_CONFIDENCE_THRESHOLD
+
+        if confident and random.random() < CASCADE_AUDIT_RATE:
+            t["audit"] = True
+            escalate.append(i)
+        elif confident:
+            accepted[i] = {
+                "status": "COMPLIANT",
+                "risk_level": "LOW",
+                "reason": t.get("reason", ""),
+                "verdict_source": "triage",
+                "triage_confidence": _confidence(t),
+            }
+        else:
+            escalate.append(i)
+
+    metrics.inc("cascade_clauses_total", len(pending))
+    metrics.inc("cascade_escalated_total", len(escalate))
+    return accepted, escalate, triage
+
+
+def record_tier_agreement(triage: Dict[int, Dict], escalated: List[int], verdicts: Dict[int, Dict]):
+    for i in escalated:
+        t, v = triage.get(i), verdicts.get(i)
+        if not t or not v:
+            continue
+        agree = int(t.get("status") == v.get("status"))
+        if t.get("audit"):
+            metrics.inc("cascade_audit_total")
+            metrics.inc("cascade_audit_agree_total", agree)
+        else:
+            metrics.inc("cascade_compared_total")
+            metrics.inc("cascade_agree_total", agree)
+
+
+def evaluate_all(llm, clauses: List[str], rules: List[List[str]],
+                 near_dup: bool = None, cascade: bool = None, deadline=None) -> Tuple[Dict[int, Dict], str]:
+    """
+    Verdict for each clause index (0-based) that got one, plus the last raw
+    model output.
+
+    1. near-duplicate index (if enabled): a clause near-identical to one
+       evaluated earlier against the same retrieved rules reuses that verdict
+    2. cascade (if enabled): the triage model accepts confident COMPLIANT clauses
+    3. the rest go to the full model, MAX_CLAUSES per call
+
+    When the deadline expires no further calls are made and the running one
+    is cancelled; verdicts gathered so far are returned.
+    """
+    near_dup = NEAR_DUP_ENABLED if near_dup is None else near_dup
+    cascade = CASCADE_ENABLED if cascade is None else cascade
+    index = get_clause_index() if near_dup else None
+
+    verdicts: Dict[int, Dict] = {}
+    pending = []
+    for i, clause in enumerate(clauses):
+        hit = index.lookup(clause, LLM_MODEL, rules_fingerprint(rules[i])) if index else None
+        if hit:
+            verdicts[i] = {**reusable_verdict(hit["verdict"]), "verdict_source": "near_duplicate",
+                           "similarity": hit["similarity"], "reused_from": hit["clause"],
+                           "reason": REUSED_REASON.format(similarity=hit["similarity"])}
+        else:
+            pending.append(i)
+
+    if index and len(pending) < len(clauses):
+        log.info(f"Near-duplicate index reused {len(clauses) - len(pending)}/{len(clauses)} verdicts")
+
+    triage = {}
+    if cascade and pending:
+        accepted, pending, triage = triage_clauses(get_triage_llm(), clauses, rules, pending, deadline)
+        verdicts.update(accepted)
+
+    raw = ""
+    for start in range(0, len(pending), MAX_CLAUSES):
+        if deadline is not None and deadline.expired:
+            break
+        chunk = pending[start:start + MAX_CLAUSES]
+        try:
+            items, raw = evaluate_clauses(llm, [clauses[i] for i in chunk], [rules[i] for i in chunk], deadline)
+        except DeadlineExceededError as e:
+            log.warning(f"Stopped evaluating, {len(pending) - start} clauses left: {e}")
+            break
+
+        for r in items:
+            cn = r.get("clause_number")
+            if isinstance(cn, int) and 1 <= cn <= len(chunk) and chunk[cn - 1] not in verdicts:
+                i = chunk[cn - 1]
+                verdicts[i] = r
+                if index:
+                    index.add(clauses[i], LLM_MODEL, rules_fingerprint(rules[i]), reusable_verdict(r))
+
+    if cascade:
+        record_tier_agreement(triage, pending, verdicts)
+
+    return verdicts, raw
+
+
+# ---------------- Main compliance checker ----------------
+def check_compliance(document_text: str, top_k: int = 2, frameworks: Sequence[str] = None,
+                     deadline=None) -> Dict:
+    """
+    Optimized compliance checker with better explanations + rectification.
+    Uses ONE LLM CALL for all clauses.
+
+    frameworks: regulation sets to search (default framework when empty).
+    deadline: app.deadline.Deadline; when it expires the report holds the
+              verdicts finished so far and its summary is marked partial.
+    """
+    llm = get_llm()
+
+    # Pin one collection version per framework for the whole check (see ingest blue/green switch)
+    collections = resolve_collections(frameworks)
+
+    clauses = split_into_clauses(document_text)
+    clauses = clauses[:MAX_CLAUSES]
+
+    rules = retrieve_rules(clauses, top_k, collections, deadline)
+    verdicts, raw = evaluate_all(llm, clauses[:len(rules)], rules, deadline=deadline)
 
-            "rectification_steps": r.get("rectification_steps", []),
-            "recommended_contract_changes": r.get("recommended_contract_changes", []),
+    final_results = [
+        make_result(clauses[i], rules[i], verdicts[i])
+        for i in range(len(rules)) if i in verdicts
+    ]
 
-            "rewritten_clause": r.get("rewritten_clause", "")
-        })
+    partial_reason = deadline.reason if deadline is not None else None
+    if partial_reason and len(final_results) < len(clauses):
+        return {
+            "summary": build_summary(final_results, len(clauses) - len(final_results), partial_reason),
+            "results": final_results
+        }
 
     # fallback to show raw model output (debug)
     if not final_results:
-        final_results = [{
-            "clause": "",
-            "matched_rules": [],
-            "status": "NEEDS_REVIEW",
-            "risk_level": "MEDIUM",
-            "rule_mapping": [],
-            "reason": "",
-            "risk_impact": "",
-            "rectification_steps": [],
-            "recommended_contract_changes": [],
-            "rewritten_clause": "",
-            "raw_model_output": raw
-        }]
+        final_results = [fallback_result(raw)]
 
     return {
         "summary": build_summary(final_results),
@@ -1,8 +1,15 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence, Tuple
 from pypdf import PdfReader
 import docx
 
-from app.exceptions import FileParseError
+from app.exceptions import AppError, FileParseError
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx"}
+PREFETCH_PER_WORKER = 4  # documents parsed ahead of the consumer, per worker
 
 def read_pdf(path: Path) -> str:
     try:
@@ -28,3 +35,41 @@ def parse_uploaded_file(path: Path) -> str:
     if ext == ".docx":
         return read_docx(path)
     raise FileParseError("Unsupported file type. Only PDF and DOCX are supported.")
+
+def parse_text(path: str) -> Tuple[str, str]:
+    """Process-pool worker: (text, error) for one document."""
+    try:
+        return parse_uploaded_file(Path(path)), ""
+    except AppError as e:
+        return "", str(e)
+
+def parse_in_pool(paths: Sequence[Path], workers: int, worker: Callable[[str], Any] = parse_text,
+                  stop: Callable[[], bool] = None) -> Iterator[Tuple[Path, Any]]:
+    """
+    (path, worker(path)) in input order, computed in a process pool: pypdf
+    and python-docx are pure Python and hold the GIL, so threads don't parse
+    in parallel. At most PREFETCH_PER_WORKER documents per worker are parsed
+    ahead, so memory stays bounded when the consumer is slower. Once `stop()`
+    returns True no further documents are started.
+    """
+    # spawn, not fork: the parent already runs logging, Chroma and HTTP client threads
+    context = multiprocessing.get_context("spawn")
+    limit = workers * PREFETCH_PER_WORKER
+    remaining = iter(paths)
+    queue = deque()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        try:
+            while True:
+                while len(queue) < limit and not (stop and stop()):
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    queue.append((path, pool.submit(worker, str(path))))
+                if not queue:
+                    return
+                path, future = queue.popleft()
+                yield path, future.result()
+        finally:
+            for _, future in queue:  # consumer stopped early: don't parse what it won't read
+                future.cancel()
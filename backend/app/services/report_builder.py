@@ -1,10 +1,14 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
-def build_summary(results: List[Dict]) -> Dict:
+def build_summary(results: List[Dict], unevaluated: int = 0, partial_reason: Optional[str] = None) -> Dict:
     """
     Build summary statistics for compliance results list.
     Expected each item has key: status = COMPLIANT / NEEDS_REVIEW / NON_COMPLIANT
+
+    A check cut short by its deadline (or a client disconnect) passes the
+    reason and how many clauses were left unevaluated; the summary is then
+    marked partial and its score/risk only cover the evaluated clauses.
     """
     total = len(results)
 
@@ -21,11 +25,17 @@ def build_summary(results: List[Dict]) -> Dict:
     else:
         overall_risk = "LOW"
 
-    return {
+    summary = {
         "total_clauses": total,
         "compliant": compliant,
         "needs_review": needs_review,
         "non_compliant": non_compliant,
         "compliance_score": score,
-        "overall_risk": overall_risk
+        "overall_risk": overall_risk,
+        "partial": partial_reason is not None
     }
+    if partial_reason is not None:
+        summary["partial_reason"] = partial_reason
+        summary["unevaluated_clauses"] = unevaluated
+
+    return summary
@@ -0,0 +1,201 @@
+"""
+Persistent store for compliance reports.
+
+Each report is one row (document, kind, summary, filterable columns) plus one
+row per clause result holding its status, risk level and zlib-compressed
+JSON. Listing and paging only touch the rows they return, so a reviewer can
+page through a 300-clause report filtered by status/risk without the server
+loading or decompressing the whole report.
+
+Saving a report also updates the analytics rollups (see analytics.py) in
+the same transaction.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import REPORT_DB_PATH, SQLITE_BUSY_TIMEOUT_S
+from app.exceptions import ReportNotFoundError
+from app.services.analytics import ROLLUP_SCHEMA, update_rollups, query_analytics
+from app.logger import get_logger
+
+MAX_PAGE_SIZE = 200
+
+log = get_logger(__name__)
+
+
+def _pack(obj) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+class ReportStore:
+    def __init__(self, path: str = REPORT_DB_PATH):
+        self.path = str(path)
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_S)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS reports (
+                id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                document TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                vendor TEXT,
+                overall_risk TEXT,
+                summary BLOB NOT NULL,
+                extra BLOB
+            );
+            CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at);
+            CREATE INDEX IF NOT EXISTS idx_reports_risk ON reports(overall_risk, created_at);
+
+            CREATE TABLE IF NOT EXISTS results (
+                report_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                status TEXT,
+                risk_level TEXT,
+                data BLOB NOT NULL,
+                PRIMARY KEY (report_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_filter ON results(report_id, status, risk_level, position);
+        """)
+        columns = [c[1] for c in self._conn.execute("PRAGMA table_info(reports)")]
+        if "vendor" not in columns:
+            self._conn.execute("ALTER TABLE reports ADD COLUMN vendor TEXT")
+        self._conn.executescript(ROLLUP_SCHEMA)
+        self._conn.commit()
+        self._backfill_rollups()
+
+    def _backfill_rollups(self):
+        """One-time: build the rollups for reports stored before they existed."""
+        if self._conn.execute("SELECT 1 FROM rollup_vendor LIMIT 1").fetchone():
+            return
+        reports = self._conn.execute("SELECT id, vendor, created_at, summary FROM reports").fetchall()
+        if not reports:
+            return
+
+        with self._conn:
+            for report_id, vendor, created_at, summary in reports:
+                results = [
+                    _unpack(data) for (data,) in self._conn.execute(
+                        "SELECT data FROM results WHERE report_id = ? ORDER BY position", (report_id,)
+                    )
+                ]
+                update_rollups(self._conn, {"summary": _unpack(summary), "results": results}, vendor, created_at)
+        log.info(f"Backfilled analytics rollups from {len(reports)} stored reports")
+
+    def save(self, report: Dict, document: str, kind: str = "compliance", vendor: str = None) -> str:
+        """
+        Store a report ({"summary", "results", ...}); any other top-level keys
+        (e.g. revision "changes") are kept alongside. Returns the new report id.
+        """
+        report_id = uuid.uuid4().hex
+        created_at = time.time()
+        summary = report.get("summary", {})
+        extra = {k: v for k, v in report.items() if k not in ("summary", "results", "report_id")}
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO reports (id, created_at, document, kind, vendor, overall_risk, summary, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (report_id, created_at, document, kind, vendor, summary.get("overall_risk"),
+                 _pack(summary), _pack(extra) if extra else None),
+            )
+            self._conn.executemany(
+                "INSERT INTO results (report_id, position, status, risk_level, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (report_id, n, r.get("status"), r.get("risk_level"), _pack(r))
+                    for n, r in enumerate(report.get("results", []))
+                ],
+            )
+            update_rollups(self._conn, report, vendor, created_at)
+        return report_id
+
+    def list_reports(self, offset: int = 0, limit: int = 50, overall_risk: str = None) -> Dict:
+        """Newest first; summaries only."""
+        limit = min(limit, MAX_PAGE_SIZE)
+        where, args = ("WHERE overall_risk = ?", [overall_risk]) if overall_risk else ("", [])
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM reports {where}", args).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, document, kind, vendor, created_at, summary FROM reports {where} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (*args, limit, offset),
+            ).fetchall()
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "reports": [
+                {"report_id": rid, "document": doc, "kind": kind, "vendor": vendor,
+                 "created_at": created, "summary": _unpack(summary)}
+                for rid, doc, kind, vendor, created, summary in rows
+            ],
+        }
+
+    def get_report(self, report_id: str, offset: int = 0, limit: int = 50,
+                   status: str = None, risk_level: str = None) -> Dict:
+        """One report with a page of its clause results, optionally filtered."""
+        limit = min(limit, MAX_PAGE_SIZE)
+        where, args = "WHERE report_id = ?", [report_id]
+        if status:
+            where, args = where + " AND status = ?", args + [status]
+        if risk_level:
+            where, args = where + " AND risk_level = ?", args + [risk_level]
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document, kind, vendor, created_at, summary, extra FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+            if row is None:
+                raise ReportNotFoundError(f"Report not found: {report_id}")
+
+            total = self._conn.execute(f"SELECT COUNT(*) FROM results {where}", args).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT data FROM results {where} ORDER BY position LIMIT ? OFFSET ?",
+                (*args, limit, offset),
+            ).fetchall()
+
+        document, kind, vendor, created_at, summary, extra = row
+        return {
+            **(_unpack(extra) if extra else {}),
+            "report_id": report_id,
+            "document": document,
+            "kind": kind,
+            "vendor": vendor,
+            "created_at": created_at,
+            "summary": _unpack(summary),
+            "total_results": total,
+            "offset": offset,
+            "limit": limit,
+            "results": [_unpack(data) for (data,) in rows],
+        }
+
+    def analytics(self, days: int = 30, top_rules: int = 10) -> Dict:
+        """Vendor, rule and daily risk rollups across all stored reports."""
+        with self._lock:
+            return query_analytics(self._conn, days=days, top_rules=top_rules)
+
+
+_store: Optional[ReportStore] = None
+_store_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore()
+        return _store
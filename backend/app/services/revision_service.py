@@ -0,0 +1,153 @@
+import difflib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.utils import split_into_clauses, clause_key
+from app.services.compliance_service import (
+    MAX_CLAUSES, retrieve_rules, evaluate_all, make_result
+)
+from app.services.report_builder import build_summary
+from app.vectordb.chroma_client import resolve_collections
+from app.llm.ollama_client import get_llm
+from app.exceptions import ComplianceError
+
+UNCHANGED = "unchanged"
+MODIFIED = "modified"
+ADDED = "added"
+REMOVED = "removed"
+
+# minimum text similarity for a replaced clause to count as MODIFIED
+# rather than REMOVED + ADDED
+MODIFIED_MIN_RATIO = 0.5
+
+
+def align_clauses(old_clauses: Sequence[str],
+                  new_clauses: Sequence[str]) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Align two versions of a contract by clause position (offset) and clause hash.
+
+    Returns (change, old_index, new_index) tuples: equal hashes are UNCHANGED
+    (also when a clause only moved or was renumbered), a similar clause
+    replacing one at the same place is MODIFIED, anything else is ADDED or REMOVED.
+    """
+    old_keys = [clause_key(c) for c in old_clauses]
+    new_keys = [clause_key(c) for c in new_clauses]
+
+    ops = []
+    matcher = difflib.SequenceMatcher(a=old_keys, b=new_keys, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.extend((UNCHANGED, i, j) for i, j in zip(range(i1, i2), range(j1, j2)))
+            continue
+
+        # inside a replaced block, the k-th old/new clauses are an edit of
+        # each other only if their wording is still close
+        paired = 0
+        if tag == "replace":
+            for k in range(min(i2 - i1, j2 - j1)):
+                if difflib.SequenceMatcher(a=old_clauses[i1 + k], b=new_clauses[j1 + k]).ratio() < MODIFIED_MIN_RATIO:
+                    break
+                paired += 1
+
+        ops.extend((MODIFIED, i1 + k, j1 + k) for k in range(paired))
+        ops.extend((REMOVED, i, None) for i in range(i1 + paired, i2))
+        ops.extend((ADDED, None, j) for j in range(j1 + paired, j2))
+
+    # a clause that moved shows up as removed + added with the same hash
+    removed = {old_keys[op[1]]: n for n, op in enumerate(ops) if op[0] == REMOVED}
+    for n, op in enumerate(ops):
+        if op is not None and op[0] == ADDED and new_keys[op[2]] in removed:
+            m = removed.pop(new_keys[op[2]])
+            ops[n] = (UNCHANGED, ops[m][1], op[2])
+            ops[m] = None
+
+    return [op for op in ops if op is not None]
+
+
+PRIOR_RESULT_FIELDS = ("clause", "status", "risk_level")
+
+
+def prior_results(prior_report) -> List[Dict]:
+    """
+    Clause results of a client-supplied prior report, normalized like fresh
+    ones. Raises ComplianceError (400) unless it is an object whose "results"
+    is a list of objects with non-empty clause, status and risk_level.
+    """
+    if not isinstance(prior_report, dict) or not isinstance(prior_report.get("results"), list):
+        raise ComplianceError('Prior report must be a JSON object with a "results" list')
+
+    results = []
+    for n, r in enumerate(prior_report["results"]):
+        if not isinstance(r, dict):
+            raise ComplianceError(f"Prior report result {n} is not an object")
+        missing = [f for f in PRIOR_RESULT_FIELDS if not isinstance(r.get(f), str) or not r[f].strip()]
+        if missing:
+            raise ComplianceError(f"Prior report result {n} has no {', '.join(missing)}")
+        results.append(r)
+    if not results:
+        raise ComplianceError("Prior report has no clause results to compare against")
+    return results
+
+
+def check_revision(document_text: str, prior_report: Dict, top_k: int = 2,
+                   frameworks: Sequence[str] = None, deadline=None) -> Dict:
+    """
+    Re-check a new version of a contract against the report of a prior
+    version: only added/modified clauses are retrieved and evaluated,
+    results for unchanged clauses are carried forward.
+
+    If the deadline expires, changed clauses without a verdict are left out
+    and the summary is marked partial.
+    """
+    prior = prior_results(prior_report)
+
+    new_clauses = split_into_clauses(document_text)[:MAX_CLAUSES]
+    old_clauses = [r["clause"] for r in prior]
+
+    ops = align_clauses(old_clauses, new_clauses)
+    changed = [j for change, _, j in ops if change in (ADDED, MODIFIED)]
+
+    verdicts, rules = {}, []
+    if changed:
+        collections = resolve_collections(frameworks)
+        rules = retrieve_rules([new_clauses[j] for j in changed], top_k, collections, deadline)
+        verdicts, _ = evaluate_all(get_llm(), [new_clauses[j] for j in changed][:len(rules)], rules, deadline=deadline)
+
+    partial_reason = deadline.reason if deadline is not None else None
+    position = {j: n for n, j in enumerate(changed)}
+    by_new_index: Dict[int, Dict] = {}
+    for change, i, j in ops:
+        if change == UNCHANGED:
+            result = make_result(new_clauses[j], prior[i].get("matched_rules"), prior[i])
+        elif change in (ADDED, MODIFIED):
+            n = position[j]
+            if partial_reason and n not in verdicts:
+                continue
+            result = make_result(new_clauses[j], rules[n], verdicts.get(n, {
+                "reason": "The model returned no verdict for this clause; review it manually."
+            }))
+            if change == MODIFIED:
+                result["previous_clause"] = old_clauses[i]
+        else:
+            continue
+
+        result["change"] = change
+        by_new_index[j] = result
+
+    results = [by_new_index[j] for j in sorted(by_new_index)]
+    counts = {c: sum(1 for op in ops if op[0] == c) for c in (UNCHANGED, MODIFIED, ADDED, REMOVED)}
+
+    unevaluated = len(changed) - len(verdicts)
+    if partial_reason and unevaluated > 0:
+        summary = build_summary(results, unevaluated, partial_reason)
+    else:
+        summary = build_summary(results)
+
+    return {
+        "summary": summary,
+        "changes": {
+            **counts,
+            "evaluated": len(changed),
+            "removed_clauses": [old_clauses[i] for change, i, _ in ops if change == REMOVED],
+        },
+        "results": results
+    }
@@ -0,0 +1,95 @@
+"""
+Retrieval cache shared by all worker processes.
+
+cached_rules keeps its per-process lru_cache; with RULE_CACHE_SHARED a miss
+there looks here (SQLite, WAL, so workers read concurrently) before querying
+Chroma, and stores what it retrieved. A clause retrieved by one worker is then
+not embedded and searched again by the others, nor after a restart.
+
+Keys include the physical collections, so entries never go stale across a
+blue/green switch; the oldest entries beyond RULE_CACHE_MAX_ENTRIES are pruned.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+from app import metrics
+from app.config import RULE_CACHE_DB_PATH, RULE_CACHE_MAX_ENTRIES, SQLITE_BUSY_TIMEOUT_S
+
+PRUNE_EVERY = 500  # writes between prunes
+
+metrics.register_ratio("rule_cache_hit_rate", "rule_cache_hits_total", "rule_cache_lookups_total")
+
+
+def cache_key(clause: str, top_k: int, collections: Optional[Sequence[str]]) -> str:
+    raw = json.dumps([clause, top_k, list(collections or ())], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RuleCache:
+    def __init__(self, path: str = RULE_CACHE_DB_PATH, max_entries: int = RULE_CACHE_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=SQLITE_BUSY_TIMEOUT_S)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # a lost entry is only a cache miss
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rules (
+                key TEXT PRIMARY KEY,
+                rules TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_rules_created ON rules(created_at);
+        """)
+
+    def get(self, key: str) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            row = self._conn.execute("SELECT rules FROM rules WHERE key = ?", (key,)).fetchone()
+        metrics.inc("rule_cache_lookups_total")
+        if row is None:
+            return None
+        metrics.inc("rule_cache_hits_total")
+        return tuple(json.loads(row[0]))
+
+    def put(self, key: str, rules: Sequence[str]):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rules (key, rules, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(list(rules), ensure_ascii=False), time.time()),
+                )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM rules WHERE key IN "
+                "(SELECT key FROM rules ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rules").fetchone()[0]
+
+
+_cache: Optional[RuleCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_rule_cache() -> RuleCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RuleCache()
+        return _cache
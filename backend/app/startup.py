@@ -0,0 +1,159 @@
+"""
+Startup warm-up and readiness tracking.
+
+Nothing heavy (langchain, chromadb, pypdf, python-docx, Ollama clients) is
+imported at module level, so `import app.main` stays within IMPORT_BUDGET_SECONDS
+and the server accepts traffic within STARTUP_BUDGET_SECONDS. The slow work
+(opening the collection, restoring a snapshot / ingesting, loading the Ollama
+models) runs in warm_up(), usually on a background thread.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from app.logger import get_logger
+
+# Budgets checked by tests/test_startup.py
+IMPORT_BUDGET_SECONDS = 1.5
+STARTUP_BUDGET_SECONDS = 0.5
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+REGULATIONS_PDF = DATA_DIR / "regulations_master.pdf"
+
+# pending -> running -> done | skipped | failed
+_state: Dict[str, str] = {"collection": "pending", "ingest": "pending", "llm": "pending"}
+_errors: Dict[str, str] = {}
+_lock = threading.Lock()
+_started_at = time.monotonic()
+
+log = get_logger(__name__)
+
+
+def set_state(step: str, value: str, error: str = None):
+    with _lock:
+        _state[step] = value
+        if error:
+            _errors[step] = error
+        else:
+            _errors.pop(step, None)
+
+
+def reset_state():
+    global _started_at
+    with _lock:
+        for step in _state:
+            _state[step] = "pending"
+        _errors.clear()
+        _started_at = time.monotonic()
+
+
+def readiness() -> Dict:
+    """
+    Ready once the collection is open and ingest has finished. A failed model
+    preload does not block readiness: the first request loads the model instead.
+    """
+    with _lock:
+        state = dict(_state)
+        errors = dict(_errors)
+
+    ready = (
+        state["collection"] in ("done", "skipped")
+        and state["ingest"] in ("done", "skipped")
+        and state["llm"] not in ("pending", "running")
+    )
+    return {
+        "ready": ready,
+        "steps": state,
+        "errors": errors,
+        "uptime_seconds": round(time.monotonic() - _started_at, 3),
+    }
+
+
+def auto_ingest(count: int) -> str:
+    """
+    Fill an empty collection: restore a compatible snapshot, else (or if the
+    restore fails) embed regulations_master.pdf. Returns the final ingest state.
+    """
+    from app.vectordb.import_vectors import find_compatible_snapshot, import_vectors_snapshot, SNAPSHOT_DIR
+    from app.vectordb.ingest_regulations_pdf import ingest_regulations_pdf
+    from app.exceptions import SnapshotError
+
+    if count == 0 and find_compatible_snapshot(SNAPSHOT_DIR):
+        print(f"[Startup] Restoring vector snapshot from {SNAPSHOT_DIR}")
+        try:
+            import_vectors_snapshot(SNAPSHOT_DIR)
+            return "done"
+        except SnapshotError as e:
+            # nothing was promoted: the collection is still empty, embed the PDF instead
+            log.warning(f"Snapshot restore failed, falling back to PDF ingest: {e}")
+    if count == 0 and REGULATIONS_PDF.exists():
+        print("[Startup] Auto ingest regulations_master.pdf")
+        ingest_regulations_pdf(str(REGULATIONS_PDF), reset=False, max_chunks=300)
+        return "done"
+
+    print(f"[Startup] DB count: {count}. Skipping auto ingest.")
+    return "skipped"
+
+
+def warm_up():
+    """
+    Open the collection, fill it if empty and preload the Ollama models.
+    Each step records its own state so /readyz can report progress.
+    Filling is done under the vector store's writer lock, so only one
+    worker process ingests.
+    """
+    count = None
+
+    set_state("collection", "running")
+    try:
+        from app.vectordb.chroma_client import get_chroma
+        count = get_chroma()._collection.count()
+        set_state("collection", "done")
+    except Exception as e:
+        log.error(f"Warm-up: could not open collection: {e}", exc_info=True)
+        set_state("collection", "failed", str(e))
+
+    if count is None:
+        set_state("ingest", "failed", "collection unavailable")
+    else:
+        set_state("ingest", "running")
+        try:
+            from app.vectordb.chroma_client import get_chroma, writer_lock
+            # with several workers, the first to take the lock ingests; the others
+            # wait here, then re-count and find the collection already filled
+            with writer_lock():
+                if count == 0:
+                    count = get_chroma()._collection.count()
+                set_state("ingest", auto_ingest(count))
+        except Exception as e:
+            log.error(f"Warm-up: auto ingest failed: {e}", exc_info=True)
+            set_state("ingest", "failed", str(e))
+
+    set_state("llm", "running")
+    try:
+        from app.llm.ollama_client import preload_models
+        preload_models()
+        set_state("llm", "done")
+    except Exception as e:
+        log.warning(f"Warm-up: model preload failed: {e}")
+        set_state("llm", "failed", str(e))
+
+
+def start_warm_up(mode: str = "background"):
+    """
+    mode: background (default) - warm up on a daemon thread
+          sync                 - block startup until warm-up completes
+          off                  - skip warm-up; everything loads on first use
+    """
+    if mode == "sync":
+        warm_up()
+        return None
+    if mode == "off":
+        for step in ("collection", "ingest", "llm"):
+            set_state(step, "skipped")
+        return None
+
+    t = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    t.start()
+    return t
@@ -1,3 +1,4 @@
+import hashlib
 import re
 from typing import List
 
@@ -8,6 +9,8 @@ CLAUSE_KEYWORDS = [
     "encryption", "logs", "breach", "consent"
 ]
 
+CLAUSE_NUMBER_PREFIX = re.compile(r"^(?:Clause\s+)?\d+(?:\.\d+)*[\).\-\:]?\s+", re.IGNORECASE)
+
 def looks_like_heading(text: str) -> bool:
     """
     Heuristic to detect titles/headings that are not clauses.
@@ -70,3 +73,14 @@ def split_into_clauses(text: str) -> List[str]:
         clauses = [p for p in paras if not looks_like_heading(p)]
 
     return clauses
+
+
+def clause_key(clause: str) -> str:
+    """
+    Identity of a clause: hash of its whitespace-normalized text without the
+    leading number, so the same clause at position 3 in one document and 7
+    in another (or after renumbering) has the same key.
+    """
+    text = " ".join(clause.split())
+    text = CLAUSE_NUMBER_PREFIX.sub("", text)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -1,12 +1,198 @@
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
 from langchain_chroma import Chroma
 from app.llm.ollama_client import get_embeddings
+from app.exceptions import VectorDBError
+from app.config import COLLECTION_NAME, CHROMA_PERSIST_DIR, CHROMA_SERVER_HOST, CHROMA_SERVER_PORT
+
+try:
+    import fcntl
+except ImportError:  # Windows: no multi-worker servers there, the in-process lock is enough
+    fcntl = None
+
+PERSIST_DIR = CHROMA_PERSIST_DIR
+
+# Each regulation set (gdpr, soc2, internal, ...) is its own aliased partition:
+# "default" -> COLLECTION_NAME, "gdpr" -> f"{COLLECTION_NAME}-gdpr"
+DEFAULT_FRAMEWORK = "default"
+FRAMEWORK_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_]{0,39}$")
+
+# alias -> {"active": physical collection, "previous": physical collection | None}
+ALIASES_FILE = "collection_aliases.json"
+WRITER_LOCK_FILE = ".writer.lock"
 
-PERSIST_DIR = "chroma_store"
-COLLECTION_NAME = "regulations"
+_writer_lock = threading.RLock()
+_writer_depth = 0
 
-def get_chroma():
+
+def get_chroma(collection_name: str = None):
+    """
+    Open a physical collection. Without a name, opens whatever the
+    COLLECTION_NAME alias currently points to.
+    """
+    if CHROMA_SERVER_HOST:
+        store = {"client": _server_client()}
+    else:
+        store = {"persist_directory": PERSIST_DIR}
     return Chroma(
-        collection_name=COLLECTION_NAME,
-        persist_directory=PERSIST_DIR,
-        embedding_function=get_embeddings()
+        collection_name=collection_name or resolve_collection(),
+        embedding_function=get_embeddings(),
+        **store
+    )
+
+
+@lru_cache(maxsize=None)
+def _server_client():
+    import chromadb
+
+    return chromadb.HttpClient(host=CHROMA_SERVER_HOST, port=CHROMA_SERVER_PORT)
+
+
+@contextmanager
+def writer_lock():
+    """
+    Single writer for the vector store (ingest, snapshot restore, promote,
+    rollback) across threads and worker processes: a re-entrant in-process
+    lock plus flock on PERSIST_DIR/.writer.lock. Readers never take it;
+    they keep querying the live collection through the alias.
+    """
+    global _writer_depth
+    with _writer_lock:
+        handle = None
+        if _writer_depth == 0 and fcntl is not None:
+            Path(PERSIST_DIR).mkdir(parents=True, exist_ok=True)
+            handle = open(Path(PERSIST_DIR) / WRITER_LOCK_FILE, "a")
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        _writer_depth += 1
+        try:
+            yield
+        finally:
+            _writer_depth -= 1
+            if handle is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+
+
+# ---------------- Blue/green collection aliases ----------------
+def _aliases_path() -> Path:
+    return Path(PERSIST_DIR) / ALIASES_FILE
+
+
+def load_aliases() -> Dict[str, Dict]:
+    path = _aliases_path()
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_aliases(aliases: Dict[str, Dict]):
+    path = _aliases_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(aliases, indent=2), encoding="utf-8")
+    os.replace(tmp, path)  # atomic: readers see the old or the new pointer, never half of one
+
+
+def resolve_collection(alias: str = COLLECTION_NAME) -> str:
+    """
+    Physical collection currently serving `alias`. Before the first
+    blue/green ingest the alias is the (legacy) collection name itself.
+    """
+    entry = load_aliases().get(alias)
+    return entry["active"] if entry else alias
+
+
+def new_shadow_name(alias: str = COLLECTION_NAME) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return f"{alias}__{stamp}_{uuid.uuid4().hex[:6]}"
+
+
+def promote_collection(physical: str, alias: str = COLLECTION_NAME) -> Optional[str]:
+    """
+    Atomically point `alias` at `physical`. The collection it replaces is kept
+    as `previous` for rollback; the one previously kept is returned so the
+    caller can drop it.
+    """
+    with writer_lock():
+        aliases = load_aliases()
+        entry = aliases.get(alias) or {"active": alias, "previous": None}
+
+        retired = entry.get("previous")
+        aliases[alias] = {
+            "active": physical,
+            "previous": entry["active"],
+            "promoted_at": datetime.now(timezone.utc).isoformat(),
+        }
+        _save_aliases(aliases)
+
+    if retired in (physical, entry["active"]):
+        return None
+    return retired
+
+
+# ---------------- Frameworks ----------------
+def normalize_framework(framework: Optional[str]) -> str:
+    name = (framework or DEFAULT_FRAMEWORK).strip().lower()
+    if not FRAMEWORK_PATTERN.match(name):
+        raise VectorDBError(f"Invalid framework name '{framework}' (use a-z, 0-9, _)")
+    return name
+
+
+def framework_alias(framework: Optional[str] = None) -> str:
+    name = normalize_framework(framework)
+    return COLLECTION_NAME if name == DEFAULT_FRAMEWORK else f"{COLLECTION_NAME}-{name}"
+
+
+def list_frameworks() -> List[str]:
+    names = {DEFAULT_FRAMEWORK}
+    prefix = f"{COLLECTION_NAME}-"
+    for alias in load_aliases():
+        if alias.startswith(prefix):
+            names.add(alias[len(prefix):])
+    return sorted(names)
+
+
+def resolve_collections(frameworks: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """
+    Pin the physical collections serving the selected frameworks
+    (default framework when none are given).
+    """
+    selected = sorted({normalize_framework(f) for f in frameworks or [DEFAULT_FRAMEWORK]})
+    known = set(list_frameworks())
+    unknown = [f for f in selected if f not in known]
+    if unknown:
+        raise VectorDBError(f"Unknown framework(s): {', '.join(unknown)}. Known: {', '.join(sorted(known))}")
+
+    aliases = load_aliases()
+    return tuple(
+        aliases[a]["active"] if a in aliases else a
+        for a in (framework_alias(f) for f in selected)
     )
+
+
+def rollback_collection(alias: str = COLLECTION_NAME) -> Dict:
+    """
+    Swap the active and previous collections of `alias`.
+    """
+    with writer_lock():
+        aliases = load_aliases()
+        entry = aliases.get(alias)
+        if not entry or not entry.get("previous"):
+            raise VectorDBError(f"No previous collection to roll back to for '{alias}'")
+
+        aliases[alias] = {
+            "active": entry["previous"],
+            "previous": entry["active"],
+            "promoted_at": datetime.now(timezone.utc).isoformat(),
+        }
+        _save_aliases(aliases)
+        return aliases[alias]
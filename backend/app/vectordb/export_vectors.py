@@ -1,8 +1,19 @@
+import hashlib
 import json
+from datetime import datetime, timezone
 from pathlib import Path
+
+import numpy as np
+
 from app.vectordb.chroma_client import get_chroma
+from app.llm.ollama_client import EMBED_MODEL
 
 EXPORT_PATH = Path("backend/app/data/exported_vectors.json")
+EXPORT_DIR = Path(__file__).resolve().parent.parent / "data" / "vector_export"
+
+EXPORT_FORMAT = "compliance-checker-vectors"
+EXPORT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
 
 
 def export_vectors(limit: int = 50, show_values: int = 30):
@@ -46,3 +57,114 @@ def export_vectors(limit: int = 50, show_values: int = 30):
         json.dump(export_data, f, indent=2)
 
     return {"exported": len(export_data), "file": str(EXPORT_PATH)}
+
+
+# ---------------- Full (chunked) export ----------------
+def iter_collection_pages(collection, page_size: int = 1000,
+                          include=("documents", "metadatas", "embeddings")):
+    """
+    Yield the collection in pages of `page_size` records using limit/offset,
+    so only one page is ever held in memory.
+    """
+    offset = 0
+    while True:
+        page = collection.get(limit=page_size, offset=offset, include=list(include))
+        ids = page.get("ids") or []
+        if not ids:
+            return
+
+        yield page
+
+        if len(ids) < page_size:
+            return
+        offset += len(ids)
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_manifest(out_dir: Path, manifest: dict) -> Path:
+    """
+    Write the manifest last and atomically: a directory without a manifest is
+    an incomplete export.
+    """
+    path = out_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+def export_vectors_chunked(out_dir: Path = None, page_size: int = 1000):
+    """
+    Export the whole collection (full vectors + documents + metadata) in chunks.
+
+    Each page becomes two files:
+      part-NNNNN.npy    float32 matrix of embeddings (rows aligned with records)
+      part-NNNNN.jsonl  one {"id", "document", "metadata"} object per line
+    A manifest.json with per-file sha256 checksums and the embedding model ID
+    is written at the end; the directory can be restored with
+    app.vectordb.import_vectors.import_vectors_snapshot.
+    """
+    out_dir = Path(out_dir or EXPORT_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Never leave a stale manifest pointing at parts from a previous export
+    (out_dir / MANIFEST_NAME).unlink(missing_ok=True)
+
+    db = get_chroma()
+
+    parts = []
+    total = 0
+    dim = 0
+
+    for n, page in enumerate(iter_collection_pages(db._collection, page_size=page_size)):
+        ids = page["ids"]
+        docs = page.get("documents") or [None] * len(ids)
+        metas = page.get("metadatas") or [None] * len(ids)
+
+        vectors = np.asarray(page.get("embeddings"), dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError(f"Page {n} returned {vectors.shape} embeddings for {len(ids)} ids")
+        dim = vectors.shape[1]
+
+        stem = f"part-{n:05d}"
+        npy_path = out_dir / f"{stem}.npy"
+        jsonl_path = out_dir / f"{stem}.jsonl"
+
+        np.save(npy_path, vectors, allow_pickle=False)
+
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for i in range(len(ids)):
+                f.write(json.dumps({"id": ids[i], "document": docs[i], "metadata": metas[i]}))
+                f.write("\n")
+
+        parts.append({
+            "records": len(ids),
+            "embeddings": npy_path.name,
+            "embeddings_sha256": file_sha256(npy_path),
+            "documents": jsonl_path.name,
+            "documents_sha256": file_sha256(jsonl_path),
+        })
+        total += len(ids)
+
+    manifest = {
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "collection_name": getattr(db._collection, "name", None),
+        "embedding_model": EMBED_MODEL,
+        "count": total,
+        "dimension": dim,
+        "dtype": "float32",
+        "page_size": page_size,
+        "parts": parts,
+    }
+    write_manifest(out_dir, manifest)
+
+    return {"exported": total, "parts": len(parts), "dir": str(out_dir)}
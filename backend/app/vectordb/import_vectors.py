@@ -0,0 +1,186 @@
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.exceptions import SnapshotError
+from app.llm.ollama_client import EMBED_MODEL
+from app.logger import get_logger
+from app.vectordb.chroma_client import (
+    get_chroma, new_shadow_name, promote_collection, resolve_collection, writer_lock
+)
+from app.config import COLLECTION_NAME
+from app.vectordb.export_vectors import (
+    EXPORT_FORMAT, EXPORT_FORMAT_VERSION, MANIFEST_NAME, file_sha256
+)
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / "data" / "vector_snapshot"
+
+log = get_logger(__name__)
+
+
+def read_manifest(snapshot_dir: Path) -> Dict:
+    path = Path(snapshot_dir) / MANIFEST_NAME
+    if not path.exists():
+        raise SnapshotError(f"No snapshot manifest at {path}")
+
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        raise SnapshotError(f"Unreadable snapshot manifest {path}. Reason: {e}")
+
+    if manifest.get("format") != EXPORT_FORMAT or manifest.get("version") != EXPORT_FORMAT_VERSION:
+        raise SnapshotError(
+            f"Unsupported snapshot format {manifest.get('format')} v{manifest.get('version')}"
+        )
+    return manifest
+
+
+def check_compatible(manifest: Dict, embed_model: str = None):
+    """
+    Vectors are only usable if they were produced by the same embedding model
+    that will embed queries against them.
+    """
+    embed_model = embed_model or EMBED_MODEL
+    snap_model = manifest.get("embedding_model")
+    if snap_model != embed_model:
+        raise SnapshotError(
+            f"Snapshot embedded with '{snap_model}', current embedding model is '{embed_model}'"
+        )
+
+
+def find_compatible_snapshot(snapshot_dir: Path = None) -> Optional[Dict]:
+    """
+    Return the manifest of a restorable snapshot, or None if there is none.
+    """
+    snapshot_dir = Path(snapshot_dir or SNAPSHOT_DIR)
+    try:
+        manifest = read_manifest(snapshot_dir)
+        check_compatible(manifest)
+    except SnapshotError as e:
+        log.info(f"No usable vector snapshot: {e}")
+        return None
+    return manifest
+
+
+def _iter_part_records(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def validate_snapshot(snapshot_dir: Path, manifest: Dict, verify_checksums: bool = True) -> int:
+    """
+    Check every part before anything is written: files present, sha256,
+    .npy row count and embedding dimension. Returns the total record count.
+    """
+    dimension = manifest.get("dimension")
+    total = 0
+
+    for part in manifest.get("parts", []):
+        npy_path = snapshot_dir / part["embeddings"]
+        jsonl_path = snapshot_dir / part["documents"]
+
+        for path, expected in ((npy_path, part["embeddings_sha256"]), (jsonl_path, part["documents_sha256"])):
+            if not path.exists():
+                raise SnapshotError(f"Missing snapshot file {path.name}")
+            if verify_checksums and file_sha256(path) != expected:
+                raise SnapshotError(f"Checksum mismatch for snapshot file {path.name}")
+
+        try:
+            vectors = np.load(npy_path, mmap_mode="r", allow_pickle=False)
+        except Exception as e:
+            raise SnapshotError(f"Unreadable snapshot file {npy_path.name}. Reason: {e}")
+        if vectors.ndim != 2 or vectors.shape[0] != part["records"]:
+            raise SnapshotError(f"{npy_path.name} has shape {vectors.shape}, expected {part['records']} rows")
+        if dimension is None:
+            dimension = vectors.shape[1]
+        elif vectors.shape[1] != dimension:
+            raise SnapshotError(f"{npy_path.name} has dimension {vectors.shape[1]}, expected {dimension}")
+        total += part["records"]
+
+    return total
+
+
+def import_vectors_snapshot(snapshot_dir: Path = None, batch_size: int = 1000,
+                            verify_checksums: bool = True, alias: str = COLLECTION_NAME) -> Dict:
+    """
+    Bulk-load a snapshot written by export_vectors_chunked, without calling
+    the embedding model.
+
+    The whole snapshot is validated first, then loaded into a shadow
+    collection that is promoted to `alias` only once complete; on any failure
+    the shadow is dropped and the live collection is untouched. Parts are
+    memory-mapped and upserted `batch_size` records at a time, so memory
+    stays bounded by one batch.
+    """
+    snapshot_dir = Path(snapshot_dir or SNAPSHOT_DIR)
+    manifest = read_manifest(snapshot_dir)
+    check_compatible(manifest)
+    expected = validate_snapshot(snapshot_dir, manifest, verify_checksums)
+
+    with writer_lock():
+        live_name = resolve_collection(alias)
+        shadow_name = new_shadow_name(alias)
+        db = get_chroma(collection_name=shadow_name)
+
+        try:
+            imported = _load_parts(db, snapshot_dir, manifest, batch_size)
+            if imported != expected or db._collection.count() != expected:
+                raise SnapshotError(f"Restored {db._collection.count()} records, expected {expected}")
+        except Exception as e:
+            try:
+                db.delete_collection()
+            except Exception:
+                log.warning(f"Could not drop incomplete shadow collection {shadow_name}", exc_info=True)
+            if isinstance(e, SnapshotError):
+                raise
+            raise SnapshotError(f"Restoring snapshot into {shadow_name} failed. Reason: {e}")
+
+        retired = promote_collection(shadow_name, alias)
+        if retired:
+            try:
+                get_chroma(collection_name=retired).delete_collection()
+            except Exception:
+                log.warning(f"Could not drop retired collection {retired}", exc_info=True)
+
+    return {
+        "message": "Restored vector snapshot",
+        "records_imported": imported,
+        "collection_count": db._collection.count(),
+        "embedding_model": manifest.get("embedding_model"),
+        "collection": shadow_name,
+        "previous_collection": live_name,
+    }
+
+
+def _load_parts(db, snapshot_dir: Path, manifest: Dict, batch_size: int) -> int:
+    imported = 0
+    for part in manifest.get("parts", []):
+        jsonl_path = snapshot_dir / part["documents"]
+        vectors = np.load(snapshot_dir / part["embeddings"], mmap_mode="r", allow_pickle=False)
+
+        records = _iter_part_records(jsonl_path)
+        start = 0
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            if start + len(batch) > part["records"]:
+                raise SnapshotError(f"{jsonl_path.name} has more than {part['records']} records")
+
+            db._collection.upsert(
+                ids=[r["id"] for r in batch],
+                embeddings=np.asarray(vectors[start:start + len(batch)]),
+                documents=[r["document"] for r in batch],
+                metadatas=[r["metadata"] for r in batch],
+            )
+            start += len(batch)
+
+        if start != part["records"]:
+            raise SnapshotError(f"{jsonl_path.name} has {start} records, expected {part['records']}")
+        imported += start
+    return imported
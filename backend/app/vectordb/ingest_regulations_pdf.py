@@ -2,17 +2,47 @@ from pathlib import Path
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from app.vectordb.chroma_client import get_chroma
+from app.vectordb.chroma_client import (
+    get_chroma, resolve_collection, new_shadow_name, promote_collection,
+    normalize_framework, framework_alias, writer_lock
+)
+from app.vectordb.export_vectors import iter_collection_pages
 from app.services.file_parser import read_pdf
+from app.exceptions import VectorDBError
+from app.logger import get_logger
 
-def ingest_regulations_pdf(pdf_path: str, reset: bool = False, max_chunks: int = 300, batch_size: int = 50):
-    db = get_chroma()
+log = get_logger(__name__)
 
-    if reset:
-        try:
-            db._collection.delete(where={})
-        except Exception:
-            pass
+
+def copy_collection(source, target, page_size: int = 500) -> int:
+    """
+    Copy stored vectors between collections without re-embedding.
+    """
+    copied = 0
+    for page in iter_collection_pages(source._collection, page_size=page_size):
+        target._collection.add(
+            ids=page["ids"],
+            embeddings=page["embeddings"],
+            documents=page["documents"],
+            metadatas=page["metadatas"],
+        )
+        copied += len(page["ids"])
+    return copied
+
+
+def ingest_regulations_pdf(pdf_path: str, reset: bool = False, max_chunks: int = 300, batch_size: int = 50,
+                           framework: str = None):
+    """
+    Blue/green ingest: build a shadow collection (a copy of the live one
+    unless reset=True, plus the new chunks), then atomically promote it.
+    Queries keep hitting the complete live collection until the switch; the
+    replaced collection is kept for rollback_collection().
+
+    framework: regulation set (gdpr, soc2, ...) to ingest into; each one is a
+    separate partition so compliance checks only search what they select.
+    """
+    framework = normalize_framework(framework)
+    alias = framework_alias(framework)
 
     path = Path(pdf_path)
     if not path.exists():
@@ -27,16 +57,42 @@ def ingest_regulations_pdf(pdf_path: str, reset: bool = False, max_chunks: int =
         chunks = chunks[:max_chunks]
 
     docs = [
-        Document(page_content=c, metadata={"source": path.name, "chunk_id": i})
+        Document(page_content=c, metadata={"source": path.name, "chunk_id": i, "framework": framework})
         for i, c in enumerate(chunks) if c.strip()
     ]
 
-    for i in range(0, len(docs), batch_size):
-        db.add_documents(docs[i:i+batch_size])
+    # one writer at a time, also across worker processes; queries keep using the live alias
+    with writer_lock():
+        live_name = resolve_collection(alias)
+        shadow_name = new_shadow_name(alias)
+        db = get_chroma(collection_name=shadow_name)
+
+        try:
+            if not reset:
+                copy_collection(get_chroma(collection_name=live_name), db)
+
+            for i in range(0, len(docs), batch_size):
+                db.add_documents(docs[i:i+batch_size])
+        except Exception as e:
+            try:
+                db.delete_collection()
+            except Exception:
+                log.warning(f"Could not drop incomplete shadow collection {shadow_name}", exc_info=True)
+            raise VectorDBError(f"Ingest into {shadow_name} failed, live collection unchanged. Reason: {e}")
+
+        retired = promote_collection(shadow_name, alias)
+        if retired:
+            try:
+                get_chroma(collection_name=retired).delete_collection()
+            except Exception:
+                log.warning(f"Could not drop retired collection {retired}", exc_info=True)
 
     return {
         "message": "Embedded regulations",
         "chunks_ingested": len(docs),
         "collection_count": db._collection.count(),
-        "source": path.name
+        "source": path.name,
+        "framework": framework,
+        "collection": shadow_name,
+        "previous_collection": live_name
     }
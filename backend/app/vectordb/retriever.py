@@ -1,14 +1,36 @@
+from typing import Sequence
+
 from app.vectordb.chroma_client import get_chroma
 
-def get_similar_rules(query: str, top_k: int = 2, max_chars: int = 350):
-    db = get_chroma()
+
+def _clean(text: str, max_chars: int) -> str:
+    text = (text or "").strip().replace("\n", " ")
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return text
+
+
+def get_similar_rules(query: str, top_k: int = 2, max_chars: int = 350, collection_name: str = None):
+    db = get_chroma(collection_name=collection_name)
     docs = db.similarity_search(query, k=top_k)
 
-    cleaned = []
-    for d in docs:
-        text = (d.page_content or "").strip().replace("\n", " ")
-        if len(text) > max_chars:
-            text = text[:max_chars] + "..."
-        cleaned.append(text)
+    return [_clean(d.page_content, max_chars) for d in docs]
+
+
+def get_similar_rules_multi(query: str, collection_names: Sequence[str], top_k: int = 2, max_chars: int = 350):
+    """
+    Search several framework partitions and keep the overall top_k by distance.
+    The query is embedded once and reused for every partition.
+    """
+    if len(collection_names) == 1:
+        return get_similar_rules(query, top_k=top_k, max_chars=max_chars, collection_name=collection_names[0])
+
+    dbs = [get_chroma(collection_name=name) for name in collection_names]
+    vector = dbs[0].embeddings.embed_query(query)
+
+    scored = []
+    for db in dbs:
+        scored.extend(db.similarity_search_by_vector_with_relevance_scores(vector, k=top_k))
 
-    return cleaned
+    scored.sort(key=lambda pair: pair[1])  # chroma returns distances: lower is closer
+    return [_clean(d.page_content, max_chars) for d, _ in scored[:top_k]]
@@ -0,0 +1,109 @@
+"""
+Payload size and serialization time of full compliance reports.
+
+    cd backend && python -m benchmarks.bench_report_payload
+
+Compares the old response path (FastAPI's jsonable_encoder + json.dumps)
+with FastJSONResponse (orjson, no encoder pass), and the wire size / cost
+of gzip and brotli for 100- and 500-clause reports.
+"""
+import gzip
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.middlewares import GZIP_LEVEL, BROTLI_QUALITY, brotli
+from app.responses import FastJSONResponse
+from app.services.report_builder import build_summary
+
+SIZES = (100, 500)
+REPEAT = 20
+
+
+def sample_result(i: int) -> dict:
+    """One clause result shaped like make_result() output, with realistic text lengths."""
+    return {
+        "clause": f"{i}. The Supplier shall process personal data only on documented instructions from the "
+                  f"Customer, including with regard to transfers of personal data to a third country. " * 2,
+        "matched_rules": [
+            "Article 28(3): Processing by a processor shall be governed by a contract that sets out the "
+            "subject-matter and duration of the processing, the nature and purpose of the processing...",
+            "Article 32(1): Taking into account the state of the art, the costs of implementation and the "
+            "nature, scope, context and purposes of processing, the controller and the processor shall...",
+        ],
+        "status": ("COMPLIANT", "NEEDS_REVIEW", "NON_COMPLIANT")[i % 3],
+        "risk_level": ("LOW", "MEDIUM", "HIGH")[i % 3],
+        "rule_mapping": [{
+            "rule_excerpt": "Article 28(3): Processing by a processor shall be governed by a contract...",
+            "relevance": "The clause defines the processor's obligations but omits the audit and "
+                         "assistance duties the article requires.",
+            "violation": i % 3 == 2,
+        }],
+        "reason": "The clause restricts processing to documented instructions, which matches Article 28(3)(a), "
+                  "but it does not oblige the Supplier to make available all information necessary to "
+                  "demonstrate compliance or to allow for and contribute to audits. " * 2,
+        "risk_impact": "Without audit rights the Customer cannot demonstrate accountability to a supervisory "
+                       "authority, exposing it to fines and contract disputes.",
+        "rectification_steps": [
+            "Add an audit and inspection right for the Customer or a mandated auditor.",
+            "Require the Supplier to assist with data subject requests and DPIAs.",
+            "Define a notification period for sub-processor changes.",
+        ],
+        "recommended_contract_changes": [
+            "Insert: 'The Supplier shall make available to the Customer all information necessary to "
+            "demonstrate compliance with the obligations laid down in Article 28 GDPR.'",
+        ],
+        "rewritten_clause": "The Supplier shall process Personal Data only on documented instructions from the "
+                            "Customer, shall make available all information necessary to demonstrate "
+                            "compliance, and shall allow for and contribute to audits, including inspections, "
+                            "conducted by the Customer or another auditor mandated by the Customer.",
+    }
+
+
+def _vary(value, rng: random.Random):
+    """Shuffle the words of every string so clauses don't repeat verbatim (keeps compression honest)."""
+    if isinstance(value, str):
+        words = value.split()
+        rng.shuffle(words)
+        return " ".join(words)
+    if isinstance(value, list):
+        return [_vary(v, rng) for v in value]
+    if isinstance(value, dict):
+        return {k: v if k in ("status", "risk_level", "violation") else _vary(v, rng) for k, v in value.items()}
+    return value
+
+
+def sample_report(clauses: int) -> dict:
+    rng = random.Random(42)
+    results = [_vary(sample_result(i), rng) for i in range(clauses)]
+    return {"report_id": "0" * 32, "summary": build_summary(results), "results": results}
+
+
+def timed(fn, repeat: int = REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - start) / repeat * 1000
+
+
+def run():
+    print(f"{'clauses':>7} | {'encoder+json ms':>15} | {'orjson ms':>9} | {'raw KB':>7} | "
+          f"{'gzip KB':>7} | {'gzip ms':>7} | {'br KB':>6} | {'br ms':>6}")
+    for n in SIZES:
+        report = sample_report(n)
+        _, old_ms = timed(lambda: json.dumps(jsonable_encoder(report)).encode("utf-8"))
+        body, new_ms = timed(lambda: FastJSONResponse(report).body)
+        gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL))
+        if brotli is not None:
+            br, br_ms = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY))
+            br_kb, br_ms = f"{len(br) / 1024:6.1f}", f"{br_ms:6.2f}"
+        else:
+            br_kb = br_ms = "   n/a"
+        print(f"{n:>7} | {old_ms:>15.2f} | {new_ms:>9.2f} | {len(body) / 1024:>7.1f} | "
+              f"{len(gz) / 1024:>7.1f} | {gz_ms:>7.2f} | {br_kb} | {br_ms}")
+
+
+if __name__ == "__main__":
+    run()
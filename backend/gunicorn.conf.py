@@ -0,0 +1,55 @@
+"""
+Multi-worker deployment on one node (Linux):
+
+    cd backend
+    pip install gunicorn uvicorn-worker
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Each worker is a full app process. They share:
+- the vector store: one writer at a time (startup ingest, /regulations/ingest,
+  rollback) via the flock writer lock in CHROMA_PERSIST_DIR; the first worker
+  to start fills an empty store, the others wait and skip. Set
+  CHROMA_SERVER_HOST to have workers query a `chroma run` sidecar instead of
+  each opening the persist dir.
+- retrieval results (RULE_CACHE_SHARED, SQLite), reports and the near-duplicate
+  index (SQLite, WAL).
+
+Ollama is shared too, so LLM_MAX_IN_FLIGHT_TOTAL generations are split
+across the workers: each gets LLM_MAX_IN_FLIGHT = total // workers, but at
+least 1, so with more workers than the total up to `workers` generations run
+at once (a warning is logged at startup; lower WEB_CONCURRENCY or raise the
+total). /metrics reports the worker that served the request.
+
+`uvicorn --workers N` does not read this file: set LLM_MAX_IN_FLIGHT and
+RULE_CACHE_SHARED=true in its environment yourself.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# above REQUEST_DEADLINE_S (570): the app answers with a partial report before gunicorn kills the worker
+timeout = 600
+graceful_timeout = 30
+keepalive = 5
+
+# no preload: every worker imports the app (and starts its threads) after the fork
+preload_app = False
+
+_llm_total = int(os.getenv("LLM_MAX_IN_FLIGHT_TOTAL", "2"))
+_worker_env = {
+    "LLM_MAX_IN_FLIGHT": str(max(1, _llm_total // workers)),  # min 1: a worker without a slot can't answer
+    "RULE_CACHE_SHARED": "true",
+}
+# explicit settings win
+raw_env = [f"{k}={v}" for k, v in _worker_env.items() if k not in os.environ]
+
+
+def on_starting(server):
+    if workers > _llm_total and "LLM_MAX_IN_FLIGHT" not in os.environ:
+        server.log.warning(
+            f"{workers} workers > LLM_MAX_IN_FLIGHT_TOTAL={_llm_total}: each worker keeps 1 generation slot, "
+            f"so up to {workers} run on Ollama at once"
+        )
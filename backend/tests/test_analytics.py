@@ -0,0 +1,76 @@
+from app.services.report_store import ReportStore
+from app.services.analytics import violated_rules
+
+
+def _report(statuses, overall_risk, violated=None):
+    return {
+        "summary": {"overall_risk": overall_risk, "total_clauses": len(statuses)},
+        "results": [
+            {
+                "clause": f"clause {n}", "status": s, "risk_level": "HIGH",
+                "matched_rules": ["Retention rule"],
+                "rule_mapping": [{"rule_excerpt": violated, "violation": True}] if violated and s != "COMPLIANT" else [],
+            }
+            for n, s in enumerate(statuses)
+        ],
+    }
+
+
+def test_violated_rules_prefers_rule_mapping():
+    assert violated_rules({"status": "NON_COMPLIANT", "matched_rules": ["a"],
+                           "rule_mapping": [{"rule_excerpt": "b", "violation": True},
+                                            {"rule_excerpt": "c", "violation": False}]}) == ["b"]
+    assert violated_rules({"status": "NON_COMPLIANT", "matched_rules": ["a"]}) == ["a"]
+    assert violated_rules({"status": "COMPLIANT", "matched_rules": ["a"]}) == []
+
+
+def test_rollups_are_updated_per_report(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    store.save(_report(["NON_COMPLIANT", "COMPLIANT"], "HIGH", "Breach within 72h"), "a.pdf", vendor="acme")
+    store.save(_report(["NON_COMPLIANT", "NON_COMPLIANT"], "HIGH", "Breach within 72h"), "b.pdf", vendor="acme")
+    store.save(_report(["COMPLIANT", "NEEDS_REVIEW"], "MEDIUM"), "c.pdf", vendor="globex")
+    store.save(_report(["NON_COMPLIANT"], "HIGH"), "d.pdf")
+
+    out = store.analytics()
+    vendors = {v["vendor"]: v for v in out["vendors"]}
+    assert vendors["acme"]["reports"] == 2
+    assert vendors["acme"]["non_compliance_rate"] == 0.75
+    assert vendors["acme"]["high_risk_reports"] == 2
+    assert vendors["globex"]["non_compliance_rate"] == 0.0
+    assert vendors["unknown"]["clauses"] == 1
+
+    assert out["top_violated_rules"][0] == {
+        "rule": "Breach within 72h", "violations": 3, "last_seen": out["top_violated_rules"][0]["last_seen"]
+    }
+    assert out["top_violated_rules"][1]["rule"] == "Retention rule"
+
+    (today,) = out["risk_trend"]
+    assert today["reports"] == 4
+    assert today["overall_risk"] == {"HIGH": 3, "MEDIUM": 1, "LOW": 0}
+
+
+def test_rollups_are_backfilled_for_existing_reports(tmp_path):
+    path = str(tmp_path / "reports.sqlite3")
+    store = ReportStore(path)
+    store.save(_report(["NON_COMPLIANT"], "HIGH"), "a.pdf", vendor="acme")
+    store._conn.executescript("DELETE FROM rollup_vendor; DELETE FROM rollup_rule; DELETE FROM rollup_day;")
+
+    reopened = ReportStore(path)
+    assert reopened.analytics()["vendors"][0]["vendor"] == "acme"
+    assert reopened.analytics()["top_violated_rules"][0]["violations"] == 1
+
+
+def test_revision_counts_only_changed_clauses(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    store.save(_report(["NON_COMPLIANT", "COMPLIANT"], "HIGH", "Breach within 72h"), "v1.pdf", vendor="acme")
+
+    revision = _report(["NON_COMPLIANT", "NON_COMPLIANT"], "HIGH", "Breach within 72h")
+    revision["results"][0]["change"] = "unchanged"
+    revision["results"][1]["change"] = "modified"
+    store.save(revision, "v2.pdf", kind="revision", vendor="acme")
+
+    out = store.analytics()
+    (acme,) = out["vendors"]
+    assert acme["reports"] == 2
+    assert acme["clauses"] == 3
+    assert out["top_violated_rules"][0]["violations"] == 2
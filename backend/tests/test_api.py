@@ -7,3 +7,72 @@ def test_db_count_endpoint():
     r = client.get("/db/count")
     assert r.status_code == 200
     assert "count" in r.json()
+
+def test_reports_endpoints(monkeypatch, tmp_path):
+    from app.services import report_store
+
+    store = report_store.ReportStore(str(tmp_path / "reports.sqlite3"))
+    monkeypatch.setattr(report_store, "_store", store)
+    report_id = store.save({
+        "summary": {"total_clauses": 1, "compliant": 1, "needs_review": 0, "non_compliant": 0,
+                    "compliance_score": 100, "overall_risk": "LOW", "partial": False},
+        "results": [{"clause": "c", "status": "COMPLIANT", "risk_level": "LOW", "verdict_source": "triage"}],
+    }, "doc.pdf")
+
+    listing = client.get("/reports").json()
+    assert listing["reports"][0]["report_id"] == report_id
+
+    page = client.get(f"/reports/{report_id}", params={"status": "COMPLIANT"}).json()
+    assert page["total_results"] == 1
+    assert page["results"][0]["verdict_source"] == "triage"
+    # served through the ReportPage schema: None fields excluded
+    assert "vendor" not in page and "partial_reason" not in page["summary"]
+
+    assert client.get("/reports/missing").status_code == 404
+
+def test_admin_profiles_require_admin_token(monkeypatch):
+    from app import profiling
+
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "")
+    assert client.get("/admin/profiles/x", headers={"X-Admin-Token": ""}).status_code == 403
+
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    session = profiling.ProfileSession()
+    session.start()
+    session.stop()
+    profiling.save_profile(session)
+    r = client.get(f"/admin/profiles/{session.id}", headers={"X-Admin-Token": "secret"})
+    assert r.status_code == 200 and r.json()["profile_id"] == session.id
+    r = client.get(f"/admin/profiles/{session.id}", params={"format": "collapsed"}, headers={"X-Admin-Token": "secret"})
+    assert r.headers["content-disposition"].startswith("attachment")
+    assert client.get("/admin/profiles/missing", headers={"X-Admin-Token": "secret"}).status_code == 404
+
+def test_upload_response_goes_through_schema(monkeypatch, tmp_path):
+    from app import main
+    from app.services import compliance_service, file_parser, report_store
+
+    monkeypatch.setattr(main, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(report_store, "_store", report_store.ReportStore(str(tmp_path / "reports.sqlite3")))
+    monkeypatch.setattr(file_parser, "parse_uploaded_file", lambda path: "text")
+    monkeypatch.setattr(compliance_service, "check_compliance", lambda text, **kw: {
+        "summary": {"total_clauses": 1, "compliant": 1, "needs_review": 0, "non_compliant": 0,
+                    "compliance_score": 100, "overall_risk": "LOW", "partial": False, "partial_reason": None},
+        "results": [{"clause": "c", "status": "COMPLIANT", "risk_level": "LOW"}],
+    })
+
+    r = client.post("/compliance/upload", files={"file": ("a.pdf", b"%PDF", "application/pdf")})
+    body = r.json()
+    assert r.status_code == 200
+    assert "partial_reason" not in body["summary"]
+    assert body["results"][0]["rewritten_clause"] == ""  # schema defaults filled in
+    assert body["report_id"]
+
+def test_revision_rejects_malformed_prior_report(monkeypatch, tmp_path):
+    from app import main
+
+    monkeypatch.setattr(main, "UPLOAD_DIR", tmp_path)
+    r = client.post("/compliance/revision", files={
+        "file": ("v2.pdf", b"%PDF", "application/pdf"),
+        "prior_report": ("prior.json", b'[{"clause": "c"}]', "application/json"),
+    })
+    assert r.status_code == 400
@@ -0,0 +1,63 @@
+import json
+
+import docx
+
+from app import batch_cli
+from app.services import batch_service
+
+
+def _docx(path, paragraphs):
+    d = docx.Document()
+    for p in paragraphs:
+        d.add_paragraph(p)
+    d.save(str(path))
+
+
+def _fake_batch(calls):
+    def check(documents, top_k=2, frameworks=None, deadline=None):
+        calls.append([name for name, _ in documents])
+        return {"documents": [
+            {"document": name, "summary": {"total_clauses": len(clauses)},
+             "results": [{"clause": c, "status": "COMPLIANT"} for c in clauses]}
+            for name, clauses in documents
+        ]}
+    return check
+
+
+def test_load_checkpoint_truncates_torn_line_and_retries_errors(tmp_path):
+    out = tmp_path / "out.jsonl"
+    out.write_text(
+        json.dumps({"document": "a.pdf", "fingerprint": "1:1"}) + "\n"
+        + json.dumps({"document": "b.pdf", "fingerprint": "2:2", "error": "bad pdf"}) + "\n"
+        + '{"document": "c.pd'
+    )
+
+    assert batch_cli.load_checkpoint(out) == {"a.pdf": "1:1"}
+    assert out.read_text().endswith("}\n")
+
+
+def test_run_writes_jsonl_and_resumes(monkeypatch, tmp_path):
+    contracts = tmp_path / "contracts"
+    (contracts / "sub").mkdir(parents=True)
+    _docx(contracts / "a.docx", ["1. The supplier shall encrypt all personal data at rest and in transit using strong encryption."])
+    _docx(contracts / "sub" / "b.docx", ["1. The customer shall pay every invoice within thirty days of receipt by bank transfer."])
+    (contracts / "broken.pdf").write_bytes(b"not a pdf")
+    (contracts / "notes.txt").write_text("ignored")
+
+    calls = []
+    monkeypatch.setattr(batch_service, "check_clauses_batch", _fake_batch(calls))
+    out = tmp_path / "out.jsonl"
+
+    stats = batch_cli.run(str(contracts), str(out), chunk_size=1, workers=1, warm=False)
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+
+    assert stats["documents"] == 3 and stats["failed"] == 1
+    assert sorted(calls) == [["a.docx"], ["sub/b.docx"]]
+    by_doc = {r["document"]: r for r in records}
+    assert by_doc["a.docx"]["results"][0]["clause"].startswith("1. The supplier")
+    assert "error" in by_doc["broken.pdf"]
+
+    # second run: only the failed document is retried
+    calls.clear()
+    stats = batch_cli.run(str(contracts), str(out), workers=1, warm=False)
+    assert calls == [] and stats["skipped"] == 2 and stats["failed"] == 1
@@ -0,0 +1,161 @@
+import io
+import json
+import zipfile
+import pytest
+
+from app.services import batch_service, compliance_service
+
+
+def _fake_llm(calls):
+    class FakeLLM:
+        def invoke(self, prompt):
+            inputs = json.loads(prompt.split("INPUT:", 1)[1])
+            calls.append([i["clause_text"] for i in inputs])
+            resp = {"results": [
+                {"clause_number": i["clause_number"],
+                 "status": "NON_COMPLIANT" if "share" in i["clause_text"] else "COMPLIANT"}
+                for i in inputs
+            ]}
+
+            class R:
+                content = json.dumps(resp)
+            return R()
+    return FakeLLM()
+
+
+def test_check_compliance_batch_dedupes_across_documents(monkeypatch):
+    docs = {
+        "a.pdf": ["1. Provider shall encrypt data.", "2. Provider may share data freely."],
+        "b.pdf": ["1. Customer must pay  on time.", "7. Provider shall encrypt data."],
+    }
+    calls = []
+    retrieved = []
+
+    monkeypatch.setattr(batch_service, "split_into_clauses", lambda text: docs[text])
+    monkeypatch.setattr(batch_service, "resolve_collections", lambda frameworks=None: ("regulations",))
+    monkeypatch.setattr(batch_service, "get_llm", lambda: _fake_llm(calls))
+
+    def fake_retrieve(clauses, top_k, collections, deadline=None):
+        retrieved.extend(clauses)
+        return [["rule for " + c] for c in clauses]
+
+    monkeypatch.setattr(batch_service, "retrieve_rules", fake_retrieve)
+
+    out = batch_service.check_compliance_batch([("a.pdf", "a.pdf"), ("b.pdf", "b.pdf")])
+
+    assert out["summary"]["total_clauses"] == 4
+    assert out["summary"]["unique_clauses"] == 3
+    assert len(calls) == 1
+    assert len(retrieved) == 3
+
+    a, b = out["documents"]
+    assert [r["status"] for r in a["results"]] == ["COMPLIANT", "NON_COMPLIANT"]
+    assert a["summary"]["non_compliant"] == 1
+    # the shared clause keeps each document's own text
+    assert b["results"][1]["clause"] == "7. Provider shall encrypt data."
+    assert b["results"][1]["status"] == "COMPLIANT"
+    assert b["summary"]["total_clauses"] == 2
+
+
+def test_check_compliance_batch_chunks_llm_calls(monkeypatch):
+    clauses = [f"{i}. Provider shall keep record {i}." for i in range(1, 14)]
+    calls = []
+
+    monkeypatch.setattr(batch_service, "MAX_CLAUSES", 5)
+    monkeypatch.setattr(compliance_service, "MAX_CLAUSES", 5)
+    monkeypatch.setattr(batch_service, "split_into_clauses", lambda text: clauses[int(text):])
+    monkeypatch.setattr(batch_service, "resolve_collections", lambda frameworks=None: ("regulations",))
+    monkeypatch.setattr(batch_service, "get_llm", lambda: _fake_llm(calls))
+    monkeypatch.setattr(batch_service, "retrieve_rules", lambda c, top_k, collections, deadline=None: [[] for _ in c])
+
+    out = batch_service.check_compliance_batch([("a.pdf", "0"), ("b.pdf", "3"), ("c.pdf", "8")])
+
+    # a: 1-5, b: 4-8, c: 9-13 -> 13 unique clauses in calls of at most 5
+    assert [len(c) for c in calls] == [5, 5, 3]
+    assert out["summary"]["unique_clauses"] == 13
+    assert all(len(d["results"]) == 5 for d in out["documents"])
+
+
+def test_expand_upload_zip(tmp_path):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("contracts/a.pdf", b"pdf")
+        z.writestr("../evil.docx", b"docx")
+        z.writestr("notes.txt", b"skip")
+
+    paths = batch_service.expand_upload("batch.zip", buf.getvalue(), tmp_path / "out")
+
+    assert sorted(p.relative_to(tmp_path / "out").as_posix() for p in paths) == ["contracts/a.pdf", "evil.docx"]
+
+
+def test_expand_upload_keeps_same_named_documents(tmp_path):
+    from app.exceptions import FileParseError
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("vendorA/contract.pdf", b"A")
+        z.writestr("vendorB/contract.pdf", b"B")
+    out = tmp_path / "out"
+
+    paths = batch_service.expand_upload("batch.zip", buf.getvalue(), out)
+    paths += batch_service.expand_upload("contract.pdf", b"C", out)
+    paths += batch_service.expand_upload("contract.pdf", b"D", out)
+
+    assert [p.read_bytes() for p in paths] == [b"A", b"B", b"C", b"D"]
+    names = [name for name, _, _ in batch_service.parse_documents(paths, root=out)]
+    assert names[:3] == ["vendorA/contract.pdf", "vendorB/contract.pdf", "contract.pdf"]
+    assert names[3].endswith("_contract.pdf")
+
+    with pytest.raises(FileParseError):
+        batch_service.expand_upload("", b"x", out)
+
+
+def test_parse_documents_reports_failures(tmp_path):
+    good = tmp_path / "x.txt"
+    good.write_text("hello")
+
+    out = batch_service.parse_documents([good])
+
+    assert out[0][0] == "x.txt"
+    assert "Unsupported" in out[0][2]
+
+
+def test_parse_documents_skips_after_deadline(tmp_path):
+    from app.deadline import Deadline
+
+    doc = tmp_path / "x.pdf"
+    doc.write_bytes(b"not parsed")
+    deadline = Deadline(60)
+    deadline.cancel()
+
+    out = batch_service.parse_documents([doc], deadline=deadline)
+
+    assert out == [("x.pdf", "", "Not parsed: request deadline expired (client_disconnected)")]
+
+
+def test_expand_upload_skips_entries_without_a_name(tmp_path):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("contracts/", b"")
+        z.writestr(zipfile.ZipInfo("empty/"), b"")
+        z.writestr("a.pdf", b"pdf")
+
+    paths = batch_service.expand_upload("batch.zip", buf.getvalue(), tmp_path / "out")
+
+    assert [p.name for p in paths] == ["a.pdf"]
+
+
+def test_expand_upload_rejects_zip_bombs(tmp_path):
+    from app.exceptions import FileParseError
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for n in range(3):
+            z.writestr(f"{n}.pdf", b"0" * 1000)
+    data = buf.getvalue()
+
+    with pytest.raises(FileParseError, match="too many entries"):
+        batch_service.expand_upload("batch.zip", data, tmp_path / "a", max_entries=2)
+    with pytest.raises(FileParseError, match="expands to more than"):
+        batch_service.expand_upload("batch.zip", data, tmp_path / "b", max_bytes=2500)
+    assert len(batch_service.expand_upload("batch.zip", data, tmp_path / "c", max_bytes=3000)) == 3
@@ -0,0 +1,68 @@
+import pytest
+
+from app.exceptions import VectorDBError
+from app.vectordb import chroma_client
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(chroma_client, "PERSIST_DIR", str(tmp_path))
+
+
+def test_framework_alias_naming():
+    assert chroma_client.framework_alias(None) == chroma_client.COLLECTION_NAME
+    assert chroma_client.framework_alias("GDPR") == f"{chroma_client.COLLECTION_NAME}-gdpr"
+
+    with pytest.raises(VectorDBError):
+        chroma_client.normalize_framework("../etc")
+
+
+def test_resolve_collections_pins_active_partitions():
+    chroma_client.promote_collection("regulations-gdpr__v1", chroma_client.framework_alias("gdpr"))
+    chroma_client.promote_collection("regulations-soc2__v1", chroma_client.framework_alias("soc2"))
+
+    assert chroma_client.list_frameworks() == ["default", "gdpr", "soc2"]
+    assert chroma_client.resolve_collections(["soc2", "gdpr", "gdpr"]) == (
+        "regulations-gdpr__v1", "regulations-soc2__v1"
+    )
+    # legacy default collection is served under its own name until first promoted
+    assert chroma_client.resolve_collections() == (chroma_client.COLLECTION_NAME,)
+
+
+def test_resolve_collections_rejects_unknown_framework():
+    with pytest.raises(VectorDBError):
+        chroma_client.resolve_collections(["hipaa"])
+
+
+def _try_lock(path, result):
+    import fcntl
+
+    with open(path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            result.value = 1
+        except OSError:
+            result.value = 0
+
+
+def test_writer_lock_is_reentrant_and_excludes_other_processes(tmp_path):
+    import multiprocessing
+
+    if chroma_client.fcntl is None:
+        pytest.skip("flock not available")
+
+    context = multiprocessing.get_context("spawn")
+    lock_path = str(tmp_path / chroma_client.WRITER_LOCK_FILE)
+
+    def other_process_gets_lock():
+        result = context.Value("i", -1)
+        p = context.Process(target=_try_lock, args=(lock_path, result))
+        p.start()
+        p.join()
+        return result.value == 1
+
+    with chroma_client.writer_lock():
+        with chroma_client.writer_lock():  # promote_collection inside an ingest
+            assert not other_process_gets_lock()
+        assert not other_process_gets_lock()
+    assert other_process_gets_lock()
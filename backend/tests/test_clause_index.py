@@ -0,0 +1,105 @@
+from app.services import clause_index
+from app.services.clause_index import ClauseIndex, minhash, similarity, rules_fingerprint
+
+BASE = ("4. Acme Corp shall notify the Customer of any personal data breach without undue delay "
+        "and in any event within 72 hours after becoming aware of it, and shall provide all "
+        "information reasonably required to meet regulatory reporting obligations.")
+VARIANT = BASE.replace("Acme Corp", "Globex Inc").replace("4.", "7.")
+OTHER = ("9. The Customer may terminate this agreement for convenience on ninety days written "
+         "notice, and all fees paid in advance shall be refunded on a pro rata basis.")
+
+
+def test_minhash_similarity_tracks_wording():
+    assert similarity(minhash(BASE), minhash(BASE)) == 1.0
+    assert similarity(minhash(BASE), minhash(VARIANT)) > 0.8
+    assert similarity(minhash(BASE), minhash(OTHER)) < 0.2
+
+
+def test_lookup_reuses_near_duplicate_with_same_rules(tmp_path):
+    index = ClauseIndex(str(tmp_path / "idx.sqlite3"), threshold=0.8)
+    rules = rules_fingerprint(["Breaches must be reported within 72 hours."])
+    index.add(BASE, "llama3", rules, {"status": "COMPLIANT"})
+    index.add(OTHER, "llama3", rules, {"status": "NON_COMPLIANT"})
+
+    hit = index.lookup(VARIANT, "llama3", rules)
+    assert hit["verdict"] == {"status": "COMPLIANT"}
+    assert 0.8 <= hit["similarity"] < 1.0
+    assert hit["clause"] == BASE
+
+    # different retrieved rules or model -> no reuse
+    assert index.lookup(VARIANT, "llama3", rules_fingerprint(["other rule"])) is None
+    assert index.lookup(VARIANT, "phi3", rules) is None
+
+    # below threshold -> no reuse
+    strict = ClauseIndex(str(tmp_path / "idx.sqlite3"), threshold=0.99)
+    assert strict.lookup(VARIANT, "llama3", rules) is None
+    assert index.count() == 2
+
+
+def test_evaluate_all_reuses_index_and_skips_llm(monkeypatch, tmp_path):
+    import json
+    from app.services import compliance_service
+
+    index = ClauseIndex(str(tmp_path / "idx.sqlite3"), threshold=0.8)
+    monkeypatch.setattr(compliance_service, "get_clause_index", lambda: index)
+    prompts = []
+
+    class FakeLLM:
+        def invoke(self, prompt):
+            prompts.append(prompt)
+
+            class R:
+                content = json.dumps({"results": [{"clause_number": 1, "status": "NON_COMPLIANT"}]})
+            return R()
+
+    rules = [["rule"]]
+    first, _ = compliance_service.evaluate_all(FakeLLM(), [BASE], rules, near_dup=True)
+    second, _ = compliance_service.evaluate_all(FakeLLM(), [VARIANT], rules, near_dup=True)
+
+    assert len(prompts) == 1
+    assert first[0]["status"] == second[0]["status"] == "NON_COMPLIANT"
+    assert second[0]["verdict_source"] == "near_duplicate"
+
+    result = compliance_service.make_result(VARIANT, ["rule"], second[0])
+    assert result["reused_from"] == BASE
+
+
+def test_add_skips_identical_clause(tmp_path):
+    index = ClauseIndex(str(tmp_path / "idx.sqlite3"), threshold=0.8)
+    rules = rules_fingerprint(["rule"])
+
+    assert index.add(BASE, "llama3", rules, {"status": "COMPLIANT"}) is True
+    assert index.add(BASE, "llama3", rules, {"status": "COMPLIANT"}) is False
+    assert index.add(VARIANT, "llama3", rules, {"status": "COMPLIANT"}) is True
+    assert index.count() == 2
+
+
+def test_reused_verdict_drops_clause_specific_text(monkeypatch, tmp_path):
+    import json
+    from app.services import compliance_service
+
+    index = ClauseIndex(str(tmp_path / "idx.sqlite3"), threshold=0.8)
+    monkeypatch.setattr(compliance_service, "get_clause_index", lambda: index)
+    verdict = {
+        "clause_number": 1, "status": "NON_COMPLIANT", "risk_level": "HIGH",
+        "rule_mapping": [{"rule_excerpt": "72 hours", "relevance": "Acme Corp notifies late", "violation": True}],
+        "reason": "Acme Corp does not commit to 72 hours",
+        "rewritten_clause": "Acme Corp shall notify the Customer within 72 hours.",
+        "recommended_contract_changes": ["Acme Corp must ..."],
+    }
+
+    class FakeLLM:
+        def invoke(self, prompt):
+            class R:
+                content = json.dumps({"results": [verdict]})
+            return R()
+
+    compliance_service.evaluate_all(FakeLLM(), [BASE], [["rule"]], near_dup=True)
+    found, _ = compliance_service.evaluate_all(FakeLLM(), [VARIANT], [["rule"]], near_dup=True)
+    result = compliance_service.make_result(VARIANT, ["rule"], found[0])
+
+    assert result["status"] == "NON_COMPLIANT" and result["risk_level"] == "HIGH"
+    assert result["rule_mapping"] == [{"rule_excerpt": "72 hours", "violation": True}]
+    assert result["rewritten_clause"] == "" and result["recommended_contract_changes"] == []
+    assert "Acme" not in json.dumps(result["reason"])
+    assert result["verdict_source"] == "near_duplicate"
@@ -30,7 +30,8 @@ def test_extract_json_trailing_commas_fix():
 
 # ---------------- cached_rules tests ----------------
 def test_cached_rules_uses_tuple(monkeypatch):
-    monkeypatch.setattr(compliance_service, "get_similar_rules", lambda clause, top_k=2: ["r1", "r2"])
+    monkeypatch.setattr(compliance_service, "get_similar_rules",
+                        lambda clause, top_k=2, collection_name=None: ["r1", "r2"])
     compliance_service.cached_rules.cache_clear()
 
     out = compliance_service.cached_rules("c1", 2)
@@ -44,13 +45,15 @@ def test_check_compliance_success(monkeypatch):
     Test the compliance pipeline without calling Ollama or Chroma.
     """
 
+    monkeypatch.setattr(compliance_service, "resolve_collections", lambda frameworks=None: ("regulations",))
+
     # Mock clause splitter (2 clauses)
     monkeypatch.setattr(compliance_service, "split_into_clauses",
                         lambda text: ["1. clause one", "2. clause two"])
 
     # Mock cached_rules
     monkeypatch.setattr(compliance_service, "cached_rules",
-                        lambda clause, top_k: ("ruleA", "ruleB"))
+                        lambda clause, top_k, collection_name=None: ("ruleA", "ruleB"))
 
     # Fake LLM returning JSON string
     class FakeLLM:
@@ -110,11 +113,12 @@ def test_check_compliance_fallback_when_model_returns_gibberish(monkeypatch):
     If LLM output isn't parsable JSON, function should return fallback response with raw output.
     """
 
+    monkeypatch.setattr(compliance_service, "resolve_collections", lambda frameworks=None: ("regulations",))
     monkeypatch.setattr(compliance_service, "split_into_clauses",
                         lambda text: ["1. clause one"])
 
     monkeypatch.setattr(compliance_service, "cached_rules",
-                        lambda clause, top_k: ("ruleA",))
+                        lambda clause, top_k, collection_name=None: ("ruleA",))
 
     class FakeLLM:
         def invoke(self, prompt):
@@ -130,3 +134,194 @@ def test_check_compliance_fallback_when_model_returns_gibberish(monkeypatch):
     assert len(out["results"]) == 1
     assert out["results"][0]["status"] == "NEEDS_REVIEW"
     assert "raw_model_output" in out["results"][0]
+
+
+# ---------------- cascade tests ----------------
+def _json_llm(make_items, prompts):
+    class FakeLLM:
+        def invoke(self, prompt):
+            prompts.append(prompt)
+            inputs = json.loads(prompt.split("INPUT:", 1)[1])
+
+            class R:
+                content = json.dumps({"results": [make_items(i) for i in inputs]})
+            return R()
+    return FakeLLM()
+
+
+def test_cascade_escalates_only_uncertain_or_non_compliant(monkeypatch):
+    from app import metrics
+    metrics.reset()
+
+    clauses = ["benign clause", "risky clause", "unclear clause"]
+    triage_verdicts = {
+        "benign clause": ("COMPLIANT", 0.97),
+        "risky clause": ("NON_COMPLIANT", 0.9),
+        "unclear clause": ("COMPLIANT", 0.4),
+    }
+    triage_prompts, full_prompts = [], []
+
+    triage_llm = _json_llm(lambda i: {
+        "clause_number": i["clause_number"],
+        "status": triage_verdicts[i["clause_text"]][0],
+        "confidence": triage_verdicts[i["clause_text"]][1],
+    }, triage_prompts)
+    full_llm = _json_llm(lambda i: {
+        "clause_number": i["clause_number"], "status": "NON_COMPLIANT", "rewritten_clause": "fixed"
+    }, full_prompts)
+
+    monkeypatch.setattr(compliance_service, "get_triage_llm", lambda: triage_llm)
+    monkeypatch.setattr(compliance_service, "CASCADE_AUDIT_RATE", 0.0)
+
+    verdicts, _ = compliance_service.evaluate_all(full_llm, clauses, [["r"]] * 3, near_dup=False, cascade=True)
+
+    assert len(triage_prompts) == 1 and len(full_prompts) == 1
+    escalated = [i["clause_text"] for i in json.loads(full_prompts[0].split("INPUT:", 1)[1])]
+    assert escalated == ["risky clause", "unclear clause"]
+
+    assert verdicts[0]["verdict_source"] == "triage"
+    assert verdicts[0]["status"] == "COMPLIANT"
+    assert verdicts[1]["rewritten_clause"] == "fixed"
+
+    snap = metrics.snapshot()
+    assert snap["ratios"]["cascade_escalation_rate"] == round(2 / 3, 4)
+    # risky: tiers agree, unclear: they don't
+    assert snap["ratios"]["cascade_agreement_rate"] == 0.5
+    metrics.reset()
+
+
+def test_cascade_escalates_everything_when_triage_fails(monkeypatch):
+    class BrokenLLM:
+        def invoke(self, prompt):
+            raise RuntimeError("model not pulled")
+
+    full_prompts = []
+    full_llm = _json_llm(lambda i: {"clause_number": i["clause_number"], "status": "COMPLIANT"}, full_prompts)
+    monkeypatch.setattr(compliance_service, "get_triage_llm", lambda: BrokenLLM())
+
+    verdicts, _ = compliance_service.evaluate_all(full_llm, ["a", "b"], [[], []], near_dup=False, cascade=True)
+
+    assert len(full_prompts) == 1
+    assert sorted(verdicts) == [0, 1]
+
+
+# ---------------- deadline tests ----------------
+class _DeadlineLLM:
+    """Answers its chunk until call number `expire_on`, during which the deadline passes."""
+    def __init__(self, expire_on):
+        self.expire_on = expire_on
+        self.calls = 0
+
+    def invoke(self, prompt, deadline=None):
+        from app.exceptions import DeadlineExceededError
+
+        self.calls += 1
+        if self.calls == self.expire_on:
+            deadline.cancel("deadline_exceeded")
+            raise DeadlineExceededError("cancelled")
+
+        inputs = json.loads(prompt.split("INPUT:", 1)[1])
+
+        class R:
+            content = json.dumps({"results": [
+                {"clause_number": i["clause_number"], "status": "COMPLIANT"} for i in inputs
+            ]})
+        return R()
+
+
+def test_evaluate_all_stops_at_deadline(monkeypatch):
+    from app.deadline import Deadline
+
+    monkeypatch.setattr(compliance_service, "MAX_CLAUSES", 2)
+    llm = _DeadlineLLM(expire_on=2)
+
+    verdicts, _ = compliance_service.evaluate_all(
+        llm, ["a", "b", "c", "d", "e"], [[]] * 5, near_dup=False, cascade=False, deadline=Deadline(60)
+    )
+
+    assert llm.calls == 2  # no third chunk after expiry
+    assert sorted(verdicts) == [0, 1]
+
+
+def test_check_compliance_marks_partial_report(monkeypatch):
+    from app.deadline import Deadline
+
+    monkeypatch.setattr(compliance_service, "resolve_collections", lambda frameworks=None: ("regulations",))
+    monkeypatch.setattr(compliance_service, "split_into_clauses", lambda text: ["1. one", "2. two"])
+    monkeypatch.setattr(compliance_service, "cached_rules", lambda clause, top_k, collection_name=None: ("r",))
+    monkeypatch.setattr(compliance_service, "get_llm", lambda: _DeadlineLLM(expire_on=1))
+
+    out = compliance_service.check_compliance("doc", deadline=Deadline(60))
+
+    assert out["results"] == []  # no raw-output fallback for a cut-short check
+    assert out["summary"]["partial"] is True
+    assert out["summary"]["partial_reason"] == "deadline_exceeded"
+    assert out["summary"]["unevaluated_clauses"] == 2
+
+
+def test_check_compliance_skips_retrieval_after_disconnect(monkeypatch):
+    from app.deadline import Deadline
+
+    deadline = Deadline(60)
+    deadline.cancel()
+    monkeypatch.setattr(compliance_service, "resolve_collections", lambda frameworks=None: ("regulations",))
+    monkeypatch.setattr(compliance_service, "split_into_clauses", lambda text: ["1. one"])
+    monkeypatch.setattr(compliance_service, "cached_rules", lambda *a, **k: pytest.fail("retrieval after cancel"))
+    monkeypatch.setattr(compliance_service, "get_llm", lambda: _DeadlineLLM(expire_on=1))
+
+    out = compliance_service.check_compliance("doc", deadline=deadline)
+    assert out["summary"]["partial_reason"] == "client_disconnected"
+
+
+def test_cached_rules_shared_cache_survives_process_local_miss(monkeypatch, tmp_path):
+    from app.services import rule_cache
+
+    calls = []
+    shared = rule_cache.RuleCache(str(tmp_path / "rules.sqlite3"))
+    monkeypatch.setattr(compliance_service, "RULE_CACHE_SHARED", True)
+    monkeypatch.setattr(compliance_service, "get_rule_cache", lambda: shared)
+    monkeypatch.setattr(compliance_service, "get_similar_rules",
+                        lambda clause, top_k=2, collection_name=None: calls.append(clause) or ["r1"])
+
+    compliance_service.cached_rules.cache_clear()
+    assert compliance_service.cached_rules("shared clause", 2, ("regulations",)) == ("r1",)
+    compliance_service.cached_rules.cache_clear()  # e.g. another worker process
+    assert compliance_service.cached_rules("shared clause", 2, ("regulations",)) == ("r1",)
+    assert calls == ["shared clause"]
+    compliance_service.cached_rules.cache_clear()
+
+
+def test_triage_stops_at_deadline_without_escalating(monkeypatch):
+    from app.deadline import Deadline
+
+    monkeypatch.setattr(compliance_service, "MAX_CLAUSES", 2)
+    triage_llm = _DeadlineLLM(expire_on=1)
+    full_llm = _DeadlineLLM(expire_on=0)
+    monkeypatch.setattr(compliance_service, "get_triage_llm", lambda: triage_llm)
+
+    verdicts, _ = compliance_service.evaluate_all(
+        full_llm, ["a", "b", "c"], [[]] * 3, near_dup=False, cascade=True, deadline=Deadline(60)
+    )
+
+    assert triage_llm.calls == 1  # no second triage chunk
+    assert full_llm.calls == 0  # an expired deadline is not a triage failure to escalate
+    assert verdicts == {}
+
+
+def test_make_result_normalizes_malformed_verdict():
+    from app.schemas import ClauseResult
+
+    result = compliance_service.make_result("clause", ["rule"], {
+        "status": None,
+        "risk_level": None,
+        "rule_mapping": ["Breach within 72h", {"rule_excerpt": "Retention", "violation": True}],
+        "rectification_steps": "Add a 72h notification duty",
+        "recommended_contract_changes": None,
+        "reason": ["too", "vague"],
+    })
+
+    assert result["status"] == "NEEDS_REVIEW" and result["risk_level"] == "MEDIUM"
+    assert result["rule_mapping"][0] == {"rule_excerpt": "Breach within 72h"}
+    assert result["rectification_steps"] == ["Add a 72h notification duty"]
+    assert result["recommended_contract_changes"] == []
+    ClauseResult.model_validate(result)  # what /compliance/upload and /reports/{id} serve through
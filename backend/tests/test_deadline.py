@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from app.deadline import Deadline, cancel_on_disconnect, TIMEOUT, CLIENT_DISCONNECTED
+from app.services.report_builder import build_summary
+
+
+def test_deadline_expires_with_timeout_reason():
+    deadline = Deadline(0.01)
+    assert deadline.reason is None
+    time.sleep(0.02)
+    assert deadline.expired
+    assert deadline.remaining() == 0
+    assert deadline.reason == TIMEOUT
+
+
+def test_cancel_expires_immediately_and_wakes_waiters():
+    deadline = Deadline(60)
+    deadline.cancel()
+
+    start = time.monotonic()
+    assert deadline.wait(5) is True
+    assert time.monotonic() - start < 1
+    assert deadline.reason == CLIENT_DISCONNECTED
+
+
+def test_cancel_on_disconnect(monkeypatch):
+    monkeypatch.setattr("app.deadline.DISCONNECT_POLL_S", 0.01)
+    polls = []
+
+    class FakeRequest:
+        async def is_disconnected(self):
+            polls.append(1)
+            return len(polls) >= 3
+
+    deadline = Deadline(60)
+    asyncio.run(cancel_on_disconnect(FakeRequest(), deadline))
+    assert deadline.reason == CLIENT_DISCONNECTED
+
+
+def test_build_summary_partial_fields():
+    assert build_summary([{"status": "COMPLIANT"}])["partial"] is False
+
+    summary = build_summary([{"status": "COMPLIANT"}], unevaluated=3, partial_reason=TIMEOUT)
+    assert summary["partial"] is True
+    assert summary["partial_reason"] == TIMEOUT
+    assert summary["unevaluated_clauses"] == 3
+    assert summary["total_clauses"] == 1
+
+
+def test_check_raises_once_expired():
+    import pytest
+    from app.exceptions import DeadlineExceededError
+
+    deadline = Deadline(60)
+    deadline.check("parsing")
+    deadline.cancel()
+    with pytest.raises(DeadlineExceededError, match="parsing"):
+        deadline.check("parsing")
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import metrics
+from app.llm.embedding_batcher import BatchingEmbeddings
+
+
+class FakeEmbeddings:
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def embed_documents(self, texts):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(n)] for n, t in enumerate(texts)]
+
+
+def test_concurrent_queries_share_one_call_and_get_their_own_vector():
+    metrics.reset()
+    fake = FakeEmbeddings()
+    batcher = BatchingEmbeddings(fake, max_batch=16, max_wait=0.2)
+
+    texts = ["a", "bb", "ccc", "bb"]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        vectors = list(pool.map(batcher.embed_query, texts))
+
+    assert len(fake.calls) == 1
+    assert sorted(fake.calls[0]) == ["a", "bb", "ccc"]  # duplicates embedded once
+    assert [v[0] for v in vectors] == [1.0, 2.0, 3.0, 2.0]
+
+    snap = metrics.snapshot()["histograms"]
+    assert snap["embed_batch_size"]["max"] == 3
+    assert snap["embed_batch_wait_seconds"]["count"] == 4
+    metrics.reset()
+
+
+def test_batch_is_capped_at_max_size():
+    gate = threading.Event()
+    fake = FakeEmbeddings(gate)
+    batcher = BatchingEmbeddings(fake, max_batch=2, max_wait=0.2)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(batcher.embed_query, str(n)) for n in range(5)]
+        gate.set()
+        [f.result(5) for f in futures]
+
+    assert all(len(c) <= 2 for c in fake.calls)
+    assert sorted(t for c in fake.calls for t in c) == ["0", "1", "2", "3", "4"]
+
+
+def test_batch_failure_reaches_every_caller_and_worker_survives():
+    class Flaky(FakeEmbeddings):
+        def embed_documents(self, texts):
+            if not self.calls:
+                self.calls.append(texts)
+                raise RuntimeError("ollama down")
+            return super().embed_documents(texts)
+
+    batcher = BatchingEmbeddings(Flaky(), max_wait=0)
+    with pytest.raises(RuntimeError):
+        batcher.embed_query("x")
+    assert batcher.embed_query("yy")[0] == 2.0
+
+
+def test_embed_documents_passes_through():
+    fake = FakeEmbeddings()
+    batcher = BatchingEmbeddings(fake)
+    assert len(batcher.embed_documents(["a", "b"])) == 2
+    assert fake.calls == [["a", "b"]]
+
+
+def test_short_result_fails_callers_and_worker_survives():
+    class Short(FakeEmbeddings):
+        def embed_documents(self, texts):
+            vectors = super().embed_documents(texts)
+            return vectors[:-1] if len(self.calls) == 1 else vectors
+
+    batcher = BatchingEmbeddings(Short(), max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.embed_query("x")
+    assert batcher._worker.is_alive()
+    assert batcher.embed_query("yy")[0] == 2.0
+
+
+def test_caller_times_out_instead_of_hanging():
+    from app.exceptions import LLMUnavailableError
+
+    gate = threading.Event()
+    batcher = BatchingEmbeddings(FakeEmbeddings(gate), max_wait=0, timeout=0.1)
+    try:
+        with pytest.raises(LLMUnavailableError):
+            batcher.embed_query("x")
+    finally:
+        gate.set()
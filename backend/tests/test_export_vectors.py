@@ -24,3 +24,55 @@ def test_export_vectors(monkeypatch, tmp_path):
 
     assert out["exported"] == 1
     assert out["file"].endswith(".json")
+
+
+def test_export_vectors_chunked(monkeypatch, tmp_path):
+    import json
+    import numpy as np
+
+    records = [(str(i), f"doc {i}", {"chunk_id": i}, [float(i)] * 4) for i in range(5)]
+    calls = []
+
+    class FakeCollection:
+        name = "regulations"
+
+        def get(self, limit=None, offset=None, include=None):
+            calls.append((limit, offset))
+            page = records[offset:offset + limit]
+            return {
+                "ids": [r[0] for r in page],
+                "documents": [r[1] for r in page],
+                "metadatas": [r[2] for r in page],
+                "embeddings": np.array([r[3] for r in page]) if page else [],
+            }
+
+    class FakeDB:
+        _collection = FakeCollection()
+
+    monkeypatch.setattr(export_vectors, "get_chroma", lambda: FakeDB())
+
+    out = export_vectors.export_vectors_chunked(tmp_path / "export", page_size=2)
+
+    assert out["exported"] == 5
+    assert out["parts"] == 3
+    assert calls == [(2, 0), (2, 2), (2, 4)]
+
+    manifest = json.loads((tmp_path / "export" / "manifest.json").read_text())
+    assert manifest["count"] == 5
+    assert manifest["dimension"] == 4
+
+    last = manifest["parts"][-1]
+    vectors = np.load(tmp_path / "export" / last["embeddings"])
+    assert vectors.shape == (1, 4)
+    assert vectors[0][0] == 4.0
+    assert last["embeddings_sha256"] == export_vectors.file_sha256(tmp_path / "export" / last["embeddings"])
+
+    lines = (tmp_path / "export" / last["documents"]).read_text().splitlines()
+    assert json.loads(lines[0]) == {"id": "4", "document": "doc 4", "metadata": {"chunk_id": 4}}
+
+
+def test_export_dir_does_not_depend_on_working_directory():
+    from app.vectordb import export_vectors, import_vectors
+
+    assert export_vectors.EXPORT_DIR.is_absolute()
+    assert export_vectors.EXPORT_DIR.parent == import_vectors.SNAPSHOT_DIR.parent
@@ -49,3 +49,19 @@ def test_parse_docx_mock(monkeypatch, tmp_path):
 
     txt = parse_uploaded_file(f)
     assert "One" in txt and "Two" in txt
+
+def test_parse_in_pool_keeps_order_and_stops(tmp_path: Path):
+    import docx
+    from app.services.file_parser import parse_in_pool
+
+    paths = []
+    for n in range(3):
+        d = docx.Document()
+        d.add_paragraph(f"Document {n}")
+        d.save(tmp_path / f"{n}.docx")
+        paths.append(tmp_path / f"{n}.docx")
+
+    out = list(parse_in_pool(paths, 2))
+    assert [(p.name, text) for p, (text, _) in out] == [("0.docx", "Document 0"), ("1.docx", "Document 1"),
+                                                       ("2.docx", "Document 2")]
+    assert list(parse_in_pool(paths, 2, stop=lambda: True)) == []
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from app.llm.gateway import LLMGateway, GatewayLLM
+from app.exceptions import LLMOverloadedError, LLMUnavailableError
+
+
+def _wait_for_queue(gateway, depth):
+    for _ in range(200):
+        if gateway.stats()["queue_depth"] == depth:
+            return
+        time.sleep(0.01)
+    raise AssertionError("queue never reached expected depth")
+
+
+def test_waiters_get_slots_in_fifo_order():
+    gateway = LLMGateway(max_in_flight=1, max_queue=5, queue_timeout=5)
+    gateway.acquire()
+
+    order = []
+
+    def worker(n):
+        with gateway.slot():
+            order.append(n)
+
+    threads = []
+    for n in range(3):
+        t = threading.Thread(target=worker, args=(n,))
+        t.start()
+        threads.append(t)
+        _wait_for_queue(gateway, n + 1)
+
+    gateway.release()
+    for t in threads:
+        t.join(5)
+
+    assert order == [0, 1, 2]
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    gateway = LLMGateway(max_in_flight=1, max_queue=0, queue_timeout=5)
+    gateway.acquire()
+
+    with pytest.raises(LLMOverloadedError) as exc:
+        gateway.acquire()
+    assert exc.value.status_code == 429
+    assert exc.value.retry_after >= 1
+
+
+def test_queue_timeout_is_unavailable_and_leaves_queue():
+    gateway = LLMGateway(max_in_flight=1, max_queue=5, queue_timeout=0.05)
+    gateway.acquire()
+
+    with pytest.raises(LLMUnavailableError) as exc:
+        gateway.acquire()
+    assert exc.value.status_code == 503
+    assert gateway.stats()["queue_depth"] == 0
+
+
+def test_gateway_llm_holds_a_slot_during_invoke():
+    gateway = LLMGateway(max_in_flight=2, max_queue=1)
+    seen = []
+
+    class FakeLLM:
+        model = "fake"
+
+        def invoke(self, prompt):
+            seen.append(gateway.stats()["in_flight"])
+            return prompt
+
+    llm = GatewayLLM(FakeLLM(), gateway)
+    assert llm.invoke("hi") == "hi"
+    assert seen == [1]
+    assert llm.model == "fake"
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_deadline_cancels_in_flight_generation():
+    import asyncio
+    from app.deadline import Deadline
+    from app.exceptions import DeadlineExceededError
+
+    cancelled = []
+
+    class SlowLLM:
+        async def ainvoke(self, prompt):
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(prompt)
+                raise
+
+    gateway = LLMGateway(max_in_flight=1, max_queue=1)
+    llm = GatewayLLM(SlowLLM(), gateway)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        llm.invoke("p", deadline=Deadline(0.1))
+    assert time.monotonic() - start < 2
+    assert gateway.stats()["in_flight"] == 0
+
+    for _ in range(100):
+        if cancelled:
+            break
+        time.sleep(0.01)
+    assert cancelled == ["p"]
+
+
+def test_deadline_stops_waiting_in_queue():
+    from app.deadline import Deadline
+    from app.exceptions import DeadlineExceededError
+
+    gateway = LLMGateway(max_in_flight=1, max_queue=5, queue_timeout=30)
+    gateway.acquire()
+
+    deadline = Deadline(60)
+    deadline.cancel()
+    with pytest.raises(DeadlineExceededError):
+        gateway.acquire(deadline=deadline)
+    assert gateway.stats()["queue_depth"] == 0
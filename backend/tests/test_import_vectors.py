@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from app.exceptions import SnapshotError
+from app.vectordb import export_vectors, import_vectors
+
+
+class FakeCollection:
+    name = "regulations"
+
+    def __init__(self, records=None):
+        self.records = records or []
+        self.upserts = []
+
+    def get(self, limit=None, offset=None, include=None):
+        page = self.records[offset:offset + limit]
+        return {
+            "ids": [r[0] for r in page],
+            "documents": [r[1] for r in page],
+            "metadatas": [r[2] for r in page],
+            "embeddings": np.array([r[3] for r in page]) if page else [],
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts.append((list(ids), np.asarray(embeddings), documents, metadatas))
+
+    def count(self):
+        return sum(len(u[0]) for u in self.upserts)
+
+
+def _write_snapshot(monkeypatch, path, n=5):
+    records = [(str(i), f"doc {i}", {"chunk_id": i}, [float(i)] * 3) for i in range(n)]
+
+    class FakeDB:
+        _collection = FakeCollection(records)
+
+    monkeypatch.setattr(export_vectors, "get_chroma", lambda: FakeDB())
+    export_vectors.export_vectors_chunked(path, page_size=2)
+
+
+class FakeShadowDB:
+    def __init__(self):
+        self._collection = FakeCollection()
+        self.deleted = False
+
+    def delete_collection(self):
+        self.deleted = True
+
+
+def _restore_target(monkeypatch, tmp_path):
+    from app.vectordb import chroma_client
+
+    monkeypatch.setattr(chroma_client, "PERSIST_DIR", str(tmp_path / "store"))
+    dbs = {}
+    monkeypatch.setattr(import_vectors, "get_chroma",
+                        lambda collection_name=None: dbs.setdefault(collection_name, FakeShadowDB()))
+    return dbs
+
+
+def test_import_vectors_snapshot_roundtrip(monkeypatch, tmp_path):
+    _write_snapshot(monkeypatch, tmp_path)
+    dbs = _restore_target(monkeypatch, tmp_path)
+
+    out = import_vectors.import_vectors_snapshot(tmp_path, batch_size=1)
+    target = dbs[out["collection"]]._collection
+
+    assert import_vectors.resolve_collection() == out["collection"]
+    assert out["records_imported"] == 5
+    assert out["collection_count"] == 5
+    ids = [i for u in target.upserts for i in u[0]]
+    assert ids == ["0", "1", "2", "3", "4"]
+    assert target.upserts[3][1].tolist() == [[3.0, 3.0, 3.0]]
+
+
+def test_import_vectors_snapshot_rejects_other_embedding_model(monkeypatch, tmp_path):
+    _write_snapshot(monkeypatch, tmp_path)
+    monkeypatch.setattr(import_vectors, "EMBED_MODEL", "other-embed")
+
+    assert import_vectors.find_compatible_snapshot(tmp_path) is None
+    with pytest.raises(SnapshotError):
+        import_vectors.check_compatible(import_vectors.read_manifest(tmp_path), "other-embed")
+
+
+def test_import_vectors_snapshot_detects_corruption(monkeypatch, tmp_path):
+    _write_snapshot(monkeypatch, tmp_path)
+    (tmp_path / "part-00000.jsonl").write_text("tampered\n")
+    dbs = _restore_target(monkeypatch, tmp_path)
+
+    with pytest.raises(SnapshotError):
+        import_vectors.import_vectors_snapshot(tmp_path)
+    assert dbs == {}
+
+
+def test_bad_later_part_fails_before_any_upsert(monkeypatch, tmp_path):
+    _write_snapshot(monkeypatch, tmp_path)
+    np.save(tmp_path / "part-00002.npy", np.zeros((1, 4), dtype=np.float32))
+    dbs = _restore_target(monkeypatch, tmp_path)
+
+    with pytest.raises(SnapshotError):
+        import_vectors.import_vectors_snapshot(tmp_path, verify_checksums=False)
+    assert dbs == {}
+    assert import_vectors.resolve_collection() == import_vectors.COLLECTION_NAME
+
+
+def test_failed_load_drops_shadow_and_keeps_alias(monkeypatch, tmp_path):
+    _write_snapshot(monkeypatch, tmp_path)
+    dbs = _restore_target(monkeypatch, tmp_path)
+    monkeypatch.setattr(FakeCollection, "upsert", lambda self, **kw: (_ for _ in ()).throw(RuntimeError("disk full")))
+
+    with pytest.raises(SnapshotError):
+        import_vectors.import_vectors_snapshot(tmp_path)
+    assert all(db.deleted for db in dbs.values())
+    assert import_vectors.resolve_collection() == import_vectors.COLLECTION_NAME
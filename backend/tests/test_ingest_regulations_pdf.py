@@ -1,11 +1,53 @@
 from pathlib import Path
-from app.vectordb import ingest_regulations_pdf
 
-def test_ingest_regulations_pdf(monkeypatch, tmp_path: Path):
-    fake_pdf = tmp_path / "reg.pdf"
-    fake_pdf.write_text("dummy")
+import pytest
+
+from app.exceptions import VectorDBError
+from app.vectordb import chroma_client, ingest_regulations_pdf
+
+
+class FakeCollection:
+    def __init__(self, records=None):
+        self.records = list(records or [])
+
+    def count(self):
+        return len(self.records)
+
+    def get(self, limit=None, offset=None, include=None):
+        page = self.records[offset:offset + limit]
+        return {"ids": [r[0] for r in page], "embeddings": [r[1] for r in page],
+                "documents": [r[2] for r in page], "metadatas": [{} for _ in page]}
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.records.extend(zip(ids, embeddings, documents))
+
 
-    # mock file_parser.read_pdf
+class FakeDB:
+    def __init__(self, name, records=None, fail=False):
+        self.name = name
+        self.fail = fail
+        self.deleted = False
+        self._collection = FakeCollection(records)
+
+    def add_documents(self, docs):
+        if self.fail:
+            raise RuntimeError("ollama down")
+        self._collection.records.extend((d.page_content, [0.0], d.page_content) for d in docs)
+
+    def delete_collection(self):
+        self.deleted = True
+
+
+@pytest.fixture
+def fake_store(monkeypatch, tmp_path: Path):
+    dbs = {"regulations": FakeDB("regulations", [("old", [1.0], "old rule")])}
+
+    def fake_get_chroma(collection_name=None):
+        name = collection_name or chroma_client.resolve_collection()
+        return dbs.setdefault(name, FakeDB(name))
+
+    monkeypatch.setattr(chroma_client, "PERSIST_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(ingest_regulations_pdf, "get_chroma", fake_get_chroma)
     monkeypatch.setattr(ingest_regulations_pdf, "read_pdf", lambda _: "A long regulation text " * 200)
 
     # mock splitter
@@ -16,16 +58,71 @@ def test_ingest_regulations_pdf(monkeypatch, tmp_path: Path):
 
     monkeypatch.setattr(ingest_regulations_pdf, "RecursiveCharacterTextSplitter", FakeSplitter)
 
-    # mock chroma db
-    class FakeCollection:
-        def __init__(self): self._count = 0
-        def count(self): return 3
+    fake_pdf = tmp_path / "reg.pdf"
+    fake_pdf.write_text("dummy")
+    return dbs, fake_pdf
 
-    class FakeDB:
-        _collection = FakeCollection()
-        def add_documents(self, docs): pass
 
-    monkeypatch.setattr(ingest_regulations_pdf, "get_chroma", lambda: FakeDB())
+def test_ingest_regulations_pdf(fake_store):
+    dbs, fake_pdf = fake_store
 
     resp = ingest_regulations_pdf.ingest_regulations_pdf(str(fake_pdf), reset=False, max_chunks=10, batch_size=2)
     assert resp["chunks_ingested"] == 3
+
+    # shadow got a copy of the live vectors plus the new chunks, then became active
+    assert resp["previous_collection"] == "regulations"
+    assert chroma_client.resolve_collection() == resp["collection"]
+    assert resp["collection_count"] == 4
+    assert dbs["regulations"]._collection.count() == 1
+
+
+def test_ingest_reset_builds_fresh_collection_and_keeps_previous(fake_store):
+    dbs, fake_pdf = fake_store
+
+    first = ingest_regulations_pdf.ingest_regulations_pdf(str(fake_pdf), reset=True)
+    assert first["collection_count"] == 3
+
+    second = ingest_regulations_pdf.ingest_regulations_pdf(str(fake_pdf), reset=True)
+    assert chroma_client.load_aliases()["regulations"]["previous"] == first["collection"]
+
+    # the legacy collection was two versions back and is dropped
+    assert dbs["regulations"].deleted
+    assert not dbs[first["collection"]].deleted
+
+    chroma_client.rollback_collection()
+    assert chroma_client.resolve_collection() == first["collection"]
+    assert chroma_client.load_aliases()["regulations"]["previous"] == second["collection"]
+
+
+def test_ingest_failure_leaves_live_collection_untouched(fake_store, monkeypatch):
+    dbs, fake_pdf = fake_store
+
+    def failing_get_chroma(collection_name=None):
+        name = collection_name or chroma_client.resolve_collection()
+        return dbs.setdefault(name, FakeDB(name, fail=name != "regulations"))
+
+    monkeypatch.setattr(ingest_regulations_pdf, "get_chroma", failing_get_chroma)
+
+    with pytest.raises(VectorDBError):
+        ingest_regulations_pdf.ingest_regulations_pdf(str(fake_pdf), reset=True)
+
+    assert chroma_client.resolve_collection() == "regulations"
+    shadow = [db for name, db in dbs.items() if name != "regulations"][0]
+    assert shadow.deleted
+
+
+def test_rollback_without_previous_fails(fake_store):
+    with pytest.raises(VectorDBError):
+        chroma_client.rollback_collection()
+
+
+def test_ingest_into_framework_partition(fake_store):
+    dbs, fake_pdf = fake_store
+
+    resp = ingest_regulations_pdf.ingest_regulations_pdf(str(fake_pdf), reset=True, framework="GDPR")
+
+    assert resp["framework"] == "gdpr"
+    assert chroma_client.list_frameworks() == ["default", "gdpr"]
+    assert chroma_client.resolve_collections(["gdpr"]) == (resp["collection"],)
+    # the default partition is untouched
+    assert chroma_client.resolve_collection() == "regulations"
@@ -0,0 +1,87 @@
+import json
+import logging
+import queue
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import logger as app_logger
+from app.logger import JsonFormatter, ContextFilter, NonBlockingQueueHandler, request_id_var
+from app.middlewares import RequestContextMiddleware
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.makeLogRecord({"name": "t", "levelno": level, "levelname": logging.getLevelName(level),
+                                    "msg": msg, "args": args})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_record_carries_request_id_and_extra_fields():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record(clauses=3)
+        assert ContextFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["request_id"] == "req-1"
+    assert entry["clauses"] == 3
+
+
+def test_debug_records_are_sampled():
+    never, always = ContextFilter(debug_sample_rate=0.0), ContextFilter(debug_sample_rate=1.0)
+    assert not never.filter(_record(logging.DEBUG))
+    assert always.filter(_record(logging.DEBUG))
+    assert never.filter(_record(logging.WARNING))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = NonBlockingQueueHandler.dropped
+
+    start = time.monotonic()
+    for _ in range(3):
+        handler.handle(_record())
+    assert time.monotonic() - start < 0.5
+    assert NonBlockingQueueHandler.dropped - before == 2
+
+
+def test_exception_text_is_resolved_before_queueing():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        import sys
+        record = _record(exc_info=sys.exc_info())
+    handler.handle(record)
+
+    queued = handler.queue.get_nowait()
+    assert queued.exc_info is None
+    assert "ValueError: boom" in json.loads(JsonFormatter().format(queued))["exc"]
+
+
+def test_middleware_sets_and_echoes_request_id():
+    seen = []
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/x")
+    def x():
+        seen.append(request_id_var.get())
+        return {}
+
+    client = TestClient(app)
+    res = client.get("/x", headers={"X-Request-ID": "abc"})
+    assert res.headers["X-Request-ID"] == "abc" and seen == ["abc"]
+
+    res = client.get("/x")
+    assert res.headers["X-Request-ID"] == seen[-1] and len(seen[-1]) == 32
+
+
+def test_logging_stats_shape():
+    stats = app_logger.logging_stats()
+    assert set(stats) == {"queue_depth", "dropped_records"}
@@ -0,0 +1,25 @@
+from app import metrics
+
+
+def test_counters_ratios_and_histograms():
+    metrics.reset()
+    metrics.register_ratio("hit_rate", "hits_total", "lookups_total")
+
+    metrics.inc("lookups_total", 4)
+    metrics.inc("hits_total")
+    metrics.set_gauge("queue_depth", 3)
+    for v in (0.002, 0.2, 500):
+        metrics.observe("latency_seconds", v)
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["lookups_total"] == 4
+    assert snap["ratios"]["hit_rate"] == 0.25
+    assert snap["gauges"]["queue_depth"] == 3
+
+    h = snap["histograms"]["latency_seconds"]
+    assert h["count"] == 3
+    assert h["max"] == 500
+    assert h["buckets"]["le_0.005"] == 1
+    assert h["buckets"]["le_0.25"] == 1
+    assert h["buckets"]["inf"] == 1
+    metrics.reset()
@@ -28,3 +28,90 @@ def test_middleware_handles_unknown_error():
     res = client.get("/fail2")
     assert res.status_code == 500
     assert res.json()["type"] == "UnhandledException"
+
+def test_middleware_sets_retry_after_on_overload():
+    from app.exceptions import LLMOverloadedError
+
+    app = FastAPI()
+    app.add_middleware(ExceptionMiddleware)
+
+    @app.get("/busy")
+    def busy():
+        raise LLMOverloadedError("queue full", retry_after=7)
+
+    client = TestClient(app)
+    res = client.get("/busy")
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "7"
+
+def _compressed_app():
+    from app.middlewares import CompressionMiddleware, RequestContextMiddleware
+    from app.responses import FastJSONResponse
+
+    app = FastAPI()
+    app.add_middleware(ExceptionMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/big")
+    def big():
+        return FastJSONResponse({"results": [{"clause": f"clause {n}", "status": "COMPLIANT"} for n in range(500)]})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    return TestClient(app)
+
+def test_large_responses_are_gzipped_small_ones_not():
+    client = _compressed_app()
+
+    res = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert len(res.json()["results"]) == 500
+    assert "Server-Timing" in res.headers and "X-Request-ID" in res.headers
+
+    res = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in res.headers
+
+def test_brotli_when_accepted():
+    import pytest
+    brotli = pytest.importorskip("brotli")
+    client = _compressed_app()
+
+    res = client.get("/big", headers={"Accept-Encoding": "br"})
+    assert res.headers["Content-Encoding"] == "br"
+    # the test client may or may not decode br itself; check the wire bytes decode either way
+    body = res.content
+    try:
+        body = brotli.decompress(body)
+    except brotli.error:
+        pass
+    assert b"clause 499" in body
+
+def test_error_after_response_started_is_not_swallowed():
+    from starlette.responses import StreamingResponse
+
+    app = FastAPI()
+    app.add_middleware(ExceptionMiddleware)
+
+    @app.get("/stream")
+    def stream():
+        def gen():
+            yield b"partial"
+            raise RuntimeError("mid-stream")
+        return StreamingResponse(gen())
+
+    import pytest
+    with pytest.raises(RuntimeError):
+        TestClient(app).get("/stream")
+
+def test_accept_encoding_tokens_and_q_values():
+    from app.middlewares import accepts_encoding
+
+    assert accepts_encoding("gzip, br", "br")
+    assert accepts_encoding("gzip;q=1.0, br;q=0.5", "br")
+    assert not accepts_encoding("br;q=0, gzip", "br")
+    assert not accepts_encoding("gzip, brotli-ish", "br")
+    assert accepts_encoding("*", "br")
+    assert not accepts_encoding("", "br")
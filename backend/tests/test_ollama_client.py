@@ -0,0 +1,93 @@
+import pytest
+
+from app import metrics
+from app.llm import ollama_client
+from app.llm.prompts import COMPLIANCE_PREFIX
+from app.services.compliance_service import build_prompt
+
+
+class Resp:
+    def __init__(self, tokens, ns):
+        self.response_metadata = {"prompt_eval_count": tokens, "prompt_eval_duration": ns}
+
+
+def test_prompt_prefix_is_stable_across_batches():
+    a = build_prompt([{"clause_number": 1, "clause_text": "x", "rules": ["r"]}])
+    b = build_prompt([{"clause_number": 1, "clause_text": "other", "rules": []}])
+
+    assert a.startswith(COMPLIANCE_PREFIX) and b.startswith(COMPLIANCE_PREFIX)
+    assert COMPLIANCE_PREFIX.endswith("INPUT:\n")
+    assert COMPLIANCE_PREFIX.count("INPUT:") == 1
+
+
+def test_preload_primes_prefix_with_fixed_context(monkeypatch):
+    import ollama
+
+    calls = []
+
+    class FakeClient:
+        def __init__(self, timeout=None):
+            pass
+
+        def chat(self, model, messages, options, keep_alive):
+            calls.append(("chat", messages[0]["content"], options["num_ctx"], keep_alive))
+            return {"prompt_eval_count": 400}
+
+        def embed(self, model, input, keep_alive):
+            calls.append(("embed", model))
+
+    monkeypatch.setattr(ollama, "Client", FakeClient)
+    monkeypatch.setattr(ollama_client, "_prefix_tokens", None)
+    monkeypatch.setattr(ollama_client, "_prefix_measured", False)
+
+    ollama_client.preload_models()
+
+    assert calls[0] == ("chat", COMPLIANCE_PREFIX, ollama_client.OLLAMA_NUM_CTX, ollama_client.OLLAMA_KEEP_ALIVE)
+    assert ollama_client._prefix_tokens == 400
+
+
+def test_record_prompt_eval_counts_cache_hits(monkeypatch):
+    metrics.reset()
+    monkeypatch.setattr(ollama_client, "_prefix_tokens", 400)
+    # suffix about 3x the prefix: a cached batch still evaluates far more tokens than the prefix
+    prompt = COMPLIANCE_PREFIX + "x" * (3 * len(COMPLIANCE_PREFIX))
+    total = ollama_client.estimate_prompt_tokens(prompt, 400)
+    assert total == 1600
+
+    ollama_client.record_prompt_eval(Resp(total, 1_600_000_000), prompt)        # cold: everything evaluated
+    ollama_client.record_prompt_eval(Resp(total - 400, 1_200_000_000), prompt)  # prefix reused
+    ollama_client.record_prompt_eval(object(), prompt)                          # no metadata (fake models)
+
+    snap = metrics.snapshot()
+    assert snap["histograms"]["llm_prompt_eval_tokens"]["count"] == 2
+    assert snap["ratios"]["llm_prompt_cache_hit_rate"] == 0.5
+    assert snap["histograms"]["llm_prompt_eval_saved_seconds"]["sum"] == 0.4
+    metrics.reset()
+
+
+def test_prefix_is_measured_once_and_never_from_a_batch(monkeypatch):
+    import ollama
+
+    calls = []
+
+    class FailingClient:
+        def __init__(self, timeout=None):
+            pass
+
+        def chat(self, model, messages, options, keep_alive):
+            calls.append(messages[0]["content"])
+            raise ConnectionError("ollama down")
+
+    metrics.reset()
+    monkeypatch.setattr(ollama, "Client", FailingClient)
+    monkeypatch.setattr(ollama_client, "_prefix_tokens", None)
+    monkeypatch.setattr(ollama_client, "_prefix_measured", False)
+
+    with pytest.raises(ConnectionError):
+        ollama_client.measure_prefix_tokens()
+    assert ollama_client.measure_prefix_tokens() is None  # failure is not retried
+    ollama_client.record_prompt_eval(Resp(10, 10_000_000), COMPLIANCE_PREFIX + "suffix")
+
+    assert calls == [COMPLIANCE_PREFIX]
+    assert metrics.counter("llm_prompt_batches_total") == 0
+    metrics.reset()
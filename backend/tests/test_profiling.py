@@ -0,0 +1,123 @@
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from app import profiling
+from app.middlewares import ProfilingMiddleware
+
+
+def busy_parse(seconds=0.15):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def _profiled_app():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        await run_in_threadpool(profiling.bind(busy_parse))
+        return {"ok": True}
+
+    return app
+
+
+def test_bind_is_identity_without_session():
+    assert profiling.bind(busy_parse) is busy_parse
+
+
+def test_session_samples_bound_worker_threads():
+    session = profiling.ProfileSession(interval=0.002)
+    token = profiling.current_session.set(session)
+    try:
+        worker = threading.Thread(target=profiling.bind(busy_parse), name="worker-1")
+    finally:
+        profiling.current_session.reset(token)
+
+    session.start()
+    worker.start()
+    worker.join()
+    session.stop()
+
+    assert session.samples > 0
+    assert all(stack[0] == "worker-1" for stack in session.stacks)
+    assert any("busy_parse" in f["function"] for f in session.summary()["top_inclusive"])
+    assert "busy_parse" in session.collapsed()
+
+
+def test_area_breakdown_uses_leaf_most_match():
+    frames = ("run (app/main.py:1)", "read (pypdf/_reader.py:10)", "split_into_clauses (app/utils.py:5)")
+    assert profiling._area(frames) == "clause_splitting"
+    assert profiling._area(("handler (app/main.py:1)",)) == "app_other"
+
+
+def test_middleware_profiles_admin_request(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    client = TestClient(_profiled_app())
+
+    res = client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    assert res.status_code == 200
+    session = profiling.get_profile(res.headers["X-Profile-Id"])
+    assert session is not None and session.samples > 0
+    assert any("busy_parse" in f["function"] for f in session.summary()["top_inclusive"])
+
+
+def test_middleware_rejects_profile_without_admin_token(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    client = TestClient(_profiled_app())
+
+    res = client.get("/work?profile=1", headers={"X-Admin-Token": "wrong"})
+    assert res.status_code == 403
+
+    res = client.get("/work")
+    assert res.status_code == 200
+    assert "X-Profile-Id" not in res.headers
+
+
+def test_profiles_are_bounded(monkeypatch):
+    monkeypatch.setattr(profiling, "KEEP_PROFILES", 2)
+    sessions = [profiling.ProfileSession() for _ in range(3)]
+    for s in sessions:
+        profiling.save_profile(s)
+
+    assert profiling.get_profile(sessions[0].id) is None
+    assert profiling.get_profile(sessions[2].id) is sessions[2]
+
+
+def test_gateway_generation_wait_counts_as_ollama():
+    import asyncio
+
+    from app.deadline import Deadline
+    from app.llm.gateway import GatewayLLM, LLMGateway
+
+    class SlowLLM:
+        async def ainvoke(self, prompt):
+            await asyncio.sleep(0.2)
+            return "done"
+
+    llm = GatewayLLM(SlowLLM(), LLMGateway(max_in_flight=1, max_queue=1))
+    session = profiling.ProfileSession(interval=0.002)
+    token = profiling.current_session.set(session)
+    try:
+        call = profiling.bind(lambda: llm.invoke("prompt", deadline=Deadline(5)))
+    finally:
+        profiling.current_session.reset(token)
+
+    session.start()
+    assert call() == "done"
+    session.stop()
+
+    areas = session.summary()["areas_percent"]
+    assert max(areas, key=areas.get) == "ollama"
+
+
+def test_embedding_batch_wait_is_not_counted_as_chroma():
+    frames = ("similarity_search (langchain_chroma/vectorstores.py:1)",
+              "embed_query (app/llm/embedding_batcher.py:50)",
+              "wait (threading.py:300)")
+    assert profiling._area(frames) == "embedding"
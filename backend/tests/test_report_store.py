@@ -0,0 +1,62 @@
+import pytest
+
+from app.services.report_store import ReportStore
+from app.exceptions import ReportNotFoundError
+
+
+def _report(n_clauses, overall_risk="HIGH"):
+    statuses = ["COMPLIANT", "NEEDS_REVIEW", "NON_COMPLIANT"]
+    risks = ["LOW", "MEDIUM", "HIGH"]
+    return {
+        "summary": {"total_clauses": n_clauses, "overall_risk": overall_risk},
+        "results": [
+            {"clause": f"clause {n}", "status": statuses[n % 3], "risk_level": risks[n % 3]}
+            for n in range(n_clauses)
+        ],
+    }
+
+
+def test_save_and_page_through_filtered_results(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    report_id = store.save(_report(300), "msa.pdf")
+
+    page = store.get_report(report_id, offset=0, limit=10)
+    assert page["total_results"] == 300
+    assert [r["clause"] for r in page["results"]] == [f"clause {n}" for n in range(10)]
+    assert page["summary"]["overall_risk"] == "HIGH"
+
+    page = store.get_report(report_id, offset=20, limit=5, status="NON_COMPLIANT", risk_level="HIGH")
+    assert page["total_results"] == 100
+    assert [r["clause"] for r in page["results"]] == [f"clause {n}" for n in range(62, 77, 3)]
+
+
+def test_list_reports_newest_first_with_risk_filter(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    first = store.save(_report(1, "LOW"), "a.pdf")
+    second = store.save(_report(1, "HIGH"), "b.pdf", kind="revision")
+    third = store.save({**_report(1, "HIGH"), "changes": {"added": 1}}, "c.pdf", kind="revision")
+
+    listing = store.list_reports()
+    assert listing["total"] == 3
+    assert [r["report_id"] for r in listing["reports"]] == [third, second, first]
+
+    high = store.list_reports(overall_risk="HIGH", limit=1)
+    assert high["total"] == 2 and len(high["reports"]) == 1
+
+    assert store.get_report(third)["changes"] == {"added": 1}
+
+
+def test_unknown_report_is_not_found(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.sqlite3"))
+    with pytest.raises(ReportNotFoundError) as exc:
+        store.get_report("missing")
+    assert exc.value.status_code == 404
+
+
+def test_shared_sqlite_files_wait_for_other_writers(tmp_path):
+    from app.services.clause_index import ClauseIndex
+    from app.services.rule_cache import RuleCache
+
+    for db in (ReportStore(str(tmp_path / "r.sqlite3")), ClauseIndex(str(tmp_path / "c.sqlite3")),
+               RuleCache(str(tmp_path / "k.sqlite3"))):
+        assert db._conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
@@ -12,9 +12,42 @@ def test_get_similar_rules(monkeypatch):
                 FakeDoc("Short rule")
             ]
 
-    monkeypatch.setattr(retriever, "get_chroma", lambda: FakeDB())
+    monkeypatch.setattr(retriever, "get_chroma", lambda collection_name=None: FakeDB())
 
     rules = retriever.get_similar_rules("test clause", top_k=2, max_chars=100)
     assert len(rules) == 2
     assert rules[0].endswith("...")
     assert rules[1] == "Short rule"
+
+
+def test_get_similar_rules_multi_merges_partitions_by_distance(monkeypatch):
+    class FakeDoc:
+        def __init__(self, content):
+            self.page_content = content
+
+    class FakeEmbeddings:
+        calls = 0
+
+        def embed_query(self, text):
+            FakeEmbeddings.calls += 1
+            return [0.1, 0.2]
+
+    results = {
+        "gdpr": [(FakeDoc("gdpr close"), 0.1), (FakeDoc("gdpr far"), 0.9)],
+        "soc2": [(FakeDoc("soc2 mid"), 0.4)],
+    }
+
+    class FakeDB:
+        embeddings = FakeEmbeddings()
+
+        def __init__(self, name):
+            self.name = name
+
+        def similarity_search_by_vector_with_relevance_scores(self, vector, k=2):
+            return results[self.name][:k]
+
+    monkeypatch.setattr(retriever, "get_chroma", lambda collection_name=None: FakeDB(collection_name))
+
+    rules = retriever.get_similar_rules_multi("test clause", ["gdpr", "soc2"], top_k=2)
+    assert rules == ["gdpr close", "soc2 mid"]
+    assert FakeEmbeddings.calls == 1
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from app.exceptions import ComplianceError
+from app.services import revision_service
+from app.services.revision_service import align_clauses, ADDED, MODIFIED, REMOVED, UNCHANGED
+
+A = "1. Provider shall encrypt all customer data at rest."
+B = "2. Provider shall retain logs for twelve months."
+C = "3. Customer may audit the provider once per year."
+D = "4. Provider shall notify breaches within 72 hours."
+
+
+def test_align_clauses_detects_each_change():
+    old = [A, B, C, D]
+    new = [A, "2. Provider shall retain logs for six months.", D.replace("4.", "3."), "4. New clause text here."]
+
+    ops = align_clauses(old, new)
+
+    assert (UNCHANGED, 0, 0) in ops
+    assert (MODIFIED, 1, 1) in ops
+    assert (UNCHANGED, 3, 2) in ops  # renumbered only
+    assert (REMOVED, 2, None) in ops
+    assert (ADDED, None, 3) in ops
+
+
+def test_align_clauses_treats_moved_clause_as_unchanged():
+    ops = align_clauses([A, B, C], [C, A, B])
+    assert sorted(op for op in ops if op[0] == UNCHANGED) == [
+        (UNCHANGED, 0, 1), (UNCHANGED, 1, 2), (UNCHANGED, 2, 0)
+    ]
+    assert len(ops) == 3
+
+
+def test_check_revision_only_evaluates_changes(monkeypatch):
+    prior = {"results": [
+        {"clause": A, "status": "COMPLIANT", "risk_level": "LOW"},
+        {"clause": B, "status": "NON_COMPLIANT", "risk_level": "HIGH"},
+        {"clause": C, "status": "COMPLIANT", "risk_level": "LOW"},
+    ]}
+    new_b = "2. Provider shall retain logs for twenty four months."
+    prompts = []
+
+    class FakeLLM:
+        def invoke(self, prompt):
+            inputs = json.loads(prompt.split("INPUT:", 1)[1])
+            prompts.append([i["clause_text"] for i in inputs])
+
+            class R:
+                content = json.dumps({"results": [
+                    {"clause_number": i["clause_number"], "status": "COMPLIANT"} for i in inputs
+                ]})
+            return R()
+
+    monkeypatch.setattr(revision_service, "split_into_clauses", lambda text: [A, new_b, D])
+    monkeypatch.setattr(revision_service, "resolve_collections", lambda frameworks=None: ("regulations",))
+    monkeypatch.setattr(revision_service, "retrieve_rules", lambda c, top_k, collections, deadline=None: [["r"] for _ in c])
+    monkeypatch.setattr(revision_service, "get_llm", lambda: FakeLLM())
+
+    out = revision_service.check_revision("v2", prior)
+
+    assert prompts == [[new_b, D]]
+    assert [r["change"] for r in out["results"]] == [UNCHANGED, MODIFIED, ADDED]
+    assert out["results"][0]["status"] == "COMPLIANT"
+    assert out["results"][1]["status"] == "COMPLIANT"
+    assert out["results"][1]["previous_clause"] == B
+    assert out["changes"]["removed"] == 1
+    assert out["changes"]["removed_clauses"] == [C]
+    assert out["changes"]["evaluated"] == 2
+    assert out["summary"]["total_clauses"] == 3
+
+
+def test_check_revision_requires_prior_results():
+    with pytest.raises(ComplianceError):
+        revision_service.check_revision("v2", {"results": []})
+
+
+@pytest.mark.parametrize("prior", [
+    [{"clause": A, "status": "COMPLIANT", "risk_level": "LOW"}],
+    {"results": "none"},
+    {"results": ["clause"]},
+    {"results": [{"clause": A}]},
+    {"results": [{"clause": A, "status": "COMPLIANT", "risk_level": None}]},
+])
+def test_check_revision_rejects_malformed_prior_report(prior):
+    with pytest.raises(ComplianceError):
+        revision_service.check_revision("v2", prior)
+
+
+def test_check_revision_normalizes_carried_forward_results(monkeypatch):
+    prior = {"results": [{"clause": A, "status": "NON_COMPLIANT", "risk_level": "HIGH",
+                          "rectification_steps": "Fix it", "change": MODIFIED, "previous_clause": "old"}]}
+    monkeypatch.setattr(revision_service, "split_into_clauses", lambda text: [A])
+
+    (result,) = revision_service.check_revision("v2", prior)["results"]
+
+    assert result["change"] == UNCHANGED
+    assert result["rectification_steps"] == ["Fix it"]
+    assert result["matched_rules"] == [] and "previous_clause" not in result
@@ -0,0 +1,24 @@
+from app.services import rule_cache
+
+
+def test_rule_cache_roundtrip_and_key_includes_collections(tmp_path):
+    cache = rule_cache.RuleCache(str(tmp_path / "rules.sqlite3"))
+    key = rule_cache.cache_key("clause", 2, ("regulations__v1",))
+
+    assert cache.get(key) is None
+    cache.put(key, ["r1", "r2"])
+    assert cache.get(key) == ("r1", "r2")
+
+    assert rule_cache.cache_key("clause", 2, ("regulations__v2",)) != key
+    # another worker process opening the same file sees the entry
+    assert rule_cache.RuleCache(str(tmp_path / "rules.sqlite3")).get(key) == ("r1", "r2")
+
+
+def test_rule_cache_prunes_oldest(monkeypatch, tmp_path):
+    monkeypatch.setattr(rule_cache, "PRUNE_EVERY", 5)
+    cache = rule_cache.RuleCache(str(tmp_path / "rules.sqlite3"), max_entries=3)
+    for n in range(5):
+        cache.put(f"k{n}", [str(n)])
+
+    assert cache.count() == 3
+    assert cache.get("k0") is None and cache.get("k4") == ("4",)
@@ -0,0 +1,103 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app import main, startup
+
+HEAVY_MODULES = ["langchain_ollama", "langchain_chroma", "chromadb", "pypdf", "docx"]
+
+
+def test_import_time_within_budget():
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        "import app.main\n"
+        "print(time.perf_counter() - t)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    backend = Path(__file__).resolve().parent.parent
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend,
+                         capture_output=True, text=True, check=True).stdout.splitlines()
+
+    assert float(out[0]) < startup.IMPORT_BUDGET_SECONDS
+    assert out[1] == ""
+
+
+def test_startup_within_budget_and_readiness(monkeypatch):
+    release = threading.Event()
+
+    def slow_warm_up():
+        startup.set_state("collection", "done")
+        startup.set_state("ingest", "running")
+        release.wait(5)
+        startup.set_state("ingest", "done")
+        startup.set_state("llm", "done")
+
+    monkeypatch.setattr(startup, "warm_up", slow_warm_up)
+    monkeypatch.setattr(main, "STARTUP_WARMUP", "background")
+    startup.reset_state()
+
+    t = time.perf_counter()
+    with TestClient(main.app) as client:
+        assert time.perf_counter() - t < startup.STARTUP_BUDGET_SECONDS
+
+        assert client.get("/healthz").status_code == 200
+
+        r = client.get("/readyz")
+        assert r.status_code == 503
+        assert r.json()["steps"]["ingest"] == "running"
+
+        release.set()
+        for _ in range(50):
+            r = client.get("/readyz")
+            if r.status_code == 200:
+                break
+            time.sleep(0.02)
+        assert r.status_code == 200
+
+    startup.reset_state()
+
+
+def test_warm_up_records_failures(monkeypatch):
+    from app.llm import ollama_client
+    from app.vectordb import chroma_client
+
+    def broken():
+        raise RuntimeError("no store")
+
+    monkeypatch.setattr(chroma_client, "get_chroma", broken)
+    monkeypatch.setattr(ollama_client, "preload_models", broken)
+    startup.reset_state()
+    startup.warm_up()
+
+    state = startup.readiness()
+    assert state["ready"] is False
+    assert state["steps"]["collection"] == "failed"
+    assert state["steps"]["ingest"] == "failed"
+    assert state["steps"]["llm"] == "failed"
+    startup.reset_state()
+
+
+def test_auto_ingest_falls_back_to_pdf_when_snapshot_restore_fails(monkeypatch, tmp_path):
+    from app.exceptions import SnapshotError
+    from app.vectordb import import_vectors, ingest_regulations_pdf
+
+    ingested = []
+
+    def bad_restore(snapshot_dir):
+        raise SnapshotError("Checksum mismatch for snapshot file part-00001.npy")
+
+    pdf = tmp_path / "regulations_master.pdf"
+    pdf.write_bytes(b"%PDF")
+    monkeypatch.setattr(startup, "REGULATIONS_PDF", pdf)
+    monkeypatch.setattr(import_vectors, "find_compatible_snapshot", lambda snapshot_dir: {"parts": []})
+    monkeypatch.setattr(import_vectors, "import_vectors_snapshot", bad_restore)
+    monkeypatch.setattr(ingest_regulations_pdf, "ingest_regulations_pdf",
+                        lambda path, reset=False, max_chunks=300: ingested.append(path))
+
+    assert startup.auto_ingest(0) == "done"
+    assert ingested == [str(pdf)]
@@ -8,6 +8,71 @@ st.title("Compliance Checker (PDF/DOCX + Regulations PDF)")
 
 tab1, tab2 = st.tabs(["1) Regulations Ingest", "2) Contract Compliance Check"])
 
+# ------------------- Report rendering -------------------
+def render_report(data):
+    if data.get("summary", {}).get("partial"):
+        st.warning(
+            f"Partial report ({data['summary'].get('partial_reason')}): "
+            f"{data['summary'].get('unevaluated_clauses', 0)} clauses were not evaluated in time."
+        )
+    else:
+        st.success("Compliance report ready.")
+
+    # ---------------- Summary ----------------
+    st.subheader("Overall Summary")
+    st.json(data.get("summary", {}))
+
+    # ---------------- Results ----------------
+    st.subheader("Clause-by-Clause Findings")
+    results = data.get("results", [])
+    if not results:
+        st.warning("No clauses detected. Ensure the contract has numbered clauses (1., 2., 3., etc.)")
+        st.stop()
+
+    for idx, r in enumerate(results, start=1):
+        st.markdown("---")
+        st.markdown(f"## Clause {idx}")
+
+        st.markdown("### Clause Text")
+        st.write(r.get("clause", ""))
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Status", r.get("status", ""))
+        col2.metric("Risk Level", r.get("risk_level", ""))
+        col3.metric("Rules Retrieved", len(r.get("matched_rules", [])))
+
+        st.markdown("### Reason (Why this is compliant / non-compliant)")
+        st.write(r.get("reason", ""))
+
+        st.markdown("### Risk / Impact")
+        st.write(r.get("risk_impact", ""))
+
+        if r.get("rectification_steps"):
+            st.markdown("### Rectification Steps (How to fix it)")
+            for step in r["rectification_steps"]:
+                st.write("-", step)
+
+        if r.get("recommended_contract_changes"):
+            st.markdown("### Recommended Contract Changes")
+            for c in r["recommended_contract_changes"]:
+                st.write("-", c)
+
+        if r.get("rewritten_clause"):
+            st.markdown("### Suggested Rewritten Clause (Fix)")
+            st.code(r["rewritten_clause"])
+
+        with st.expander("Rule Mapping (why & what violated)"):
+            for m in r.get("rule_mapping", []):
+                st.write("Rule:", m.get("rule_excerpt", ""))
+                st.write("Relevance:", m.get("relevance", ""))
+                st.write("Violation:", m.get("violation", False))
+                st.markdown("---")
+
+        with st.expander("Show retrieved rule excerpts"):
+            for mr in r.get("matched_rules", []):
+                st.write("-", mr)
+
+
 # ------------------- Tab 1: Regulations Ingest -------------------
 with tab1:
     st.subheader("Upload Regulations PDF (Vector DB Knowledge Base)")
@@ -28,12 +93,17 @@ with tab1:
             step=50
         )
 
+    framework = st.text_input(
+        "Framework (regulation set, e.g. gdpr, soc2, internal)",
+        value="default"
+    )
+
     if st.button("Ingest Regulations"):
         if reg_file is None:
             st.error("Please upload a Regulations PDF first.")
         else:
             files = {"file": (reg_file.name, reg_file.getvalue(), "application/pdf")}
-            params = {"reset": str(reset).lower(), "max_chunks": max_chunks}
+            params = {"reset": str(reset).lower(), "max_chunks": max_chunks, "framework": framework}
 
             with st.spinner("Embedding regulations into ChromaDB..."):
                 try:
@@ -77,12 +147,25 @@ with tab2:
         step=1
     )
 
+    try:
+        available_frameworks = requests.get(
+            f"{BACKEND_URL}/regulations/frameworks", timeout=10
+        ).json().get("frameworks", ["default"])
+    except Exception:
+        available_frameworks = ["default"]
+
+    frameworks = st.multiselect(
+        "Frameworks to check against",
+        options=available_frameworks,
+        default=["default"] if "default" in available_frameworks else available_frameworks[:1]
+    )
+
     if st.button("Check Compliance"):
         if contract_file is None:
             st.error("Please upload a contract file first.")
         else:
             files = {"file": (contract_file.name, contract_file.getvalue())}
-            params = {"top_k": top_k}
+            params = {"top_k": top_k, "frameworks": frameworks}
 
             with st.spinner("Generating detailed compliance report..."):
                 try:
@@ -102,59 +185,25 @@ with tab2:
                 st.stop()
 
             data = res.json()
+            # keep the report id in the URL so a reload re-opens the stored report
+            if data.get("report_id"):
+                st.query_params["report_id"] = data["report_id"]
+            render_report(data)
 
-            st.success("Compliance report generated successfully!")
-
-            # ---------------- Summary ----------------
-            st.subheader("Overall Summary")
-            st.json(data.get("summary", {}))
-
-            # ---------------- Results ----------------
-            st.subheader("Clause-by-Clause Findings")
-            results = data.get("results", [])
-            if not results:
-                st.warning("No clauses detected. Ensure the contract has numbered clauses (1., 2., 3., etc.)")
-                st.stop()
+    elif st.query_params.get("report_id"):
+        try:
+            res = requests.get(
+                f"{BACKEND_URL}/reports/{st.query_params['report_id']}",
+                params={"limit": 200},
+                timeout=60
+            )
+        except Exception as e:
+            st.error(f"Could not load saved report: {e}")
+            st.stop()
 
-            for idx, r in enumerate(results, start=1):
-                st.markdown("---")
-                st.markdown(f"## Clause {idx}")
-
-                st.markdown("### Clause Text")
-                st.write(r.get("clause", ""))
-
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Status", r.get("status", ""))
-                col2.metric("Risk Level", r.get("risk_level", ""))
-                col3.metric("Rules Retrieved", len(r.get("matched_rules", [])))
-
-                st.markdown("### Reason (Why this is compliant / non-compliant)")
-                st.write(r.get("reason", ""))
-
-                st.markdown("### Risk / Impact")
-                st.write(r.get("risk_impact", ""))
-
-                if r.get("rectification_steps"):
-                    st.markdown("### Rectification Steps (How to fix it)")
-                    for step in r["rectification_steps"]:
-                        st.write("-", step)
-
-                if r.get("recommended_contract_changes"):
-                    st.markdown("### Recommended Contract Changes")
-                    for c in r["recommended_contract_changes"]:
-                        st.write("-", c)
-
-                if r.get("rewritten_clause"):
-                    st.markdown("### Suggested Rewritten Clause (Fix)")
-                    st.code(r["rewritten_clause"])
-
-                with st.expander("Rule Mapping (why & what violated)"):
-                    for m in r.get("rule_mapping", []):
-                        st.write("Rule:", m.get("rule_excerpt", ""))
-                        st.write("Relevance:", m.get("relevance", ""))
-                        st.write("Violation:", m.get("violation", False))
-                        st.markdown("---")
-
-                with st.expander("Show retrieved rule excerpts"):
-                    for mr in r.get("matched_rules", []):
-                        st.write("-", mr)
+        if res.status_code == 200:
+            st.info(f"Saved report for {res.json().get('document', '')}")
+            render_report(res.json())
+        else:
+            st.error(f"Error {res.status_code}")
+            st.text(res.text)